@@ -44,25 +44,153 @@ options:
     default: '/apispec/ngfw.json'
     vars:
       - name: ansible_httpapi_ftd_spec_path
+  spec_cache_dir:
+    type: str
+    description:
+      - Specifies the directory where parsed API specifications are cached between connections.
+      - The cached specification is revalidated with a conditional request, so it is downloaded and parsed again
+        only when it changes on the device.
+      - The cache is disabled when the option is not set.
+    vars:
+      - name: ansible_httpapi_ftd_spec_cache_dir
+  spec_cache_max_size:
+    type: int
+    description:
+      - Specifies the maximum size of the API specification cache in bytes. Least recently used specifications are
+        evicted when the limit is exceeded.
+    default: 52428800
+    vars:
+      - name: ansible_httpapi_ftd_spec_cache_max_size
+  keep_alive:
+    type: bool
+    description:
+      - Specifies whether connections to the FTD device are kept alive and reused for subsequent requests
+        instead of opening a new TCP/TLS connection for every request.
+    default: False
+    vars:
+      - name: ansible_httpapi_ftd_keep_alive
+  connection_pool_size:
+    type: int
+    description:
+      - Specifies the maximum number of kept-alive connections to the FTD device. Used only when C(keep_alive)
+        is enabled.
+    default: 4
+    vars:
+      - name: ansible_httpapi_ftd_connection_pool_size
+  page_prefetch_workers:
+    type: int
+    description:
+      - Specifies the maximum number of pages fetched concurrently when objects are looked up in a list.
+      - Once the first page is received, the remaining pages are known from the paging info and fetched in
+        parallel. Pages are fetched one by one when set to 1.
+    default: 1
+    vars:
+      - name: ansible_httpapi_ftd_page_prefetch_workers
+  upsert_strategy:
+    type: str
+    description:
+      - Specifies how upsert operations find out whether the object exists.
+      - C(add_first) tries to add the object and edits the existing one when the device reports a duplicate name.
+      - C(lookup_first) looks the object up first and adds it only when it does not exist, which saves failing
+        add requests when most of the upserted objects already exist.
+      - C(auto) looks objects up first for the models where most of the objects upserted earlier in the same
+        connection already existed.
+    choices: ['add_first', 'lookup_first', 'auto']
+    default: add_first
+    vars:
+      - name: ansible_httpapi_ftd_upsert_strategy
+  retries:
+    type: int
+    description:
+      - Specifies the maximum number of times a request is retried when the device is overloaded (responds with
+        429 or 503 status code) or the connection to it fails.
+      - Retries are delayed with jittered exponential backoff, and the delay requested in C(Retry-After) header
+        is respected. Requests are not retried when set to 0.
+    default: 3
+    vars:
+      - name: ansible_httpapi_ftd_retries
+  retry_delay:
+    type: int
+    description:
+      - Specifies the upper bound of the delay before the first retry in seconds. The bound doubles with every
+        retry of the same request.
+    default: 1
+    vars:
+      - name: ansible_httpapi_ftd_retry_delay
+  max_retry_delay:
+    type: int
+    description:
+      - Specifies the maximum delay before a retry in seconds. Requests are not retried when the device asks to
+        wait longer.
+    default: 30
+    vars:
+      - name: ansible_httpapi_ftd_max_retry_delay
+  retry_non_idempotent:
+    type: bool
+    description:
+      - Specifies whether POST requests are retried too. Only GET, PUT and DELETE requests are retried by default,
+        as a retried POST request might create an object twice.
+    default: False
+    vars:
+      - name: ansible_httpapi_ftd_retry_non_idempotent
+  retry_budget:
+    type: int
+    description:
+      - Specifies the maximum total number of retries of all requests sent to the device during the connection,
+        so a device that keeps failing does not slow down the whole play.
+    default: 30
+    vars:
+      - name: ansible_httpapi_ftd_retry_budget
+  token_cache_dir:
+    type: str
+    description:
+      - Specifies the directory where tokens received from the device are cached between connections, so new
+        connections reuse them instead of logging in with the password again.
+      - Tokens are cached per device and user, encrypted with a key derived from the password and readable only
+        by the owner of the file. Tokens kept in the cache are not revoked when the connection is closed.
+      - The cache requires the C(cryptography) Python library and is disabled when the option is not set.
+    vars:
+      - name: ansible_httpapi_ftd_token_cache_dir
+  response_cache_size:
+    type: int
+    description:
+      - Specifies the maximum number of GET responses cached during the connection. Cached responses are
+        revalidated with conditional requests (C(If-None-Match) header), so unchanged objects are not downloaded
+        again. The ETag of the response or the version of the returned object is used as the validator.
+      - Least recently used responses are evicted when the cache is full. The cache is disabled when set to 0.
+    default: 0
+    vars:
+      - name: ansible_httpapi_ftd_response_cache_size
 """
 
 import json
 import os
 import re
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 
 from ansible import __version__ as ansible_version
 
 from ansible.module_utils.basic import to_text
 from ansible.errors import AnsibleConnectionFailure
-from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
 from ansible.module_utils.six.moves.urllib.parse import urlencode
+from ansible.module_utils.urls import open_url
 from ansible.plugins.httpapi import HttpApiBase
-from urllib3 import encode_multipart_formdata
-from urllib3.fields import RequestField
 from ansible.module_utils.connection import ConnectionError
 
 from module_utils.fdm_swagger_client import FdmSwaggerParser, SpecProp, FdmSwaggerValidator
 from module_utils.common import HTTPMethod, ResponseParams
+from module_utils.configuration import execute_operation_in_connection, PageSizeLimits, UpsertStatistics
+from module_utils.file_download import DownloadResult, FileDownload
+from module_utils.http_transport import PooledHttpTransport
+from module_utils.multipart import MultipartFileBody
+from module_utils.object_index import ObjectIndex
+from module_utils.response_cache import ResponseCache, get_response_validator
+from module_utils.retry import RetryBudget, RetryPolicy, RETRYABLE_STATUS_CODES
+from module_utils.spec_cache import SpecCache, spec_content_hash
+from module_utils.token_cache import TokenCache, TokenInfo, HAS_CRYPTOGRAPHY
 
 BASE_HEADERS = {
     'Content-Type': 'application/json',
@@ -72,6 +200,15 @@ BASE_HEADERS = {
 
 TOKEN_EXPIRATION_STATUS_CODE = 408
 UNAUTHORIZED_STATUS_CODE = 401
+NOT_MODIFIED_STATUS_CODE = 304
+RANGE_NOT_SATISFIABLE_STATUS_CODE = 416
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# the access token is refreshed in the background once less than the margin or a quarter of its lifetime remains,
+# and before the request when it is about to expire
+TOKEN_REFRESH_MARGIN = 60
+TOKEN_EXPIRY_MARGIN = 5
 
 try:
     from __main__ import display
@@ -89,7 +226,38 @@ class HttpApi(HttpApiBase):
         self.refresh_token = None
         self._api_spec = None
         self._api_validator = None
-        self._ignore_http_errors = False
+        self._transport = None
+        self._retry_policy = None
+        self._response_cache = None
+        # files are transferred concurrently, so the state of a single request is kept per thread
+        self._request_state = threading.local()
+        self._lock = threading.RLock()
+        # logins are serialized separately, so requests do not wait for a token being refreshed in the background
+        self._token_lock = threading.RLock()
+        self._token_refresh_thread = None
+        self._access_token_expires_at = None
+        self._refresh_token_expires_at = None
+        self._token_refresh_window = TOKEN_REFRESH_MARGIN
+        self._token_cache = None
+        self._page_size_limits = PageSizeLimits()
+        self._object_index = ObjectIndex()
+        self._upsert_statistics = UpsertStatistics()
+
+    @property
+    def _ignore_http_errors(self):
+        return getattr(self._request_state, 'ignore_http_errors', False)
+
+    @_ignore_http_errors.setter
+    def _ignore_http_errors(self, value):
+        self._request_state.ignore_http_errors = value
+
+    @property
+    def _request_body(self):
+        return getattr(self._request_state, 'body', None)
+
+    @_request_body.setter
+    def _request_body(self, value):
+        self._request_state.body = value
 
     def login(self, username, password):
         def request_token_payload(username, password):
@@ -105,6 +273,9 @@ class HttpApi(HttpApiBase):
                 'refresh_token': refresh_token
             }
 
+        if not self.refresh_token and self._restore_cached_tokens(username, password):
+            return
+
         if self.refresh_token:
             payload = refresh_token_payload(self.refresh_token)
         elif username and password:
@@ -115,9 +286,18 @@ class HttpApi(HttpApiBase):
         url = self._get_api_token_path()
         self._display(HTTPMethod.POST, 'login', url)
 
-        dummy, response_data = self._send_auth_request(
-            url, json.dumps(payload), method=HTTPMethod.POST, headers=BASE_HEADERS
-        )
+        try:
+            dummy, response_data = self._send_auth_request(
+                url, json.dumps(payload), method=HTTPMethod.POST, headers=BASE_HEADERS
+            )
+        except ConnectionError:
+            token_cache = self._get_token_cache(username, password)
+            if not self.refresh_token or token_cache is None:
+                raise
+            # the refresh token might have been revoked by another connection that shared it through the cache
+            token_cache.remove()
+            self.refresh_token = None
+            return self.login(username, password)
 
         response = self._response_to_json(self._get_response_value(response_data))
 
@@ -128,26 +308,154 @@ class HttpApi(HttpApiBase):
         except KeyError:
             raise ConnectionError(
                 'Server returned response without token info during connection authentication: %s' % response)
+        self._update_token_expiration(response)
+        self._cache_tokens(username, password)
 
-    def logout(self):
-        auth_payload = {
-            'grant_type': 'revoke_token',
-            'access_token': self.access_token,
-            'token_to_revoke': self.refresh_token
-        }
-
-        url = self._get_api_token_path()
+    def _get_token_cache(self, username, password):
+        if not self.get_option('token_cache_dir') or not username or not password:
+            return None
+        if self._token_cache is None:
+            if HAS_CRYPTOGRAPHY:
+                self._token_cache = TokenCache(self.get_option('token_cache_dir'), self.connection._url, username,
+                                               password)
+            else:
+                display.warning('Tokens are not cached, as the cryptography Python library is not installed.')
+                self._token_cache = False
+        return self._token_cache or None
+
+    def _restore_cached_tokens(self, username, password):
+        """
+        Restores the tokens cached by the previous connections. The cached access token is used as is if it
+        does not expire soon, otherwise, only the refresh token is restored, so the access token is refreshed.
+
+        :return: True if the cached access token can be used, otherwise False
+        :rtype: bool
+        """
+        token_cache = self._get_token_cache(username, password)
+        tokens = token_cache.load() if token_cache is not None else None
+        if not tokens:
+            return False
+
+        now = time.time()
+        refresh_token_expires_at = tokens.get(TokenInfo.REFRESH_TOKEN_EXPIRES_AT)
+        if refresh_token_expires_at is not None and refresh_token_expires_at - now <= TOKEN_EXPIRY_MARGIN:
+            return False
+        self.refresh_token = tokens[TokenInfo.REFRESH_TOKEN]
+        self._refresh_token_expires_at = refresh_token_expires_at
+
+        access_token_expires_at = tokens.get(TokenInfo.ACCESS_TOKEN_EXPIRES_AT)
+        if not tokens.get(TokenInfo.ACCESS_TOKEN) or access_token_expires_at is None or \
+                access_token_expires_at - now <= TOKEN_REFRESH_MARGIN:
+            return False
+        self.access_token = tokens[TokenInfo.ACCESS_TOKEN]
+        self._access_token_expires_at = access_token_expires_at
+        self._token_refresh_window = TOKEN_REFRESH_MARGIN
+        self.connection._auth = {'Authorization': 'Bearer %s' % self.access_token}
+        self._display(HTTPMethod.POST, 'login', 'cached access token is used')
+        return True
+
+    def _cache_tokens(self, username, password):
+        token_cache = self._get_token_cache(username, password)
+        if token_cache is None:
+            return
+        try:
+            token_cache.save({
+                TokenInfo.ACCESS_TOKEN: self.access_token,
+                TokenInfo.REFRESH_TOKEN: self.refresh_token,
+                TokenInfo.ACCESS_TOKEN_EXPIRES_AT: self._access_token_expires_at,
+                TokenInfo.REFRESH_TOKEN_EXPIRES_AT: self._refresh_token_expires_at
+            })
+        except (IOError, OSError) as e:
+            display.warning('Failed to cache tokens: %s' % to_text(e))
+
+    def _update_token_expiration(self, token_response):
+        def expiration_time(lifetime):
+            return now + lifetime if isinstance(lifetime, (int, float)) else None
+
+        now = time.time()
+        self._refresh_token_expires_at = expiration_time(token_response.get('refresh_expires_in'))
+        self._access_token_expires_at = expiration_time(token_response.get('expires_in'))
+        if self._access_token_expires_at is not None:
+            self._token_refresh_window = min(TOKEN_REFRESH_MARGIN, token_response['expires_in'] / 4.0)
+
+    def _refresh_token_ahead_of_expiry(self):
+        """
+        Refreshes the access token before it expires, so requests do not fail with the expired token and do not
+        have to be sent again. The token is refreshed in the background while it is still valid, and before
+        the request when it is about to expire.
+        """
+        expires_at = self._access_token_expires_at
+        # authentication requests do not need the access token
+        if expires_at is None or self._ignore_http_errors:
+            return
+
+        remaining_lifetime = expires_at - time.time()
+        if remaining_lifetime <= TOKEN_EXPIRY_MARGIN:
+            self._refresh_token(expires_at)
+        elif remaining_lifetime <= self._token_refresh_window:
+            with self._token_lock:
+                is_refreshing = self._token_refresh_thread is not None and self._token_refresh_thread.is_alive()
+                if not is_refreshing and self._access_token_expires_at == expires_at:
+                    self._token_refresh_thread = threading.Thread(target=self._refresh_token_in_background,
+                                                                  args=(expires_at,))
+                    self._token_refresh_thread.daemon = True
+                    self._token_refresh_thread.start()
+
+    def _refresh_token(self, expires_at):
+        # concurrent callers refresh the token only once, the others find it already refreshed
+        with self._token_lock:
+            if self._access_token_expires_at != expires_at:
+                return
+            if self._refresh_token_expires_at is not None and self._refresh_token_expires_at <= time.time():
+                self.refresh_token = None
+            self.login(self.connection.get_option('remote_user'), self.connection.get_option('password'))
 
-        self._display(HTTPMethod.POST, 'logout', url)
+    def _refresh_token_in_background(self, expires_at):
+        try:
+            self._refresh_token(expires_at)
+        except Exception as e:
+            # the token is refreshed again before the request when it is about to expire
+            self._display(HTTPMethod.POST, 'login:error', to_text(e))
 
-        self._send_auth_request(url, json.dumps(auth_payload), method=HTTPMethod.POST, headers=BASE_HEADERS)
-        self.refresh_token = None
-        self.access_token = None
+    def logout(self):
+        # waits for the token being refreshed in the background, so the refreshed token is revoked too
+        with self._token_lock:
+            if self._are_tokens_cached():
+                # other connections reuse the cached tokens, so they are kept until they expire
+                self._display(HTTPMethod.POST, 'logout', 'cached tokens are not revoked')
+            else:
+                auth_payload = {
+                    'grant_type': 'revoke_token',
+                    'access_token': self.access_token,
+                    'token_to_revoke': self.refresh_token
+                }
+
+                url = self._get_api_token_path()
+
+                self._display(HTTPMethod.POST, 'logout', url)
+
+                self._send_auth_request(url, json.dumps(auth_payload), method=HTTPMethod.POST,
+                                        headers=BASE_HEADERS)
+            self.refresh_token = None
+            self.access_token = None
+            self._access_token_expires_at = None
+            self._refresh_token_expires_at = None
+            if self._transport:
+                self._transport.close()
+                self._transport = None
+
+    def _are_tokens_cached(self):
+        if not self.get_option('token_cache_dir'):
+            return False
+        token_cache = self._get_token_cache(self.connection.get_option('remote_user'),
+                                            self.connection.get_option('password'))
+        cached_tokens = token_cache.load() if token_cache is not None else None
+        return bool(cached_tokens) and cached_tokens.get(TokenInfo.REFRESH_TOKEN) == self.refresh_token
 
     def _send_auth_request(self, path, data, **kwargs):
         try:
             self._ignore_http_errors = True
-            return self.connection.send(path, data, **kwargs)
+            return self._send(path, data, **kwargs)
         except HTTPError as e:
             # HttpApi connection does not read the error response from HTTPError, so we do it here and wrap it up in
             # ConnectionError, so the actual error message is displayed to the user.
@@ -156,6 +464,74 @@ class HttpApi(HttpApiBase):
         finally:
             self._ignore_http_errors = False
 
+    def _send(self, *args, **kwargs):
+        """
+        Sends the request over a kept-alive connection when `keep_alive` option is enabled and falls back to
+        `connection.send` otherwise. Accepts the same arguments and behaves the same way as `connection.send`.
+        """
+        self._refresh_token_ahead_of_expiry()
+        transport = self._get_transport()
+        if transport is None:
+            return self.connection.send(*args, **kwargs)
+        return self._send_over_transport(transport, *args, **kwargs)
+
+    def _send_over_transport(self, transport, path, data, method='GET', headers=None):
+        return self._send_with_auth(lambda auth_headers: transport.send(path, data, method=method,
+                                                                        headers=auth_headers), path, headers)
+
+    def _open_stream(self, path, method=HTTPMethod.GET, headers=None):
+        """
+        Sends the request the same way as `connection.send` does, but returns the response without reading its
+        body, so the body can be read in chunks. The response has to be closed by the caller.
+        """
+        self._refresh_token_ahead_of_expiry()
+        transport = self._get_transport()
+        if transport is not None:
+            return self._send_with_auth(lambda auth_headers: transport.open(path, method=method,
+                                                                            headers=auth_headers), path, headers)
+
+        def open_request(auth_headers):
+            url_kwargs = dict(method=method, headers=auth_headers, timeout=self.connection.get_option('timeout'),
+                              validate_certs=self.connection.get_option('validate_certs'))
+            if not self.connection._auth:
+                url_kwargs['url_username'] = self.connection.get_option('remote_user')
+                url_kwargs['url_password'] = self.connection.get_option('password')
+            return open_url(self.connection._url + path, **url_kwargs)
+
+        return self._send_with_auth(open_request, path, headers)
+
+    def _send_with_auth(self, send_func, path, headers):
+        request_headers = dict(headers or {})
+        if self.connection._auth:
+            request_headers.update(self.connection._auth)
+
+        try:
+            return send_func(request_headers)
+        except HTTPError as exc:
+            # the same error handling as in `connection.send`, so the expired token is refreshed and the request
+            # is retried with the new one
+            is_handled = self.handle_httperror(exc)
+            if is_handled is True:
+                return self._send_with_auth(send_func, path, headers)
+            elif is_handled is False:
+                raise AnsibleConnectionFailure('Could not connect to {0}: {1}'.format(self.connection._url + path,
+                                                                                      exc.reason))
+            raise
+        except URLError as exc:
+            raise AnsibleConnectionFailure('Could not connect to {0}: {1}'.format(self.connection._url + path,
+                                                                                  exc.reason))
+
+    def _get_transport(self):
+        with self._lock:
+            if self._transport is None and self.get_option('keep_alive'):
+                self._transport = PooledHttpTransport(
+                    self.connection._url,
+                    pool_size=self.get_option('connection_pool_size'),
+                    validate_certs=self.connection.get_option('validate_certs'),
+                    timeout=self.connection.get_option('timeout')
+                )
+            return self._transport
+
     def update_auth(self, response, response_data):
         # With tokens, authentication should not be checked and updated on each request
         return None
@@ -163,45 +539,117 @@ class HttpApi(HttpApiBase):
     def send_request(self, url_path, http_method, body_params=None, path_params=None, query_params=None):
         url = construct_url_path(url_path, path_params, query_params)
         data = json.dumps(body_params) if body_params else None
+        retries = self._get_retry_policy().start(http_method)
+        response_cache = self._get_response_cache()
+        cached_response = None
+        headers = BASE_HEADERS
+        if response_cache is not None:
+            if http_method.lower() == HTTPMethod.GET:
+                cached_response = response_cache.get(url)
+                if cached_response is not None:
+                    headers = dict(BASE_HEADERS)
+                    headers['If-None-Match'] = cached_response.validator
+            else:
+                response_cache.remove(url)
         try:
             self._display(http_method, 'url', url)
             if data:
                 self._display(http_method, 'data', data)
 
-            response, response_data = self.connection.send(url, data, method=http_method, headers=BASE_HEADERS)
+            response, response_data = self._send_with_retries(url, data, http_method, retries, headers)
 
             value = self._get_response_value(response_data)
             self._display(http_method, 'response', value)
 
-            return {
+            response_json = self._response_to_json(value)
+            if response_cache is not None and http_method.lower() == HTTPMethod.GET:
+                validator = get_response_validator(response.info().get('ETag'), response_json)
+                response_cache.put(url, validator, response.getcode(), value)
+            return self._add_retry_info({
                 ResponseParams.SUCCESS: True,
                 ResponseParams.STATUS_CODE: response.getcode(),
-                ResponseParams.RESPONSE: self._response_to_json(value)
-            }
+                ResponseParams.RESPONSE: response_json
+            }, retries)
         # Being invoked via JSON-RPC, this method does not serialize and pass HTTPError correctly to the method caller.
         # Thus, in order to handle non-200 responses, we need to wrap them into a simple structure and pass explicitly.
         except HTTPError as e:
+            if e.code == NOT_MODIFIED_STATUS_CODE and cached_response is not None:
+                self._display(http_method, 'response_cache', 'Response is not modified, using cached one')
+                return self._add_retry_info({
+                    ResponseParams.SUCCESS: True,
+                    ResponseParams.STATUS_CODE: cached_response.status_code,
+                    ResponseParams.RESPONSE: self._response_to_json(cached_response.body)
+                }, retries)
             error_msg = to_text(e.read())
             self._display(http_method, 'error', error_msg)
-            return {
+            return self._add_retry_info({
                 ResponseParams.SUCCESS: False,
                 ResponseParams.STATUS_CODE: e.code,
                 ResponseParams.RESPONSE: self._response_to_json(error_msg)
-            }
+            }, retries)
+
+    def _send_with_retries(self, url, data, http_method, retries, headers):
+        while True:
+            try:
+                return self._send(url, data, method=http_method, headers=headers)
+            except HTTPError as e:
+                retry_after = (e.hdrs or {}).get('Retry-After')
+                if e.code not in RETRYABLE_STATUS_CODES or not retries.wait_before_retry(retry_after):
+                    raise
+                error = 'status code %s' % e.code
+            except AnsibleConnectionFailure as e:
+                if not retries.wait_before_retry():
+                    raise
+                error = to_text(e)
+            self._display(http_method, 'retry', 'Retry %s after %s, waited %.1f seconds in total' % (
+                retries.count, error, retries.total_delay))
+
+    @staticmethod
+    def _add_retry_info(result, retries):
+        if retries.count:
+            result[ResponseParams.RETRIES] = retries.count
+            result[ResponseParams.RETRY_DELAY] = retries.total_delay
+        return result
+
+    def _get_retry_policy(self):
+        with self._lock:
+            if self._retry_policy is None:
+                # the budget is shared by all requests sent to the device during the connection
+                self._retry_policy = RetryPolicy(
+                    self.get_option('retries'),
+                    self.get_option('retry_delay'),
+                    self.get_option('max_retry_delay'),
+                    RetryBudget(self.get_option('retry_budget')),
+                    retry_non_idempotent=self.get_option('retry_non_idempotent')
+                )
+            return self._retry_policy
+
+    def _get_response_cache(self):
+        with self._lock:
+            if self._response_cache is None and self.get_option('response_cache_size') > 0:
+                self._response_cache = ResponseCache(self.get_option('response_cache_size'))
+            return self._response_cache
 
     def upload_file(self, from_path, to_url):
         url = construct_url_path(to_url)
         self._display(HTTPMethod.POST, 'upload', url)
-        with open(from_path, 'rb') as src_file:
-            rf = RequestField('fileToUpload', src_file.read(), os.path.basename(src_file.name))
-            rf.make_multipart()
-            body, content_type = encode_multipart_formdata([rf])
+        # uploaded files can change configuration objects in a way the index cannot track
+        self._object_index.invalidate()
 
-            headers = dict(BASE_HEADERS)
-            headers['Content-Type'] = content_type
-            headers['Content-Length'] = len(body)
+        def display_progress(sent_bytes, total_bytes):
+            self._display(HTTPMethod.POST, 'upload:progress', '%s of %s bytes sent (%d%%)' % (
+                sent_bytes, total_bytes, sent_bytes * 100 // total_bytes))
 
-            dummy, response_data = self.connection.send(url, data=body, method=HTTPMethod.POST, headers=headers)
+        with MultipartFileBody('fileToUpload', from_path, progress_callback=display_progress) as body:
+            headers = dict(BASE_HEADERS)
+            headers['Content-Type'] = body.content_type
+            headers['Content-Length'] = body.content_length
+
+            self._request_body = body
+            try:
+                dummy, response_data = self._send(url, data=body, method=HTTPMethod.POST, headers=headers)
+            finally:
+                self._request_body = None
             value = self._get_response_value(response_data)
             self._display(HTTPMethod.POST, 'upload:response', value)
             return self._response_to_json(value)
@@ -209,21 +657,95 @@ class HttpApi(HttpApiBase):
     def download_file(self, from_url, to_path, path_params=None):
         url = construct_url_path(from_url, path_params=path_params)
         self._display(HTTPMethod.GET, 'download', url)
-        response, response_data = self.connection.send(url, data=None, method=HTTPMethod.GET, headers=BASE_HEADERS)
+        # when the destination is a directory, the file name is known only from the response
+        download = None if os.path.isdir(to_path) else FileDownload(to_path)
+        try:
+            response = self._open_download_stream(url, download)
+        except HTTPError as e:
+            if e.code == NOT_MODIFIED_STATUS_CODE:
+                self._display(HTTPMethod.GET, 'not_modified', to_path)
+                return {DownloadResult.DESTINATION: to_path, DownloadResult.DOWNLOADED: False}
+            raise
 
-        if os.path.isdir(to_path):
-            filename = extract_filename_from_headers(response.info())
-            to_path = os.path.join(to_path, filename)
+        try:
+            if download is None:
+                filename = extract_filename_from_headers(response.info())
+                download = FileDownload(os.path.join(to_path, filename))
+
+            if download.is_not_modified(response):
+                self._display(HTTPMethod.GET, 'not_modified', download.path)
+                return {DownloadResult.DESTINATION: download.path, DownloadResult.DOWNLOADED: False}
+            download.write(response, DOWNLOAD_CHUNK_SIZE)
+        finally:
+            response.close()
+        self._display(HTTPMethod.GET, 'downloaded', download.path)
+        return {DownloadResult.DESTINATION: download.path, DownloadResult.DOWNLOADED: True}
+
+    def _open_download_stream(self, url, download):
+        headers = dict(BASE_HEADERS)
+        if download is not None:
+            headers.update(download.request_headers())
+        try:
+            return self._open_stream(url, method=HTTPMethod.GET, headers=headers)
+        except HTTPError as e:
+            # the partial file is larger than the file on the server, so the download is started from scratch
+            if e.code == RANGE_NOT_SATISFIABLE_STATUS_CODE and 'Range' in headers:
+                download.discard_partial()
+                return self._open_download_stream(url, download)
+            raise
+
+    def upload_files(self, files, max_workers):
+        """
+        Uploads files concurrently. A failed upload does not stop the others.
+
+        :param files: keyword arguments of `upload_file` for every file
+        :type files: list of dict
+        :param max_workers: maximum number of files uploaded at the same time
+        :type max_workers: int
+        :return: results of `upload_file` or errors in the order of the files
+        :rtype: list of dict
+        """
+        return self._transfer_files(self.upload_file, files, max_workers)
+
+    def download_files(self, files, max_workers):
+        """
+        Downloads files concurrently. A failed download does not stop the others.
+
+        :param files: keyword arguments of `download_file` for every file
+        :type files: list of dict
+        :param max_workers: maximum number of files downloaded at the same time
+        :type max_workers: int
+        :return: results of `download_file` or errors in the order of the files
+        :rtype: list of dict
+        """
+        return self._transfer_files(self.download_file, files, max_workers)
 
-        with open(to_path, "wb") as output_file:
-            output_file.write(response_data.getvalue())
-        self._display(HTTPMethod.GET, 'downloaded', to_path)
+    @staticmethod
+    def _transfer_files(transfer_func, files, max_workers):
+        def transfer(file_kwargs):
+            try:
+                return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: transfer_func(**file_kwargs)}
+            except Exception as e:
+                return {ResponseParams.SUCCESS: False, ResponseParams.RESPONSE: to_text(e)}
+
+        if not files:
+            return []
+        pool = ThreadPool(max(1, min(max_workers, len(files))))
+        try:
+            return pool.map(transfer, files)
+        finally:
+            pool.close()
 
     def handle_httperror(self, exc):
         is_auth_related_code = exc.code == TOKEN_EXPIRATION_STATUS_CODE or exc.code == UNAUTHORIZED_STATUS_CODE
         if not self._ignore_http_errors and is_auth_related_code:
-            self.connection._auth = None
-            self.login(self.connection.get_option('remote_user'), self.connection.get_option('password'))
+            # concurrent requests failing with the expired token log in one by one
+            with self._token_lock:
+                self.connection._auth = None
+                self.login(self.connection.get_option('remote_user'), self.connection.get_option('password'))
+            # the request is sent again, so the streamed body has to be sent from the beginning
+            if self._request_body is not None:
+                self._request_body.seek(0)
             return True
         # None means that the exception will be passed further to the caller
         return None
@@ -241,6 +763,10 @@ class HttpApi(HttpApiBase):
     def _get_api_token_path(self):
         return self.get_option('token_path')
 
+    def _get_spec_cache(self):
+        cache_dir = self.get_option('spec_cache_dir')
+        return SpecCache(cache_dir, self.get_option('spec_cache_max_size')) if cache_dir else None
+
     @staticmethod
     def _response_to_json(response_text):
         try:
@@ -270,18 +796,75 @@ class HttpApi(HttpApiBase):
     def validate_path_params(self, operation_name, params):
         return self.api_validator.validate_path_params(operation_name, params)
 
+    def execute_operation(self, operation_name, params, check_mode=False):
+        return execute_operation_in_connection(self, operation_name, params, check_mode,
+                                               page_size_limits=self._page_size_limits,
+                                               page_prefetch_workers=self.get_option('page_prefetch_workers'),
+                                               object_index=self._object_index,
+                                               upsert_strategy=self.get_option('upsert_strategy'),
+                                               upsert_statistics=self._upsert_statistics)
+
     @property
     def api_spec(self):
         if self._api_spec is None:
-            spec_path_url = self._get_api_spec_path()
-            response = self.send_request(url_path=spec_path_url, http_method=HTTPMethod.GET)
-            if response[ResponseParams.SUCCESS]:
-                self._api_spec = FdmSwaggerParser().parse_spec(response[ResponseParams.RESPONSE])
+            spec_cache = self._get_spec_cache()
+            if spec_cache:
+                self._api_spec = self._load_cached_api_spec(spec_cache)
             else:
-                raise ConnectionError('Failed to download API specification. Status code: %s. Response: %s' % (
-                    response[ResponseParams.STATUS_CODE], response[ResponseParams.RESPONSE]))
+                spec_path_url = self._get_api_spec_path()
+                response = self.send_request(url_path=spec_path_url, http_method=HTTPMethod.GET)
+                if response[ResponseParams.SUCCESS]:
+                    self._api_spec = FdmSwaggerParser().parse_spec(response[ResponseParams.RESPONSE], lazy=True)
+                else:
+                    raise ConnectionError('Failed to download API specification. Status code: %s. Response: %s' % (
+                        response[ResponseParams.STATUS_CODE], response[ResponseParams.RESPONSE]))
         return self._api_spec
 
+    def _load_cached_api_spec(self, spec_cache):
+        host = self.connection._url
+        validators = spec_cache.get_validators(host)
+
+        headers = dict(BASE_HEADERS)
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        url = self._get_api_spec_path()
+        self._display(HTTPMethod.GET, 'url', url)
+        try:
+            response, response_data = self._send(url, None, method=HTTPMethod.GET, headers=headers)
+        except HTTPError as e:
+            if e.code != NOT_MODIFIED_STATUS_CODE:
+                raise spec_download_error(e)
+            cached_spec = spec_cache.get_latest(host)
+            if cached_spec is not None:
+                self._display(HTTPMethod.GET, 'spec_cache', 'API specification is not modified, using cached one')
+                return cached_spec
+
+            # the cached specification is corrupted or has been evicted, so it is downloaded unconditionally
+            self._display(HTTPMethod.GET, 'spec_cache', 'Cached API specification is missing, downloading it again')
+            try:
+                response, response_data = self._send(url, None, method=HTTPMethod.GET, headers=BASE_HEADERS)
+            except HTTPError as e:
+                raise spec_download_error(e)
+
+        content = response_data.getvalue()
+        spec = self._response_to_json(to_text(content))
+        version = spec.get('info', {}).get('version')
+        content_hash = spec_content_hash(content)
+
+        parsed_spec = spec_cache.get(host, version, content_hash)
+        if parsed_spec is None:
+            parsed_spec = FdmSwaggerParser().parse_spec(spec)
+        else:
+            self._display(HTTPMethod.GET, 'spec_cache', 'API specification content is not changed, using cached one')
+
+        response_headers = response.info()
+        spec_cache.put(host, version, content_hash, parsed_spec, etag=response_headers.get('ETag'),
+                       last_modified=response_headers.get('Last-Modified'))
+        return parsed_spec
+
     @property
     def api_validator(self):
         if self._api_validator is None:
@@ -289,6 +872,11 @@ class HttpApi(HttpApiBase):
         return self._api_validator
 
 
+def spec_download_error(http_error):
+    return ConnectionError('Failed to download API specification. Status code: %s. Response: %s' % (
+        http_error.code, to_text(http_error.read())))
+
+
 def construct_url_path(path, path_params=None, query_params=None):
     url = path
     if path_params:
@@ -45,7 +45,10 @@ options:
   data:
     description:
       - Key-value pairs that should be sent as body parameters in a REST API call
-    type: dict
+      - For upsert operations, a list of objects can be specified to upsert all of them in a single task.
+        Existing objects are fetched once and matched with the listed ones by name, so only missing and changed
+        objects are sent to the device.
+    type: raw
   query_params:
     description:
       - Key-value pairs that should be sent as query parameters in a REST API call.
@@ -63,6 +66,47 @@ options:
       - Key-value dict that represents equality filters. Every key is a property name and value is its desired value.
         If multiple filters are present, they are combined with logical operator AND.
     type: dict
+  ignore_reference_order:
+    description:
+      - Compares lists of references to other objects (e.g. C(sourceNetworks)) regardless of the order of
+        references when checking whether the object on the device has to be changed.
+      - Only top-level properties defined in the API specification as lists of references are compared this way,
+        other lists are compared element by element.
+    type: bool
+    default: false
+    version_added: "2.8"
+  wait_for:
+    description:
+      - Repeats the operation until the returned object meets the condition and returns the final object.
+        Polling is done within a single module run, so asynchronous jobs can be awaited without C(until) loops.
+      - Only operations that get objects can be repeated.
+    type: dict
+    version_added: "2.8"
+    suboptions:
+      until:
+        description:
+          - Key-value pairs the returned object must have to stop polling. A list of values matches any of them.
+          - Either C(until) or C(while) is required.
+        type: dict
+      while:
+        description:
+          - Key-value pairs the returned object has while polling continues. A list of values matches any of them.
+        type: dict
+      timeout:
+        description:
+          - The maximum number of seconds to wait for the condition.
+        type: int
+        default: 300
+      poll_interval:
+        description:
+          - The number of seconds to wait before the second request. The interval doubles after every request.
+        type: int
+        default: 1
+      max_poll_interval:
+        description:
+          - The maximum number of seconds between two requests.
+        type: int
+        default: 30
 """
 
 EXAMPLES = """
@@ -79,6 +123,39 @@ EXAMPLES = """
       isSystemDefined: false
     register_as: "hostNetwork"
 
+- name: Create or update multiple network objects
+  ftd_configuration:
+    operation: "upsertNetworkObject"
+    data:
+      - name: "Ansible-network-host-1"
+        subType: "HOST"
+        value: "192.168.2.1"
+        type: "networkobject"
+      - name: "Ansible-network-host-2"
+        subType: "HOST"
+        value: "192.168.2.2"
+        type: "networkobject"
+    register_as: "upsertedNetworks"
+
+- name: Start a backup
+  ftd_configuration:
+    operation: "addBackupImmediate"
+    data:
+      scheduleType: "IMMEDIATE"
+      type: "scheduledbackup"
+    register_as: "backup"
+
+- name: Wait until the backup job finishes
+  ftd_configuration:
+    operation: "getJobHistoryBackup"
+    path_params:
+      objId: "{{ backup['jobHistoryUuid'] }}"
+    wait_for:
+      until:
+        status: ["SUCCESS", "FAILED"]
+      timeout: 600
+    register_as: "backupJob"
+
 - name: Delete the network object
   ftd_configuration:
     operation: "deleteNetworkObject"
@@ -88,44 +165,108 @@ EXAMPLES = """
 
 RETURN = """
 response:
-  description: HTTP response returned from the API call.
+  description:
+    - HTTP response returned from the API call.
+    - For upsert operations with a list of objects, a list with the name, the status (added, updated or unchanged)
+      and the resulting object for every listed object.
   returned: success
-  type: dict
+  type: raw
 """
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
 
 try:
-    from ansible.module_utils.configuration import BaseConfigurationResource, CheckModeException, \
+    from ansible.module_utils.configuration import RemoteConfigurationResource, CheckModeException, \
         FtdInvalidOperationNameError
-    from ansible.module_utils.fdm_swagger_client import ValidationError
+    from ansible.module_utils.fdm_swagger_client import OperationField, ValidationError
     from ansible.module_utils.common import construct_ansible_facts, FtdConfigurationError, \
-        FtdServerError, FtdUnexpectedResponse
+        FtdServerError, FtdUnexpectedResponse, HTTPMethod, PollTimeoutError, poll_until
 except ImportError:
-    from module_utils.configuration import BaseConfigurationResource, CheckModeException, FtdInvalidOperationNameError
-    from module_utils.fdm_swagger_client import ValidationError
+    from module_utils.configuration import RemoteConfigurationResource, CheckModeException, \
+        FtdInvalidOperationNameError
+    from module_utils.fdm_swagger_client import OperationField, ValidationError
     from module_utils.common import construct_ansible_facts, FtdConfigurationError, \
-        FtdServerError, FtdUnexpectedResponse
+        FtdServerError, FtdUnexpectedResponse, HTTPMethod, PollTimeoutError, poll_until
+
+
+def matches_condition(obj, condition):
+    """
+    Checks whether the object has all the key-value pairs of the condition. A list of values in the condition
+    matches any of the values.
+
+    :param obj: object returned by the operation
+    :param condition: expected key-value pairs
+    :type condition: dict
+    :rtype: bool
+    """
+    if not isinstance(obj, dict):
+        return False
+    for key, expected in condition.items():
+        expected_values = expected if isinstance(expected, list) else [expected]
+        if key not in obj or obj[key] not in expected_values:
+            return False
+    return True
+
+
+def execute_and_wait(connection, resource, op_name, params):
+    """
+    Executes the operation repeatedly until the returned object meets the `wait_for` condition.
+
+    :return: the final object
+    :raises PollTimeoutError: when the condition is not met in time
+    """
+    op_spec = connection.get_operation_spec(op_name)
+    if op_spec is None:
+        raise FtdInvalidOperationNameError(op_name)
+    if op_spec[OperationField.METHOD] != HTTPMethod.GET:
+        raise FtdConfigurationError('wait_for can be used only with operations that get objects')
+
+    wait_for = params['wait_for']
+    if wait_for['until'] is not None:
+        def is_done(obj):
+            return matches_condition(obj, wait_for['until'])
+    else:
+        def is_done(obj):
+            return not matches_condition(obj, wait_for['while'])
+
+    return poll_until(lambda: resource.execute_operation(op_name, params), is_done,
+                      wait_for['timeout'], wait_for['poll_interval'], wait_for['max_poll_interval'])
 
 
 def main():
     fields = dict(
         operation=dict(type='str', required=True),
-        data=dict(type='dict'),
+        data=dict(type='raw'),
         query_params=dict(type='dict'),
         path_params=dict(type='dict'),
         register_as=dict(type='str'),
-        filters=dict(type='dict')
+        filters=dict(type='dict'),
+        ignore_reference_order=dict(type='bool', default=False),
+        wait_for=dict(type='dict', options={
+            'until': dict(type='dict'),
+            'while': dict(type='dict'),
+            'timeout': dict(type='int', default=300),
+            'poll_interval': dict(type='int', default=1),
+            'max_poll_interval': dict(type='int', default=30)
+        }, required_one_of=[['until', 'while']], mutually_exclusive=[['until', 'while']])
     )
     module = AnsibleModule(argument_spec=fields,
                            supports_check_mode=True)
     params = module.params
+    if params['data'] is not None and not isinstance(params['data'], list):
+        try:
+            params['data'] = module._check_type_dict(params['data'])
+        except TypeError as e:
+            module.fail_json(msg='Invalid data provided: %s' % e)
 
     connection = Connection(module._socket_path)
-    resource = BaseConfigurationResource(connection, module.check_mode)
+    resource = RemoteConfigurationResource(connection, module.check_mode)
     op_name = params['operation']
     try:
-        resp = resource.execute_operation(op_name, params)
+        if params['wait_for']:
+            resp = execute_and_wait(connection, resource, op_name, params)
+        else:
+            resp = resource.execute_operation(op_name, params)
         module.exit_json(changed=resource.config_changed, response=resp,
                          ansible_facts=construct_ansible_facts(resp, module.params))
     except FtdInvalidOperationNameError as e:
@@ -141,6 +282,9 @@ def main():
         module.fail_json(msg=e.args[0])
     except CheckModeException:
         module.exit_json(changed=False)
+    except PollTimeoutError as e:
+        module.fail_json(msg='The object returned by %s operation did not meet the wait_for condition in %s seconds.' %
+                             (op_name, params['wait_for']['timeout']), response=e.last_result)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'network'}
+
+DOCUMENTATION = """
+---
+module: ftd_deployment
+short_description: Deploys pending changes to Cisco FTD devices over REST API
+description:
+  - Deploys pending configuration changes to Cisco FTD devices and waits until the deployment finishes.
+  - Nothing is deployed when there are no pending changes.
+  - When a deployment is already in progress, the module waits for it first, and then deploys the changes made
+    after it has started, if any.
+  - The deployment status is polled within a single module run, starting with C(poll_interval) and doubling
+    the interval after every poll up to C(max_poll_interval).
+version_added: "2.8"
+author: "Cisco Systems, Inc."
+options:
+  timeout:
+    description:
+      - The maximum number of seconds to wait for the deployment to finish.
+    type: int
+    default: 600
+  poll_interval:
+    description:
+      - The number of seconds to wait before the first poll of the deployment status.
+    type: int
+    default: 1
+  max_poll_interval:
+    description:
+      - The maximum number of seconds between two polls of the deployment status.
+    type: int
+    default: 30
+  register_as:
+    description:
+      - Specifies Ansible fact name that is used to register the final deployment status.
+    type: string
+"""
+
+EXAMPLES = """
+- name: Deploy pending changes
+  ftd_deployment:
+    timeout: 900
+    register_as: deployment_status
+"""
+
+RETURN = """
+response:
+  description:
+    - The final status of the deployment. Not returned when there are no pending changes.
+  returned: changed
+  type: dict
+msg:
+  description: The error message describing why the module failed.
+  returned: error
+  type: string
+"""
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.connection import Connection
+
+try:
+    from ansible.module_utils.configuration import RemoteConfigurationResource, ParamName
+    from ansible.module_utils.fdm_swagger_client import ValidationError
+    from ansible.module_utils.common import construct_ansible_facts, FtdServerError, PollTimeoutError, poll_until
+except ImportError:
+    from module_utils.configuration import RemoteConfigurationResource, ParamName
+    from module_utils.fdm_swagger_client import ValidationError
+    from module_utils.common import construct_ansible_facts, FtdServerError, PollTimeoutError, poll_until
+
+
+class DeploymentOperation:
+    GET_PENDING_CHANGES = 'getBaseEntityDiffList'
+    GET_DEPLOYMENT_LIST = 'getDeploymentList'
+    ADD_DEPLOYMENT = 'addDeployment'
+    GET_DEPLOYMENT = 'getDeployment'
+
+
+class DeploymentState:
+    QUEUED = 'QUEUED'
+    DEPLOYING = 'DEPLOYING'
+    DEPLOYED = 'DEPLOYED'
+
+
+IN_PROGRESS_STATES = (DeploymentState.QUEUED, DeploymentState.DEPLOYING)
+
+
+def has_pending_changes(resource):
+    # a single pending change is enough to decide, so there is no need to fetch the whole list
+    response = resource.execute_operation(DeploymentOperation.GET_PENDING_CHANGES,
+                                          {ParamName.QUERY_PARAMS: {'limit': 1}})
+    return bool(response.get('items'))
+
+
+def find_deployment_in_progress(resource):
+    # the deployment history can be long, so it is filtered by the state on the device, and when the device does not
+    # support the filter, the whole history is scanned inside the connection process with a single request
+    for state in IN_PROGRESS_STATES:
+        deployments = resource.execute_operation(DeploymentOperation.GET_DEPLOYMENT_LIST,
+                                                 {ParamName.FILTERS: {'state': state}})
+        if deployments:
+            return deployments[0]
+    return None
+
+
+def wait_for_deployment(resource, deployment_id, params):
+    """
+    Polls the deployment status with exponential backoff until the deployment finishes.
+
+    :return: the final deployment status
+    :rtype: dict
+    :raises PollTimeoutError: when the deployment does not finish in time
+    """
+    return poll_until(
+        lambda: resource.execute_operation(DeploymentOperation.GET_DEPLOYMENT,
+                                           {ParamName.PATH_PARAMS: {'objId': deployment_id}}),
+        lambda status: status.get('state') not in IN_PROGRESS_STATES,
+        params['timeout'], params['poll_interval'], params['max_poll_interval']
+    )
+
+
+def wait_for_successful_deployment(module, resource, deployment_id, params):
+    status = wait_for_deployment(resource, deployment_id, params)
+    if status.get('state') != DeploymentState.DEPLOYED:
+        module.fail_json(msg='Deployment failed. State: %s. Status: %s' % (
+            status.get('state'), status.get('statusMessages')), changed=True, response=status)
+    return status
+
+
+def main():
+    fields = dict(
+        timeout=dict(type='int', default=600),
+        poll_interval=dict(type='int', default=1),
+        max_poll_interval=dict(type='int', default=30),
+        register_as=dict(type='str')
+    )
+    module = AnsibleModule(argument_spec=fields,
+                           supports_check_mode=True)
+    params = module.params
+
+    connection = Connection(module._socket_path)
+    resource = RemoteConfigurationResource(connection)
+    try:
+        status = None
+        # changes being deployed are not pending anymore, so the deployment in progress is awaited before checking
+        # whether there is anything left to deploy
+        deployment = find_deployment_in_progress(resource)
+        if deployment is not None:
+            if module.check_mode:
+                module.exit_json(changed=True)
+            status = wait_for_successful_deployment(module, resource, deployment['id'], params)
+
+        if has_pending_changes(resource):
+            if module.check_mode:
+                module.exit_json(changed=True)
+            deployment = resource.execute_operation(DeploymentOperation.ADD_DEPLOYMENT, {})
+            status = wait_for_successful_deployment(module, resource, deployment['id'], params)
+
+        if status is None:
+            module.exit_json(changed=False, msg='There are no pending changes to deploy.')
+        module.exit_json(changed=True, response=status, ansible_facts=construct_ansible_facts(status, params))
+    except PollTimeoutError as e:
+        module.fail_json(msg='Deployment did not finish in %s seconds. State: %s' % (
+            params['timeout'], e.last_result.get('state')), changed=True, response=e.last_result)
+    except FtdServerError as e:
+        module.fail_json(msg='Server returned an error trying to deploy pending changes. Status code: %s. '
+                             'Server response: %s' % (e.code, e.response))
+    except ValidationError as e:
+        module.fail_json(msg=e.args[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -40,7 +40,7 @@ options:
     description:
       - The name of the operation to execute.
       - Only operations that return a file can be used in this module.
-    required: true
+      - Required unless every item of C(files) specifies its own operation.
     type: string
   path_params:
     description:
@@ -49,10 +49,30 @@ options:
   destination:
     description:
       - Absolute path of where to download the file to.
+      - Either C(destination) or C(files) is required.
       - If destination is a directory, the module uses a filename from 'Content-Disposition' header specified by
         the server.
-    required: true
+      - The file is not downloaded again when the server reports the same ETag or Last-Modified and
+        Content-Length as for the previous download, and the local file has not been changed since then.
+        The validators are kept in a hidden C(.<filename>.download.json) file next to the destination.
+      - Interrupted downloads are kept in a hidden C(.<filename>.part) file next to the destination and resumed
+        by the next download when the server supports byte ranges. Resuming requires destination to be a file
+        path, as the filename is not known before the response is received when destination is a directory.
     type: path
+  files:
+    description:
+      - List of files that are downloaded concurrently in a single task.
+      - Every item contains C(destination) and optionally C(operation) and C(path_params) overriding the ones of
+        the task.
+      - Files are streamed to disk, so memory usage does not depend on the number and size of the files.
+    type: list
+    version_added: "2.8"
+  max_concurrent_transfers:
+    description:
+      - The maximum number of files from C(files) downloaded at the same time.
+    type: int
+    default: 4
+    version_added: "2.8"
 """
 
 EXAMPLES = """
@@ -62,6 +82,17 @@ EXAMPLES = """
     path_params:
       objId: 'default'
     destination: /tmp/
+
+- name: Download backups
+  ftd_file_download:
+    operation: 'getdownloadbackup'
+    files:
+      - path_params:
+          objId: '{{ backup1.id }}'
+        destination: /tmp/backups/
+      - path_params:
+          objId: '{{ backup2.id }}'
+        destination: /tmp/backups/
 """
 
 RETURN = """
@@ -69,6 +100,23 @@ msg:
     description: The error message describing why the module failed.
     returned: error
     type: string
+destination:
+    description: The path to the downloaded file.
+    returned: success, when files are not specified
+    type: string
+downloaded:
+    description:
+      - Whether the file has been transferred. The module reports a change only when it has, and not when
+        the local file is up to date.
+    returned: success, when files are not specified
+    type: bool
+results:
+    description:
+      - Results of the downloads in the order of C(files). Every result contains C(operation), C(path_params) and
+        C(destination), and either C(downloaded) telling whether the file has been transferred or C(msg)
+        describing why the download failed.
+    returned: when files are specified
+    type: list
 """
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
@@ -76,9 +124,14 @@ from ansible.module_utils.connection import Connection
 try:
     from ansible.module_utils.fdm_swagger_client import OperationField, ValidationError, FILE_MODEL_NAME
     from ansible.module_utils.common import FtdServerError, HTTPMethod
+    from ansible.module_utils.file_download import DownloadResult
 except ImportError:
     from module_utils.fdm_swagger_client import OperationField, ValidationError, FILE_MODEL_NAME
     from module_utils.common import FtdServerError, HTTPMethod
+    from module_utils.file_download import DownloadResult
+
+
+DEFAULT_CONCURRENT_TRANSFERS = 4
 
 
 def is_download_operation(op_spec):
@@ -99,36 +152,92 @@ def validate_params(connection, op_name, path_params):
         })
 
 
+def get_download_operation_spec(module, connection, op_name):
+    op_spec = connection.get_operation_spec(op_name)
+    if op_spec is None:
+        module.fail_json(msg='Operation with specified name is not found: %s' % op_name)
+    if not is_download_operation(op_spec):
+        module.fail_json(
+            msg='Invalid download operation: %s. The operation must make GET request and return a file.' %
+                op_name)
+    return op_spec
+
+
+def download_files(module, connection, downloads, op_specs):
+    """
+    Downloads the files concurrently over the persistent connection and exits the module with the result of
+    every download.
+    """
+    if module.check_mode:
+        module.exit_json(changed=False, results=downloads)
+
+    files = [dict(from_url=op_specs[download['operation']][OperationField.URL], to_path=download['destination'],
+                  path_params=download['path_params']) for download in downloads]
+    results = []
+    for download, download_result in zip(downloads,
+                                         connection.download_files(files, module.params['max_concurrent_transfers'])):
+        if download_result['success']:
+            results.append(dict(download, **download_result['response']))
+        else:
+            results.append(dict(download, failed=True, msg=download_result['response']))
+
+    failed_results = [result for result in results if result.get('failed')]
+    changed = any(result.get(DownloadResult.DOWNLOADED) for result in results)
+    if failed_results:
+        module.fail_json(msg='Failed to download %s of %s files.' % (len(failed_results), len(results)),
+                         changed=changed, results=results)
+    module.exit_json(changed=changed, results=results)
+
+
 def main():
     fields = dict(
-        operation=dict(type='str', required=True),
+        operation=dict(type='str'),
         path_params=dict(type='dict'),
-        destination=dict(type='path', required=True)
+        destination=dict(type='path'),
+        files=dict(type='list', elements='dict', options=dict(
+            operation=dict(type='str'),
+            path_params=dict(type='dict'),
+            destination=dict(type='path', required=True)
+        )),
+        max_concurrent_transfers=dict(type='int', default=DEFAULT_CONCURRENT_TRANSFERS)
     )
     module = AnsibleModule(argument_spec=fields,
+                           required_one_of=[['destination', 'files']],
+                           mutually_exclusive=[['destination', 'files']],
                            supports_check_mode=True)
     params = module.params
-    connection = Connection(module._socket_path)
 
-    op_name = params['operation']
-    op_spec = connection.get_operation_spec(op_name)
-    if op_spec is None:
-        module.fail_json(msg='Operation with specified name is not found: %s' % op_name)
-    if not is_download_operation(op_spec):
-        module.fail_json(
-            msg='Invalid download operation: %s. The operation must make GET request and return a file.' %
-                op_name)
+    if params['files'] is None:
+        downloads = [dict(operation=params['operation'], path_params=params['path_params'],
+                          destination=params['destination'])]
+    else:
+        downloads = [dict(operation=item['operation'] or params['operation'],
+                          path_params=item['path_params'] or params['path_params'],
+                          destination=item['destination']) for item in params['files']]
+    if any(download['operation'] is None for download in downloads):
+        module.fail_json(msg='missing required arguments: operation')
+
+    connection = Connection(module._socket_path)
+    op_specs = {}
+    for download in downloads:
+        if download['operation'] not in op_specs:
+            op_specs[download['operation']] = get_download_operation_spec(module, connection, download['operation'])
 
     try:
-        path_params = params['path_params']
-        validate_params(connection, op_name, path_params)
+        for download in downloads:
+            validate_params(connection, download['operation'], download['path_params'])
+        if params['files'] is not None:
+            download_files(module, connection, downloads, op_specs)
+
+        op_name = params['operation']
         if module.check_mode:
             module.exit_json(changed=False)
-        connection.download_file(op_spec[OperationField.URL], params['destination'], path_params)
-        module.exit_json(changed=False)
+        result = connection.download_file(op_specs[op_name][OperationField.URL], params['destination'],
+                                          params['path_params'])
+        module.exit_json(changed=result[DownloadResult.DOWNLOADED], **result)
     except FtdServerError as e:
         module.fail_json(msg='Download request for %s operation failed. Status code: %s. '
-                             'Server response: %s' % (op_name, e.code, e.response))
+                             'Server response: %s' % (params['operation'], e.code, e.response))
     except ValidationError as e:
         module.fail_json(msg=e.args[0])
 
@@ -39,17 +39,44 @@ options:
     description:
       - The name of the operation to execute.
       - Only operations that upload file can be used in this module.
-    required: true
+      - Required unless every item of C(files) specifies its own operation.
     type: string
   file_to_upload:
     description:
       - Absolute path to the file that should be uploaded.
-    required: true
+      - Either C(file_to_upload) or C(files) is required.
     type: path
+  files:
+    description:
+      - List of files that are uploaded concurrently in a single task.
+      - Every item contains C(file_to_upload) and optionally C(operation) overriding the operation of the task.
+      - Files are streamed from disk, so memory usage does not depend on the number and size of the files.
+    type: list
+    version_added: "2.8"
+  max_concurrent_transfers:
+    description:
+      - The maximum number of files from C(files) uploaded at the same time.
+    type: int
+    default: 4
+    version_added: "2.8"
   register_as:
     description:
       - Specifies Ansible fact name that is used to register received response from the FTD device.
     type: string
+  uploaded_files_operation:
+    description:
+      - The name of the operation that lists files already uploaded with the upload operation.
+      - When one of the listed files has the same name and size as the local file, the upload is skipped and
+        the listed file is returned. FDM does not expose a digest of uploaded files, so their content cannot be
+        compared.
+      - Defaults to the list operation known for the upload operation, e.g. C(getUpgradeFileList) for
+        C(postuploadupgrade). Files are always uploaded when no list operation is known.
+    type: string
+  force:
+    description:
+      - Uploads the file even when an identical file has already been uploaded.
+    type: bool
+    default: no
 """
 
 EXAMPLES = """
@@ -57,6 +84,21 @@ EXAMPLES = """
   ftd_file_upload:
     operation: 'postuploaddiskfile'
     file_to_upload: /tmp/test1.txt
+
+- name: Upload upgrade package unless it is already on the device
+  ftd_file_upload:
+    operation: 'postuploadupgrade'
+    file_to_upload: /tmp/Cisco_FTD_Upgrade-6.3.0-83.sh.REL.tar
+
+- name: Upload certificate and disk files
+  ftd_file_upload:
+    operation: 'postuploaddiskfile'
+    files:
+      - file_to_upload: /tmp/cert.pem
+        operation: 'postuploadcert'
+      - file_to_upload: /tmp/test1.txt
+      - file_to_upload: /tmp/test2.txt
+    max_concurrent_transfers: 2
 """
 
 RETURN = """
@@ -64,44 +106,190 @@ msg:
     description: The error message describing why the module failed.
     returned: error
     type: string
+results:
+    description:
+      - Results of the uploads in the order of C(files). Every result contains C(file_to_upload), C(operation) and
+        C(changed), and either C(response) or C(msg) describing why the upload failed.
+    returned: when files are specified
+    type: list
 """
+import os
+from functools import partial
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.connection import Connection
 
 try:
+    from ansible.module_utils.configuration import RemoteConfigurationResource, ParamName, \
+        iterate_over_pageable_resource
     from ansible.module_utils.fdm_swagger_client import OperationField
     from ansible.module_utils.common import construct_ansible_facts, FtdServerError, HTTPMethod
 except ImportError:
+    from module_utils.configuration import RemoteConfigurationResource, ParamName, \
+        iterate_over_pageable_resource
     from module_utils.fdm_swagger_client import OperationField
     from module_utils.common import construct_ansible_facts, FtdServerError, HTTPMethod
 
+# list operations returning the files uploaded by the upload operations
+UPLOADED_FILES_OPERATIONS = {
+    'postuploadupgrade': 'getUpgradeFileList'
+}
+FILE_NAME_FIELDS = ('upgradeFileName', 'diskFileName', 'fileName')
+FILE_SIZE_FIELD = 'fileSize'
+DEFAULT_CONCURRENT_TRANSFERS = 4
+
 
 def is_upload_operation(op_spec):
     return op_spec[OperationField.METHOD] == HTTPMethod.POST or 'UploadStatus' in op_spec[OperationField.MODEL_NAME]
 
 
+def find_uploaded_file(file_path, uploaded_files):
+    """
+    Finds the uploaded file identical to the local one. FDM does not expose a digest of uploaded files,
+    so files are compared by name and size only.
+
+    :param file_path: path to the local file
+    :type file_path: str
+    :param uploaded_files: files returned by the list operation
+    :type uploaded_files: list
+    :return: the identical uploaded file or None
+    :rtype: dict
+    """
+    file_name = os.path.basename(file_path)
+    file_size = os.path.getsize(file_path)
+
+    for uploaded_file in uploaded_files:
+        names = [uploaded_file[field] for field in FILE_NAME_FIELDS if uploaded_file.get(field)]
+        size = uploaded_file.get(FILE_SIZE_FIELD)
+        if file_name in names and size is not None and str(size) == str(file_size):
+            return uploaded_file
+    return None
+
+
+def get_upload_operation_spec(module, connection, op_name):
+    op_spec = connection.get_operation_spec(op_name)
+    if op_spec is None:
+        module.fail_json(msg='Operation with specified name is not found: %s' % op_name)
+    if not is_upload_operation(op_spec):
+        module.fail_json(
+            msg='Invalid upload operation: %s. The operation must make POST request and return UploadStatus model.' %
+                op_name)
+    return op_spec
+
+
+def list_uploaded_files(module, connection, resource, list_op_name):
+    """
+    Lists the uploaded files page by page. Every page is fetched by the connection with a single request.
+    """
+    if connection.get_operation_spec(list_op_name) is None:
+        module.fail_json(msg='Operation with specified name is not found: %s' % list_op_name)
+    try:
+        return list(iterate_over_pageable_resource(partial(resource.execute_operation, list_op_name),
+                                                   {ParamName.QUERY_PARAMS: {}, ParamName.PATH_PARAMS: {}}))
+    except FtdServerError as e:
+        module.fail_json(msg='Listing uploaded files with %s operation failed. Status code: %s. '
+                             'Server response: %s' % (list_op_name, e.code, e.response))
+
+
+def find_uploaded_files(module, connection, uploads):
+    """
+    Finds the already uploaded file for every upload. Uploaded files are listed once per list operation.
+
+    :return: list of uploaded files or None in the order of uploads
+    :rtype: list
+    """
+    params = module.params
+    resource = RemoteConfigurationResource(connection)
+    uploaded_files_by_operation = {}
+    found_files = []
+    for upload in uploads:
+        list_op_name = params['uploaded_files_operation'] or UPLOADED_FILES_OPERATIONS.get(upload['operation'])
+        if not list_op_name or params['force']:
+            found_files.append(None)
+            continue
+        if list_op_name not in uploaded_files_by_operation:
+            uploaded_files_by_operation[list_op_name] = list_uploaded_files(module, connection, resource, list_op_name)
+        found_files.append(find_uploaded_file(upload['file_to_upload'], uploaded_files_by_operation[list_op_name]))
+    return found_files
+
+
+def upload_files(module, connection, uploads, op_specs):
+    """
+    Uploads the files that are not on the device yet concurrently over the persistent connection and exits
+    the module with the result of every upload.
+    """
+    params = module.params
+    results = [dict(upload, changed=False, response=uploaded_file)
+               for upload, uploaded_file in zip(uploads, find_uploaded_files(module, connection, uploads))]
+    pending_results = [result for result in results if result['response'] is None]
+    for result in pending_results:
+        result['changed'] = True
+
+    if not module.check_mode and pending_results:
+        files = [dict(from_path=result['file_to_upload'], to_url=op_specs[result['operation']][OperationField.URL])
+                 for result in pending_results]
+        for result, upload_result in zip(pending_results,
+                                         connection.upload_files(files, params['max_concurrent_transfers'])):
+            if upload_result['success']:
+                result['response'] = upload_result['response']
+            else:
+                result.update(changed=False, failed=True, msg=upload_result['response'])
+                del result['response']
+
+    failed_results = [result for result in results if result.get('failed')]
+    changed = any(result['changed'] for result in results)
+    if failed_results:
+        module.fail_json(msg='Failed to upload %s of %s files.' % (len(failed_results), len(results)),
+                         changed=changed, results=results)
+    responses = [result.get('response') for result in results]
+    module.exit_json(changed=changed, results=results, ansible_facts=construct_ansible_facts(responses, params))
+
+
 def main():
     fields = dict(
-        operation=dict(type='str', required=True),
-        file_to_upload=dict(type='path', required=True),
+        operation=dict(type='str'),
+        file_to_upload=dict(type='path'),
+        files=dict(type='list', elements='dict', options=dict(
+            operation=dict(type='str'),
+            file_to_upload=dict(type='path', required=True)
+        )),
+        max_concurrent_transfers=dict(type='int', default=DEFAULT_CONCURRENT_TRANSFERS),
         register_as=dict(type='str'),
+        uploaded_files_operation=dict(type='str'),
+        force=dict(type='bool', default=False)
     )
     module = AnsibleModule(argument_spec=fields,
+                           required_one_of=[['file_to_upload', 'files']],
+                           mutually_exclusive=[['file_to_upload', 'files']],
                            supports_check_mode=True)
     params = module.params
+
+    if params['files'] is None:
+        uploads = [dict(operation=params['operation'], file_to_upload=params['file_to_upload'])]
+    else:
+        uploads = [dict(operation=item['operation'] or params['operation'], file_to_upload=item['file_to_upload'])
+                   for item in params['files']]
+    if any(upload['operation'] is None for upload in uploads):
+        module.fail_json(msg='missing required arguments: operation')
+
     connection = Connection(module._socket_path)
+    op_specs = {}
+    for upload in uploads:
+        if upload['operation'] not in op_specs:
+            op_specs[upload['operation']] = get_upload_operation_spec(module, connection, upload['operation'])
 
-    op_spec = connection.get_operation_spec(params['operation'])
-    if op_spec is None:
-        module.fail_json(msg='Operation with specified name is not found: %s' % params['operation'])
-    if not is_upload_operation(op_spec):
-        module.fail_json(
-            msg='Invalid upload operation: %s. The operation must make POST request and return UploadStatus model.' %
-                params['operation'])
+    if params['files'] is not None:
+        upload_files(module, connection, uploads, op_specs)
+
+    uploaded_file = find_uploaded_files(module, connection, uploads)[0]
+    if uploaded_file is not None:
+        module.exit_json(changed=False, response=uploaded_file,
+                         ansible_facts=construct_ansible_facts(uploaded_file, module.params))
 
     try:
         if module.check_mode:
-            module.exit_json()
+            module.exit_json(changed=True)
+        op_spec = op_specs[params['operation']]
         resp = connection.upload_file(params['file_to_upload'], op_spec[OperationField.URL])
         module.exit_json(changed=True, response=resp, ansible_facts=construct_ansible_facts(resp, module.params))
     except FtdServerError as e:
@@ -16,7 +16,13 @@
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import hashlib
+import json
+import os
 import re
+import tempfile
+import time
+from collections import Counter
 
 from ansible.module_utils._text import to_text
 from ansible.module_utils.common.collections import is_string
@@ -38,6 +44,8 @@ class ResponseParams:
     SUCCESS = 'success'
     STATUS_CODE = 'status_code'
     RESPONSE = 'response'
+    RETRIES = 'retries'
+    RETRY_DELAY = 'retry_delay'
 
 
 class FtdConfigurationError(Exception):
@@ -59,6 +67,14 @@ class FtdUnexpectedResponse(Exception):
     pass
 
 
+class PollTimeoutError(Exception):
+    """The exception to be raised when the polled result does not reach the expected state in time."""
+
+    def __init__(self, last_result):
+        super(PollTimeoutError, self).__init__(last_result)
+        self.last_result = last_result
+
+
 def construct_ansible_facts(response, params):
     facts = dict()
     if response:
@@ -72,6 +88,66 @@ def construct_ansible_facts(response, params):
     return facts
 
 
+def write_file_atomically(path, mode, write_content, permissions=None):
+    """
+    Writes the file through a temporary file in the same directory that replaces the destination file once
+    the content is completely written, so readers never see a partially written file.
+
+    :param path: path to the destination file
+    :type path: str
+    :param mode: mode the temporary file is opened with, 'w' or 'wb'
+    :type mode: str
+    :param write_content: function that receives the opened file and writes the content into it
+    :type write_content: callable
+    :param permissions: permissions of the written file, by default, the file is readable only by its owner
+    :type permissions: int
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.%s.' % os.path.basename(path),
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_content(f)
+        if permissions is not None:
+            os.chmod(tmp_path, permissions)
+        os.rename(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def poll_until(poll, is_done, timeout, poll_interval, max_poll_interval):
+    """
+    Calls `poll` until its result is done, doubling the interval between the calls up to `max_poll_interval`.
+
+    :param poll: function returning the current result
+    :type poll: callable
+    :param is_done: function checking whether the result is final
+    :type is_done: callable
+    :param timeout: maximum number of seconds to wait for the final result
+    :type timeout: int
+    :param poll_interval: number of seconds to wait before the second call
+    :type poll_interval: int
+    :param max_poll_interval: maximum number of seconds between two calls
+    :type max_poll_interval: int
+    :return: the final result
+    :raises PollTimeoutError: when the result is not final after `timeout` seconds
+    """
+    deadline = time.time() + timeout
+    while True:
+        result = poll()
+        if is_done(result):
+            return result
+
+        remaining_time = deadline - time.time()
+        if remaining_time <= 0:
+            raise PollTimeoutError(result)
+        time.sleep(min(poll_interval, remaining_time))
+        poll_interval = min(poll_interval * 2, max_poll_interval)
+
+
 def copy_identity_properties(source_obj, dest_obj):
     for property_name in IDENTITY_PROPERTIES:
         if property_name in source_obj:
@@ -177,7 +253,32 @@ def equal_values(v1, v2):
         return v1 == v2
 
 
-def equal_objects(d1, d2):
+def is_object_ref_list(value):
+    """
+    Checks if a value is a non-empty list of reference objects.
+
+    :return: True if passed value is a list and all its elements are reference objects, otherwise False
+    :rtype: bool
+    """
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) and is_object_ref(v) for v in value)
+
+
+def equal_object_ref_lists_ignoring_order(l1, l2):
+    """
+    Checks whether two lists reference the same objects regardless of their order. References are compared as
+    multisets of ids and types, so a reference listed twice has to be listed twice in both lists.
+
+    :type l1: list
+    :type l2: list
+    :return: True if passed lists reference the same objects the same number of times, otherwise False
+    :rtype: bool
+    """
+    if len(l1) != len(l2):
+        return False
+    return Counter((ref['id'], ref['type']) for ref in l1) == Counter((ref['id'], ref['type']) for ref in l2)
+
+
+def equal_objects(d1, d2, unordered_fields=None):
     """
     Checks whether two objects are equal. Ignores special object properties (e.g. 'id', 'version') and
     properties with None and empty values. In case properties contains a reference to the other object,
@@ -185,9 +286,107 @@ def equal_objects(d1, d2):
 
     :type d1: dict
     :type d2: dict
+    :param unordered_fields: names of properties compared regardless of the order of their elements when both
+        values are lists of references, other lists are compared element by element
+    :type unordered_fields: collections.Iterable
     :return: True if passed objects and their properties are equal. Otherwise, returns False.
     """
     d1 = dict((k, d1[k]) for k in d1.keys() if k not in NON_COMPARABLE_PROPERTIES and d1[k])
     d2 = dict((k, d2[k]) for k in d2.keys() if k not in NON_COMPARABLE_PROPERTIES and d2[k])
 
+    for field in unordered_fields or ():
+        if is_object_ref_list(d1.get(field)) and is_object_ref_list(d2.get(field)):
+            if not equal_object_ref_lists_ignoring_order(d1.pop(field), d2.pop(field)):
+                return False
+
     return equal_dicts(d1, d2, compare_by_reference=False)
+
+
+def object_fingerprint(obj, unordered_fields=None):
+    """
+    Computes a stable hash of the object with the same semantics as `equal_objects`: two objects have the same
+    fingerprint if and only if `equal_objects` considers them equal. Special object properties and properties
+    with empty values are ignored, nested references to other objects are represented by their ids and types only.
+
+    :type obj: dict
+    :param unordered_fields: names of properties with lists of references that are compared regardless of order
+    :type unordered_fields: collections.Iterable
+    :return: hex digest of the canonical form of the object
+    :rtype: str
+    """
+    comparable_obj = dict((k, obj[k]) for k in obj.keys() if k not in NON_COMPARABLE_PROPERTIES and obj[k])
+    canonical_form = _canonical_dict(comparable_obj, compare_by_reference=False)
+
+    for field in unordered_fields or ():
+        if is_object_ref_list(comparable_obj.get(field)):
+            canonical_refs = [_canonical_dict(ref) for ref in comparable_obj[field]]
+            canonical_form[1][_canonical_key(field)] = ['m', sorted(canonical_refs, key=repr)]
+
+    return hashlib.sha1(json.dumps(canonical_form, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def _canonical_dict(d, compare_by_reference=True):
+    if compare_by_reference and is_object_ref(d):
+        return ['r', _canonical_value(d['id']), _canonical_value(d['type'])]
+    return ['d', dict((_canonical_key(k), _canonical_value(v)) for k, v in d.items())]
+
+
+def _canonical_key(key):
+    # JSON keys are strings only, so keys of other types are tagged with their type to avoid collisions
+    if is_string(key):
+        return 's' + to_text(key)
+    return 'o%s:%r' % (type(key).__name__, key)
+
+
+def _canonical_value(value):
+    # values are tagged, so values of different types never have the same canonical form (see `equal_values`)
+    if is_string(value):
+        return to_text(value)
+
+    value_type = type(value)
+    if value_type == list:
+        return ['l', [_canonical_value(v) for v in value]]
+    elif value_type == dict:
+        return _canonical_dict(value)
+    elif value is None or value_type in (bool, int, float):
+        return value
+    else:
+        return ['o', value_type.__name__, repr(value)]
+
+
+class ObjectFingerprints(object):
+    """
+    Caches fingerprints of objects by their identity, so every object is canonicalized and hashed only once no
+    matter how many times it is compared. Cached objects must not be modified while the cache is in use.
+    """
+
+    def __init__(self, unordered_fields=None):
+        """
+        :param unordered_fields: names of properties with lists of references that are compared regardless of order
+        :type unordered_fields: collections.Iterable
+        """
+        self._fingerprints = {}
+        self._unordered_fields = unordered_fields
+
+    def get(self, obj):
+        """
+        Returns the fingerprint of the object computed by `object_fingerprint`.
+
+        :type obj: dict
+        :rtype: str
+        """
+        entry = self._fingerprints.get(id(obj))
+        if entry is None:
+            # the object is kept along with its fingerprint, so its id cannot be reused by another object
+            entry = self._fingerprints[id(obj)] = (obj, object_fingerprint(obj, self._unordered_fields))
+        return entry[1]
+
+    def equal(self, d1, d2):
+        """
+        Checks whether two objects are equal in the same way as `equal_objects` does.
+
+        :type d1: dict
+        :type d2: dict
+        :rtype: bool
+        """
+        return self.get(d1) == self.get(d2)
@@ -17,22 +17,29 @@
 #
 import copy
 from functools import partial
+from multiprocessing.pool import ThreadPool
 
 from ansible.module_utils.six import iteritems
 
 try:
     from ansible.module_utils.common import HTTPMethod, equal_objects, FtdConfigurationError, \
-        FtdServerError, ResponseParams, copy_identity_properties, FtdUnexpectedResponse
-    from ansible.module_utils.fdm_swagger_client import OperationField, ValidationError
+        FtdServerError, ResponseParams, copy_identity_properties, FtdUnexpectedResponse, ObjectFingerprints
+    from ansible.module_utils.fdm_swagger_client import OperationField, ValidationError, PropName, PropType
 except ImportError:
     from module_utils.common import HTTPMethod, equal_objects, FtdConfigurationError, \
-        FtdServerError, ResponseParams, copy_identity_properties, FtdUnexpectedResponse
-    from module_utils.fdm_swagger_client import OperationField, ValidationError
+        FtdServerError, ResponseParams, copy_identity_properties, FtdUnexpectedResponse, ObjectFingerprints
+    from module_utils.fdm_swagger_client import OperationField, ValidationError, PropName, PropType
 
 DEFAULT_PAGE_SIZE = 10
 DEFAULT_OFFSET = 0
+ADAPTIVE_INITIAL_PAGE_SIZE = 1000
 
+REFERENCE_MODEL_NAME = 'ReferenceModel'
+VERSION_PROPERTY = 'version'
+
+BAD_REQUEST_STATUS = 400
 UNPROCESSABLE_ENTITY_STATUS = 422
+INTERNAL_SERVER_ERROR_STATUS = 500
 INVALID_UUID_ERROR_MESSAGE = "Validation failed due to an invalid UUID"
 DUPLICATE_NAME_ERROR_MESSAGE = "Validation failed due to a duplicate name"
 
@@ -54,11 +61,25 @@ class QueryParams:
     FILTER = 'filter'
 
 
+class UpsertStatus:
+    ADDED = 'added'
+    UPDATED = 'updated'
+    UNCHANGED = 'unchanged'
+
+
 class ParamName:
     QUERY_PARAMS = 'query_params'
     PATH_PARAMS = 'path_params'
     DATA = 'data'
     FILTERS = 'filters'
+    IGNORE_REFERENCE_ORDER = 'ignore_reference_order'
+
+
+class ExecutionResult:
+    SUCCESS = 'success'
+    RESPONSE = 'response'
+    CONFIG_CHANGED = 'config_changed'
+    ERROR = 'error'
 
 
 class CheckModeException(Exception):
@@ -71,6 +92,43 @@ class FtdInvalidOperationNameError(Exception):
         self.operation_name = operation_name
 
 
+# Exceptions that are expected from operation execution and have to be passed from the connection process to
+# the module. Every exception is serialized as its constructor arguments, so it can be recreated on the module side.
+SERIALIZABLE_ERRORS = {
+    'FtdInvalidOperationNameError': (FtdInvalidOperationNameError, lambda e: [e.operation_name]),
+    'FtdConfigurationError': (FtdConfigurationError, lambda e: [e.msg, e.obj]),
+    'FtdServerError': (FtdServerError, lambda e: [e.response, e.code]),
+    'FtdUnexpectedResponse': (FtdUnexpectedResponse, lambda e: list(e.args)),
+    'ValidationError': (ValidationError, lambda e: list(e.args)),
+    'CheckModeException': (CheckModeException, lambda e: list(e.args))
+}
+
+
+def serialize_error(error):
+    """
+    Converts an exception raised during operation execution into a JSON-serializable dict.
+
+    :param error: one of the exceptions listed in SERIALIZABLE_ERRORS
+    :type error: Exception
+    :return: dict with the exception type and its constructor arguments
+    :rtype: dict
+    """
+    error_type = type(error).__name__
+    dummy, get_args = SERIALIZABLE_ERRORS[error_type]
+    return {'type': error_type, 'args': get_args(error)}
+
+
+def deserialize_error(error):
+    """
+    Recreates the exception serialized by `serialize_error`.
+
+    :type error: dict
+    :rtype: Exception
+    """
+    error_class, dummy = SERIALIZABLE_ERRORS[error['type']]
+    return error_class(*error['args'])
+
+
 class OperationChecker(object):
 
     @classmethod
@@ -200,15 +258,63 @@ class OperationChecker(object):
         return amount_supported_operations == amount_operations_need_for_upsert_operation
 
 
+class UpsertStrategy:
+    ADD_FIRST = 'add_first'
+    LOOKUP_FIRST = 'lookup_first'
+    AUTO = 'auto'
+
+
+class UpsertStatistics(object):
+    """
+    Counts per model how many objects requested to be added already existed on the device. The auto upsert
+    strategy looks objects up first for models where most of them exist, so the instance should live as long as
+    the connection to the device.
+    """
+
+    def __init__(self):
+        self._counts = {}
+
+    def record(self, model_name, existed):
+        existing_count, total_count = self._counts.get(model_name, (0, 0))
+        self._counts[model_name] = (existing_count + int(existed), total_count + 1)
+
+    def mostly_existing(self, model_name):
+        existing_count, total_count = self._counts.get(model_name, (0, 0))
+        return existing_count * 2 > total_count
+
+
+class PageSizeLimits(object):
+    """
+    Keeps the largest page sizes accepted by get list operations. Limits are learned from the server responses,
+    so the instance should live as long as the connection to the device to avoid learning them again.
+    """
+
+    def __init__(self, initial_page_size=ADAPTIVE_INITIAL_PAGE_SIZE):
+        self._initial_page_size = initial_page_size
+        self._limits = {}
+
+    def get(self, operation_name):
+        return self._limits.get(operation_name, self._initial_page_size)
+
+    def reduce(self, operation_name, limit):
+        self._limits[operation_name] = min(limit, self.get(operation_name))
+
+
 class BaseConfigurationResource(object):
 
-    def __init__(self, conn, check_mode=False):
+    def __init__(self, conn, check_mode=False, page_size_limits=None, page_prefetch_workers=1, object_index=None,
+                 upsert_strategy=UpsertStrategy.ADD_FIRST, upsert_statistics=None):
         self._conn = conn
         self.config_changed = False
         self._operation_spec_cache = {}
         self._models_operations_specs_cache = {}
         self._check_mode = check_mode
         self._operation_checker = OperationChecker
+        self._page_size_limits = page_size_limits
+        self._page_prefetch_workers = page_prefetch_workers
+        self._object_index = object_index
+        self._upsert_strategy = upsert_strategy
+        self._upsert_statistics = upsert_statistics if upsert_statistics is not None else UpsertStatistics()
 
     def execute_operation(self, op_name, params):
         """
@@ -222,8 +328,13 @@ class BaseConfigurationResource(object):
         :return: Result of the operation being executed
         :rtype: dict
         """
+        is_bulk_operation = isinstance(params.get(ParamName.DATA), list)
         if self._operation_checker.is_upsert_operation(op_name):
+            if is_bulk_operation:
+                return self.upsert_objects(op_name, params)
             return self.upsert_object(op_name, params)
+        elif is_bulk_operation:
+            raise FtdConfigurationError('A list of objects in data is supported only for upsert operations')
         else:
             return self.crud_operation(op_name, params)
 
@@ -286,21 +397,40 @@ class BaseConfigurationResource(object):
             get_list_params[ParamName.QUERY_PARAMS][QueryParams.FILTER] = transform_filters_to_query_param(filters)
 
         item_generator = iterate_over_pageable_resource(
-            partial(self.send_general_request, operation_name=operation_name), get_list_params
+            partial(self.send_general_request, operation_name=operation_name), get_list_params,
+            page_size_limits=self._page_size_limits, operation_name=operation_name,
+            max_workers=self._page_prefetch_workers
         )
         return (i for i in item_generator if match_filters(filters, i))
 
     def add_object(self, operation_name, params):
+        return self._add_object(operation_name, params)[0]
+
+    def _add_object(self, operation_name, params):
+        """
+        Adds the object the same way as `add_object` does, and tells whether the object has been created.
+
+        :return: the added object or the equal existing object found by the duplicate check, and True if the object
+            has been created
+        :rtype: tuple
+        """
         def is_duplicate_name_error(err):
             return err.code == UNPROCESSABLE_ENTITY_STATUS and DUPLICATE_NAME_ERROR_MESSAGE in str(err)
 
+        def record_add_attempt(existed):
+            model_name = self.get_operation_spec(operation_name)[OperationField.MODEL_NAME]
+            self._upsert_statistics.record(model_name, existed)
+
         try:
-            return self.send_general_request(operation_name, params)
+            response = self.send_general_request(operation_name, params)
         except FtdServerError as e:
             if is_duplicate_name_error(e):
-                return self._check_if_the_same_object(operation_name, params, e)
+                record_add_attempt(existed=True)
+                return self._check_if_the_same_object(operation_name, params, e), False
             else:
                 raise e
+        record_add_attempt(existed=False)
+        return response, True
 
     def _check_if_the_same_object(self, operation_name, params, e):
         """
@@ -318,8 +448,14 @@ class BaseConfigurationResource(object):
             if not params.get(ParamName.FILTERS):
                 params[ParamName.FILTERS] = {'name': data['name']}
 
+            if self._object_index is not None and 'name' in params[ParamName.FILTERS]:
+                # the device has an object with the name, which the index may have missed, e.g. when the object
+                # has been created by another writer after the index cached that the name was not found
+                self._object_index.forget_name(model_name, params.get(ParamName.PATH_PARAMS),
+                                               params[ParamName.FILTERS]['name'])
+
             existing_obj = None
-            existing_objs = self.get_objects_by_filter(get_list_operation, params)
+            existing_objs = self._find_existing_objects(get_list_operation, params)
 
             for i, obj in enumerate(existing_objs):
                 if i > 0:
@@ -327,7 +463,7 @@ class BaseConfigurationResource(object):
                 existing_obj = obj
 
             if existing_obj is not None:
-                if equal_objects(existing_obj, data):
+                if equal_objects(existing_obj, data, self._get_unordered_fields(model_name, params)):
                     return existing_obj
                 else:
                     raise FtdConfigurationError(
@@ -337,6 +473,49 @@ class BaseConfigurationResource(object):
 
         raise e
 
+    def _get_unordered_fields(self, model_name, params):
+        """
+        Returns names of the model properties holding lists of references, which are compared regardless of
+        the order of references when the user has requested it. The device does not keep the order of references
+        in such lists, so objects returned by the device often list them in a different order than requested.
+
+        :return: list of property names or None if the order of references matters
+        :rtype: list
+        """
+        if not params.get(ParamName.IGNORE_REFERENCE_ORDER):
+            return None
+        model_spec = self._conn.get_model_spec(model_name) or {}
+        return [prop_name for prop_name, prop_spec in iteritems(model_spec.get(PropName.PROPERTIES) or {})
+                if _is_reference_list_spec(prop_spec)]
+
+    def _find_existing_objects(self, get_list_operation, params):
+        """
+        Finds objects for idempotency checks the same way as `get_objects_by_filter` does. Lookups of all objects
+        and lookups by name are served from the object index when it knows the result, otherwise, objects are
+        fetched from the device and put into the index.
+
+        :return: found objects
+        :rtype: list
+        """
+        _, query_params, path_params = _get_user_params(params)
+        filters = params.get(ParamName.FILTERS) or {}
+        if self._object_index is None or query_params or set(filters) - set(['name']):
+            return list(self.get_objects_by_filter(get_list_operation, params))
+
+        model_name = self.get_operation_spec(get_list_operation)[OperationField.MODEL_NAME]
+        if 'name' in filters:
+            existing_objs = self._object_index.find_by_name(model_name, path_params, filters['name'])
+        else:
+            existing_objs = self._object_index.get_all(model_name, path_params)
+
+        if existing_objs is None:
+            existing_objs = list(self.get_objects_by_filter(get_list_operation, params))
+            if 'name' in filters:
+                self._object_index.put_by_name(model_name, path_params, filters['name'], existing_objs)
+            else:
+                self._object_index.put_all(model_name, path_params, existing_objs)
+        return existing_objs
+
     def _find_get_list_operation(self, model_name):
         operations = self.get_operation_specs_by_model_name(model_name) or {}
         return next((
@@ -361,18 +540,38 @@ class BaseConfigurationResource(object):
             else:
                 raise e
 
-    def edit_object(self, operation_name, params):
+    def edit_object(self, operation_name, params, existing_object=None):
+        """
+        Edits the object unless it already equals the requested one. The current object is fetched with the get
+        operation of the model, unless it has been fetched already and passed as `existing_object`. In that case,
+        the object is edited with the version it was fetched with, so the device rejects the edit if the object
+        has been changed since then.
+
+        :param operation_name: name of the edit operation
+        :type operation_name: str
+        :param params: params that edit operation should be executed with
+        :type params: dict
+        :param existing_object: current state of the edited object if it is already known
+        :type existing_object: dict
+        :return: edited object or the existing one if it is the same as requested
+        :rtype: dict
+        """
         data, _, path_params = _get_user_params(params)
 
         model_name = self.get_operation_spec(operation_name)[OperationField.MODEL_NAME]
-        get_operation = self._find_get_operation(model_name)
 
-        if get_operation:
-            existing_object = self.send_general_request(get_operation, {ParamName.PATH_PARAMS: path_params})
-            if not existing_object:
-                raise FtdConfigurationError('Referenced object does not exist')
-            elif equal_objects(existing_object, data):
-                return existing_object
+        if existing_object is None:
+            get_operation = self._find_get_operation(model_name)
+            if get_operation:
+                existing_object = self.send_general_request(get_operation, {ParamName.PATH_PARAMS: path_params})
+                if not existing_object:
+                    raise FtdConfigurationError('Referenced object does not exist')
+        elif VERSION_PROPERTY in existing_object:
+            data[VERSION_PROPERTY] = existing_object[VERSION_PROPERTY]
+
+        if existing_object is not None and \
+                equal_objects(existing_object, data, self._get_unordered_fields(model_name, params)):
+            return existing_object
 
         return self.send_general_request(operation_name, params)
 
@@ -388,7 +587,34 @@ class BaseConfigurationResource(object):
         op_spec = self.get_operation_spec(operation_name)
         url, method = op_spec[OperationField.URL], op_spec[OperationField.METHOD]
 
-        return self._send_request(url, method, data, path_params, query_params)
+        if self._object_index is None or method == HTTPMethod.GET:
+            return self._send_request(url, method, data, path_params, query_params)
+
+        try:
+            response = self._send_request(url, method, data, path_params, query_params)
+        except Exception as e:
+            # client errors mean that the request has been rejected, while the result of any other failed request,
+            # e.g. a server error or a lost connection, is unknown
+            is_rejected = isinstance(e, FtdServerError) and \
+                BAD_REQUEST_STATUS <= e.code < INTERNAL_SERVER_ERROR_STATUS
+            if not is_rejected:
+                self._object_index.invalidate()
+            raise
+        self._update_object_index(operation_name, op_spec, path_params, response)
+        return response
+
+    def _update_object_index(self, operation_name, op_spec, path_params, response):
+        model_name = op_spec[OperationField.MODEL_NAME]
+        is_object_response = isinstance(response, dict) and 'id' in response
+
+        if self._operation_checker.is_add_operation(operation_name, op_spec) and is_object_response:
+            self._object_index.add(model_name, path_params, response)
+        elif self._operation_checker.is_edit_operation(operation_name, op_spec) and is_object_response:
+            self._object_index.update(model_name, path_params, response)
+        elif self._operation_checker.is_delete_operation(operation_name, op_spec) and 'objId' in path_params:
+            self._object_index.remove(model_name, path_params, path_params['objId'])
+        else:
+            self._object_index.invalidate()
 
     def _send_request(self, url_path, http_method, body_params=None, path_params=None, query_params=None):
         def raise_for_failure(resp):
@@ -456,7 +682,8 @@ class BaseConfigurationResource(object):
 
         params['path_params']['objId'] = existing_object['id']
         copy_identity_properties(existing_object, params['data'])
-        return self.edit_object(edit_op_name, params)
+        # the existing object has been just found by the duplicate check, so there is no need to fetch it again
+        return self.edit_object(edit_op_name, params, existing_object)
 
     def upsert_object(self, op_name, params):
         """
@@ -477,6 +704,11 @@ class BaseConfigurationResource(object):
         model_name = _extract_model_from_upsert_operation(op_name)
         model_operations = self.get_operation_specs_by_model_name(model_name)
 
+        if self._should_look_up_first(model_name, params):
+            existing_object = self._find_upserted_object(model_name, model_operations, params)
+            if existing_object is not None:
+                return self._edit_upserted_object(model_operations, existing_object, params)
+
         try:
             return self._add_upserted_object(model_operations, params)
         except FtdConfigurationError as e:
@@ -484,6 +716,189 @@ class BaseConfigurationResource(object):
                 return self._edit_upserted_object(model_operations, e.obj, params)
             raise e
 
+    def _should_look_up_first(self, model_name, params):
+        data = params.get(ParamName.DATA) or {}
+        if not params.get(ParamName.FILTERS) and not data.get('name'):
+            return False
+        if self._upsert_strategy == UpsertStrategy.AUTO:
+            return self._upsert_statistics.mostly_existing(model_name)
+        return self._upsert_strategy == UpsertStrategy.LOOKUP_FIRST
+
+    def _find_upserted_object(self, model_name, model_operations, params):
+        """
+        Looks up the object to upsert by the filters or, if they are not specified, by the name the same way
+        as the duplicate check of add operation does. The found object is compared with the requested one to decide
+        whether it has to be edited, so it is always fetched from the device rather than from the object index,
+        which might be stale. Lookups by name refresh the index.
+
+        :return: the existing object or None if it does not exist
+        :rtype: dict
+        """
+        get_list_op_name = self._get_operation_name(self._operation_checker.is_get_list_operation, model_operations)
+        filters = params.get(ParamName.FILTERS) or {'name': params[ParamName.DATA]['name']}
+        lookup_params = dict(params, **{ParamName.FILTERS: filters})
+        existing_objs = list(self.get_objects_by_filter(get_list_op_name, lookup_params))
+
+        _, query_params, path_params = _get_user_params(lookup_params)
+        if self._object_index is not None and not query_params and set(filters) == set(['name']):
+            self._object_index.put_by_name(model_name, path_params, filters['name'], existing_objs)
+        if len(existing_objs) > 1:
+            raise FtdConfigurationError(MULTIPLE_DUPLICATES_FOUND_ERROR)
+
+        if existing_objs:
+            self._upsert_statistics.record(model_name, existed=True)
+            return existing_objs[0]
+        # the miss is recorded by add operation that follows
+        return None
+
+    def upsert_objects(self, op_name, params):
+        """
+        Bulk version of upsert object operation that upserts every object from the list in 'data'. Existing objects
+        are fetched with a single get list operation and matched with the requested ones by name, so only
+        the objects that are missing or differ from the requested ones are added or edited.
+
+        :param op_name: upsert operation name
+        :type op_name: str
+        :param params: params that upsert operation should be executed with, 'data' contains a list of objects
+        :type params: dict
+        :return: list with the name, the upsert status and the resulting object for every requested object
+        :rtype: list
+        """
+        if not self.is_upsert_operation_supported(op_name):
+            raise FtdInvalidOperationNameError(op_name)
+
+        objects, query_params, path_params = _get_user_params(params)
+        _check_objects_for_bulk_upsert(objects)
+
+        model_name = _extract_model_from_upsert_operation(op_name)
+        model_operations = self.get_operation_specs_by_model_name(model_name)
+        get_list_op_name = self._get_operation_name(self._operation_checker.is_get_list_operation, model_operations)
+        add_op_name = self._get_operation_name(self._operation_checker.is_add_operation, model_operations)
+        edit_op_name = self._get_operation_name(self._operation_checker.is_edit_operation, model_operations)
+
+        existing_objects_by_name = {}
+        get_list_params = {ParamName.QUERY_PARAMS: dict(query_params), ParamName.PATH_PARAMS: dict(path_params)}
+        for existing_obj in self._find_existing_objects(get_list_op_name, get_list_params):
+            existing_objects_by_name.setdefault(existing_obj.get('name'), []).append(existing_obj)
+
+        def edit_existing_object(existing_obj, obj):
+            edit_params = {
+                ParamName.DATA: copy_identity_properties(existing_obj, dict(obj)),
+                ParamName.QUERY_PARAMS: dict(query_params),
+                ParamName.PATH_PARAMS: dict(path_params, objId=existing_obj['id'])
+            }
+            return self.send_general_request(edit_op_name, edit_params)
+
+        fingerprints = ObjectFingerprints(self._get_unordered_fields(model_name, params))
+        results = []
+        for obj in objects:
+            existing_objs = existing_objects_by_name.get(obj['name'], [])
+            if len(existing_objs) > 1:
+                raise FtdConfigurationError('Cannot upsert object "%s". Multiple objects with the same name exist.'
+                                            % obj['name'])
+
+            if not existing_objs:
+                add_params = {ParamName.DATA: obj, ParamName.QUERY_PARAMS: dict(query_params),
+                              ParamName.PATH_PARAMS: dict(path_params)}
+                # the object can be added by someone else after the list of existing objects has been fetched,
+                # in this case the duplicate check returns the existing object or raises an error with it
+                try:
+                    response, is_added = self._add_object(add_op_name, add_params)
+                    status = UpsertStatus.ADDED if is_added else UpsertStatus.UNCHANGED
+                except FtdConfigurationError as e:
+                    if not e.obj:
+                        raise e
+                    status, response = UpsertStatus.UPDATED, edit_existing_object(e.obj, obj)
+            elif fingerprints.equal(existing_objs[0], obj):
+                status, response = UpsertStatus.UNCHANGED, existing_objs[0]
+            else:
+                status, response = UpsertStatus.UPDATED, edit_existing_object(existing_objs[0], obj)
+
+            results.append({'name': obj['name'], 'status': status, 'object': response})
+        return results
+
+
+def execute_operation_in_connection(conn, op_name, params, check_mode=False, page_size_limits=None,
+                                    page_prefetch_workers=1, object_index=None,
+                                    upsert_strategy=UpsertStrategy.ADD_FIRST, upsert_statistics=None):
+    """
+    Executes the operation with BaseConfigurationResource and packs the result, so it can be sent back to
+    the module over the persistent connection. Expected exceptions are serialized into the result instead of
+    being raised, as JSON-RPC passes only the message of raised exceptions.
+
+    :param conn: connection-side object providing the API used by BaseConfigurationResource (the HttpApi plugin)
+    :param op_name: name of the operation being called by the user
+    :type op_name: str
+    :param params: definition of the params that operation should be executed with
+    :type params: dict
+    :param check_mode: whether the module runs in the check mode
+    :type check_mode: bool
+    :param page_size_limits: page sizes learned during the previous operations in this connection
+    :type page_size_limits: PageSizeLimits
+    :param page_prefetch_workers: maximum number of pages of a list fetched concurrently
+    :type page_prefetch_workers: int
+    :param object_index: index of objects found and changed during the previous operations in this connection
+    :type object_index: ObjectIndex
+    :param upsert_strategy: whether upsert operations try to add the object or look it up first
+    :type upsert_strategy: str
+    :param upsert_statistics: statistics of existing objects collected during the previous upserts in this connection
+    :type upsert_statistics: UpsertStatistics
+    :return: dict with 'success', 'response' or 'error', and 'config_changed' keys
+    :rtype: dict
+    """
+    resource = BaseConfigurationResource(conn, check_mode, page_size_limits, page_prefetch_workers, object_index,
+                                         upsert_strategy, upsert_statistics)
+    try:
+        response = resource.execute_operation(op_name, params)
+        return {
+            ExecutionResult.SUCCESS: True,
+            ExecutionResult.RESPONSE: response,
+            ExecutionResult.CONFIG_CHANGED: resource.config_changed
+        }
+    except tuple(error_class for error_class, dummy in SERIALIZABLE_ERRORS.values()) as e:
+        return {
+            ExecutionResult.SUCCESS: False,
+            ExecutionResult.ERROR: serialize_error(e),
+            ExecutionResult.CONFIG_CHANGED: resource.config_changed
+        }
+
+
+class RemoteConfigurationResource(object):
+    """
+    Module-side counterpart of BaseConfigurationResource that executes the whole operation inside the connection
+    process with a single request, instead of sending separate requests for operation specs, validation and
+    every HTTP call.
+    """
+
+    def __init__(self, conn, check_mode=False):
+        self._conn = conn
+        self._check_mode = check_mode
+        self.config_changed = False
+
+    def execute_operation(self, op_name, params):
+        """
+        Executes the operation the same way as BaseConfigurationResource.execute_operation does and raises
+        the same exceptions.
+
+        :param op_name: name of the operation being called by the user
+        :type op_name: str
+        :param params: definition of the params that operation should be executed with
+        :type params: dict
+        :return: Result of the operation being executed
+        :rtype: dict
+        """
+        result = self._conn.execute_operation(op_name, params, self._check_mode)
+        self.config_changed = result[ExecutionResult.CONFIG_CHANGED]
+        if not result[ExecutionResult.SUCCESS]:
+            raise deserialize_error(result[ExecutionResult.ERROR])
+        return result[ExecutionResult.RESPONSE]
+
+
+def _is_reference_list_spec(prop_spec):
+    items_spec = prop_spec.get(PropName.ITEMS) or {}
+    return prop_spec.get(PropName.TYPE) == PropType.ARRAY and \
+        items_spec.get(PropName.REF, '').endswith('/' + REFERENCE_MODEL_NAME)
+
 
 def _set_default(params, field_name, value):
     if field_name not in params or params[field_name] is None:
@@ -502,52 +917,217 @@ def _extract_model_from_upsert_operation(op_name):
     return op_name[len(OperationNamePrefix.UPSERT):]
 
 
+def _check_objects_for_bulk_upsert(objects):
+    names = set()
+    for obj in objects:
+        if not isinstance(obj, dict) or not obj.get('name'):
+            raise FtdConfigurationError('Every object in the list for upsert operation must have a name')
+        if obj['name'] in names:
+            raise FtdConfigurationError('Object "%s" is specified more than once in the list for upsert operation'
+                                        % obj['name'])
+        names.add(obj['name'])
+
+
 def _get_user_params(params):
     return params.get(ParamName.DATA) or {}, params.get(ParamName.QUERY_PARAMS) or {}, params.get(
         ParamName.PATH_PARAMS) or {}
 
 
-def iterate_over_pageable_resource(resource_func, params):
+def iterate_over_pageable_resource(resource_func, params, page_size_limits=None, operation_name=None,
+                                   max_workers=1):
     """
     A generator function that iterates over a resource that supports pagination and lazily returns present items
     one by one.
 
+    When `page_size_limits` is given and no limit is set in `params`, the page size is adapted to the server:
+    pages are requested with the largest limit known for the operation, and the limit is reduced when the server
+    rejects it or returns fewer items than requested while more items remain according to the `paging` info.
+    A rejected page is requested again with the default page size, and the following pages are requested with
+    halved page sizes, which are learned once the server accepts them. When the default page size is rejected
+    as well, the original error is raised.
+    With `max_workers` greater than one, the pages following the first one are fetched concurrently, as their
+    number is known from `paging.count` of the first page. Items are still returned in the offset order.
+
     :param resource_func: function that receives `params` argument and returns a page of objects
     :type resource_func: callable
     :param params: initial dictionary of parameters that will be passed to the resource_func.
                    Should contain `query_params` inside.
     :type params: dict
+    :param page_size_limits: page sizes learned for get list operations, enables adaptive page size
+    :type page_size_limits: PageSizeLimits
+    :param operation_name: name of the get list operation, required for adaptive page size
+    :type operation_name: str
+    :param max_workers: maximum number of pages fetched concurrently in the adaptive mode
+    :type max_workers: int
     :return: an iterator containing returned items
     :rtype: iterator of dict
     """
-    # creating a copy not to mutate passed dict
-    params = copy.deepcopy(params)
-    params[ParamName.QUERY_PARAMS].setdefault('limit', DEFAULT_PAGE_SIZE)
-    params[ParamName.QUERY_PARAMS].setdefault('offset', DEFAULT_OFFSET)
-    limit = int(params[ParamName.QUERY_PARAMS]['limit'])
+    if page_size_limits is not None and 'limit' not in params[ParamName.QUERY_PARAMS]:
+        return _iterate_with_adaptive_page_size(resource_func, params, page_size_limits, operation_name,
+                                                max_workers)
+    return _iterate_with_fixed_page_size(resource_func, params)
 
-    def received_less_items_than_requested(items_in_response, items_expected):
-        if items_in_response == items_expected:
-            return False
-        elif items_in_response < items_expected:
-            return True
 
+def _check_page_size(items_in_response, items_expected):
+    if items_in_response > items_expected:
         raise FtdUnexpectedResponse(
             "Get List of Objects Response from the server contains more objects than requested. "
             "There are {0} item(s) in the response while {1} was(ere) requested".format(
                 items_in_response, items_expected)
         )
 
+
+def _iterate_with_fixed_page_size(resource_func, params):
+    # creating a copy not to mutate passed dict
+    params = copy.deepcopy(params)
+    params[ParamName.QUERY_PARAMS].setdefault('limit', DEFAULT_PAGE_SIZE)
+    params[ParamName.QUERY_PARAMS].setdefault('offset', DEFAULT_OFFSET)
+    limit = int(params[ParamName.QUERY_PARAMS]['limit'])
+
     while True:
         result = resource_func(params=params)
 
         for item in result['items']:
             yield item
 
-        if received_less_items_than_requested(len(result['items']), limit):
+        _check_page_size(len(result['items']), limit)
+        if len(result['items']) < limit:
             break
 
         # creating a copy not to mutate existing dict
         params = copy.deepcopy(params)
         query_params = params[ParamName.QUERY_PARAMS]
         query_params['offset'] = int(query_params['offset']) + limit
+
+
+def _iterate_with_adaptive_page_size(resource_func, params, page_size_limits, operation_name, max_workers=1):
+    def is_page_size_rejected(err, page_size):
+        return err.code in (BAD_REQUEST_STATUS, UNPROCESSABLE_ENTITY_STATUS) and page_size > DEFAULT_PAGE_SIZE
+
+    # creating a copy not to mutate passed dict
+    params = copy.deepcopy(params)
+    params[ParamName.QUERY_PARAMS].setdefault('offset', DEFAULT_OFFSET)
+    start_offset = params[ParamName.QUERY_PARAMS]['offset']
+    limit = page_size_limits.get(operation_name)
+    prefetch_pages = max_workers > 1
+    yielded_ids = set()
+    # the error of the rejected page size while it is being checked whether the page size is the cause
+    rejection = None
+    is_page_size_too_large = False
+    next_limit = None
+
+    def not_yielded_yet(page_items):
+        # objects added or deleted during the iteration shift the following objects between pages, so the same
+        # object can be returned twice
+        for item in page_items:
+            item_id = item.get('id') if isinstance(item, dict) else None
+            if item_id is None or item_id not in yielded_ids:
+                yielded_ids.add(item_id)
+                yield item
+
+    while True:
+        params[ParamName.QUERY_PARAMS]['limit'] = limit
+        try:
+            result = resource_func(params=params)
+        except FtdServerError as e:
+            if rejection is not None:
+                # the default page size is rejected too, so the request is rejected for another reason
+                raise rejection
+            if not is_page_size_rejected(e, limit):
+                raise
+            if is_page_size_too_large:
+                limit = max(limit // 2, DEFAULT_PAGE_SIZE)
+            else:
+                # the request can be rejected for another reason, e.g. an invalid filter, so the page is requested
+                # with the default page size first to find out whether the page size is the cause
+                rejection = e
+                next_limit = max(limit // 2, DEFAULT_PAGE_SIZE)
+                limit = DEFAULT_PAGE_SIZE
+            params = copy.deepcopy(params)
+            continue
+
+        # smaller page sizes are learned only once the server accepts them
+        is_default_page_size_check = rejection is not None
+        if is_default_page_size_check:
+            rejection = None
+            is_page_size_too_large = True
+        elif limit < page_size_limits.get(operation_name):
+            page_size_limits.reduce(operation_name, limit)
+
+        items = result['items']
+        paging = result.get('paging') or {}
+        _check_page_size(len(items), limit)
+        offset = int(params[ParamName.QUERY_PARAMS]['offset']) + len(items)
+
+        if prefetch_pages and not is_default_page_size_check and 'count' in paging and len(items) == limit and \
+                offset < int(paging['count']):
+            next_pages = _fetch_pages_concurrently(resource_func, params, offset, limit, int(paging['count']),
+                                                   max_workers)
+            if next_pages is not None:
+                for page_items in [items] + next_pages:
+                    for item in not_yielded_yet(page_items):
+                        yield item
+                break
+
+            # the number of objects changed while the pages were fetched, so the pages may be inconsistent with each
+            # other; they are discarded and the objects are fetched again page by page
+            prefetch_pages = False
+            params = copy.deepcopy(params)
+            params[ParamName.QUERY_PARAMS]['offset'] = start_offset
+            continue
+
+        for item in not_yielded_yet(items):
+            yield item
+
+        if 'count' in paging:
+            if not items or offset >= int(paging['count']):
+                break
+        elif len(items) < limit:
+            break
+
+        # the server can silently cap the page size, in this case it returns fewer items than requested
+        # while there are more items to fetch
+        accepted_limit = min(int(paging.get('limit', limit)), len(items) if len(items) < limit else limit)
+        if is_default_page_size_check:
+            # the following pages are requested with a smaller page size than the rejected one
+            limit = next_limit
+        elif accepted_limit < limit:
+            limit = accepted_limit
+            page_size_limits.reduce(operation_name, limit)
+
+        # creating a copy not to mutate existing dict
+        params = copy.deepcopy(params)
+        params[ParamName.QUERY_PARAMS]['offset'] = offset
+
+
+def _fetch_pages_concurrently(resource_func, params, offset, limit, count, max_workers):
+    """
+    Fetches all pages from `offset` to `count` with at most `max_workers` concurrent requests.
+
+    :return: lists of items of the fetched pages in offset order, or None when the number of objects
+             reported by the server has changed while the pages were being fetched
+    :rtype: list of list
+    """
+    def fetch_page(page_offset):
+        page_params = copy.deepcopy(params)
+        page_params[ParamName.QUERY_PARAMS]['offset'] = page_offset
+        page_params[ParamName.QUERY_PARAMS]['limit'] = limit
+        return resource_func(params=page_params)
+
+    offsets = list(range(offset, count, limit))
+    pool = ThreadPool(min(max_workers, len(offsets)))
+    try:
+        results = pool.map(fetch_page, offsets)
+    finally:
+        pool.close()
+
+    pages = []
+    for page_offset, result in zip(offsets, results):
+        page_items = result['items']
+        _check_page_size(len(page_items), limit)
+        page_count = (result.get('paging') or {}).get('count')
+        expected_items = min(limit, count - page_offset)
+        if page_count is None or int(page_count) != count or len(page_items) != expected_items:
+            return None
+        pages.append(page_items)
+    return pages
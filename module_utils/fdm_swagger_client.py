@@ -16,6 +16,7 @@
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+from ansible.module_utils.common._collections_compat import Mapping
 from ansible.module_utils.network.ftd.common import HTTPMethod
 from ansible.module_utils.six import integer_types, string_types, iteritems
 
@@ -83,6 +84,65 @@ def _get_model_name_from_url(schema_ref):
     return path[len(path) - 1]
 
 
+def build_model_operations(operations):
+    """
+    Groups operations by the name of the model they work with.
+
+    :param operations: operations in the format returned by FdmSwaggerParser().parse_spec()
+    :type operations: dict
+    :return: a dict where keys are model names and values are dicts of operations available for the model
+    :rtype: dict
+    """
+    model_operations = {}
+    for operations_name, params in iteritems(operations):
+        model_name = params[OperationField.MODEL_NAME]
+        model_operations.setdefault(model_name, {})[operations_name] = params
+    return model_operations
+
+
+class LazySpecMapping(Mapping):
+    """
+    A read-only mapping for specification sections (models, operations, etc.) whose entries are built by
+    the `loader` function the first time they are accessed. Built entries are kept, so every entry is loaded
+    at most once.
+    """
+
+    def __init__(self, keys, loader):
+        """
+        :param keys: all keys available in the mapping or a function returning them, when the keys are expensive
+            to compute too. The function is called once, the first time the keys are needed.
+        :type keys: iterable or callable
+        :param loader: function that receives a key and returns the entry for it
+        :type loader: callable
+        """
+        self._keys = None if callable(keys) else frozenset(keys)
+        self._keys_loader = keys
+        self._loader = loader
+        self._entries = {}
+
+    @property
+    def _key_set(self):
+        if self._keys is None:
+            self._keys = frozenset(self._keys_loader())
+        return self._keys
+
+    def __getitem__(self, key):
+        if key not in self._entries:
+            if key not in self._key_set:
+                raise KeyError(key)
+            self._entries[key] = self._loader(key)
+        return self._entries[key]
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    def __iter__(self):
+        return iter(self._key_set)
+
+    def __len__(self):
+        return len(self._key_set)
+
+
 class IllegalArgumentException(ValueError):
     """
     Exception raised when the function parameters:
@@ -97,20 +157,62 @@ class ValidationError(ValueError):
     pass
 
 
+def _is_numeric_string(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+
+def _is_integer(value):
+    is_integer = isinstance(value, integer_types) and not isinstance(value, bool)
+    is_digit_string = isinstance(value, string_types) and value.isdigit()
+    return is_integer or is_digit_string
+
+
+def _is_number(value):
+    is_number = isinstance(value, (integer_types, float)) and not isinstance(value, bool)
+    is_numeric_string = isinstance(value, string_types) and _is_numeric_string(value)
+    return is_number or is_numeric_string
+
+
+_SIMPLE_TYPE_CHECKS = {
+    PropType.STRING: lambda value: isinstance(value, string_types),
+    PropType.BOOLEAN: lambda value: isinstance(value, bool),
+    PropType.INTEGER: _is_integer,
+    PropType.NUMBER: _is_number
+}
+
+
+def _raise_missing_key(key):
+    def raise_key_error(*args):
+        raise KeyError(key)
+
+    return raise_key_error
+
+
 class FdmSwaggerParser:
     _definitions = None
     _base_path = None
 
-    def parse_spec(self, spec, docs=None):
+    def parse_spec(self, spec, docs=None, lazy=False):
         """
         This method simplifies a swagger format, resolves a model name for each operation, and adds documentation for
         each operation and model if it is provided.
 
+        In the lazy mode, only an index of operation IDs is built up front. An operation is simplified the first
+        time it is accessed, while model names of all operations are resolved the first time model operations
+        are accessed. The result has the same content as in the eager mode, but 'operations' and 'model_operations'
+        are read-only mappings instead of dicts.
+
         :param spec: An API specification in the swagger format, see
             <https://github.com/OAI/OpenAPI-Specification/blob/master/versions/2.0.md>
         :type spec: dict
         :param spec: A documentation map containing descriptions for models, operations and operation parameters.
         :type docs: dict
+        :param lazy: if True, operations are parsed on demand
+        :type lazy: bool
         :rtype: dict
         :return:
         Ex.
@@ -161,6 +263,9 @@ class FdmSwaggerParser:
         """
         self._definitions = spec[SpecProp.DEFINITIONS]
         self._base_path = spec[PropName.BASE_PATH]
+        if lazy:
+            return self._parse_spec_lazily(spec, docs)
+
         operations = self._get_operations(spec)
 
         if docs:
@@ -170,35 +275,78 @@ class FdmSwaggerParser:
         return {
             SpecProp.MODELS: self._definitions,
             SpecProp.OPERATIONS: operations,
-            SpecProp.MODEL_OPERATIONS: self._get_model_operations(operations)
+            SpecProp.MODEL_OPERATIONS: build_model_operations(operations)
+        }
+
+    def _parse_spec_lazily(self, spec, docs):
+        operation_index = self._get_operation_index(spec)
+        model_names = {}
+
+        def get_model_name(operation_id):
+            if operation_id not in model_names:
+                url, method, params = operation_index[operation_id]
+                model_names[operation_id] = self._get_model_name(method, params)
+            return model_names[operation_id]
+
+        def load_operation(operation_id):
+            url, method, params = operation_index[operation_id]
+            operation = self._get_operation(url, method, params, get_model_name(operation_id))
+            if docs:
+                self._enrich_operations_with_docs({operation_id: operation}, docs)
+            return operation
+
+        operations = LazySpecMapping(operation_index, load_operation)
+        operation_ids_by_model = {}
+
+        def get_operation_ids_by_model():
+            if not operation_ids_by_model:
+                for operation_id in operation_index:
+                    operation_ids_by_model.setdefault(get_model_name(operation_id), []).append(operation_id)
+            return operation_ids_by_model
+
+        def load_model_operations(model_name):
+            return dict((op_id, operations[op_id]) for op_id in get_operation_ids_by_model()[model_name])
+
+        if docs:
+            self._definitions = self._enrich_definitions_with_docs(self._definitions, docs)
+
+        return {
+            SpecProp.MODELS: self._definitions,
+            SpecProp.OPERATIONS: operations,
+            SpecProp.MODEL_OPERATIONS: LazySpecMapping(lambda: get_operation_ids_by_model().keys(),
+                                                       load_model_operations)
         }
 
-    def _get_model_operations(self, operations):
-        model_operations = {}
-        for operations_name, params in iteritems(operations):
-            model_name = params[OperationField.MODEL_NAME]
-            model_operations.setdefault(model_name, {})[operations_name] = params
-        return model_operations
+    @staticmethod
+    def _get_operation_index(spec):
+        return dict(
+            (params[PropName.OPERATION_ID], (url, method, params))
+            for url, operation_params in iteritems(spec[PropName.PATHS])
+            for method, params in iteritems(operation_params)
+        )
 
     def _get_operations(self, spec):
         paths_dict = spec[PropName.PATHS]
         operations_dict = {}
         for url, operation_params in iteritems(paths_dict):
             for method, params in iteritems(operation_params):
-                operation = {
-                    OperationField.METHOD: method,
-                    OperationField.URL: self._base_path + url,
-                    OperationField.MODEL_NAME: self._get_model_name(method, params),
-                    OperationField.RETURN_MULTIPLE_ITEMS: self._return_multiple_items(params),
-                    OperationField.TAGS: params.get(OperationField.TAGS, [])
-                }
-                if OperationField.PARAMETERS in params:
-                    operation[OperationField.PARAMETERS] = self._get_rest_params(params[OperationField.PARAMETERS])
-
                 operation_id = params[PropName.OPERATION_ID]
-                operations_dict[operation_id] = operation
+                operations_dict[operation_id] = self._get_operation(url, method, params,
+                                                                    self._get_model_name(method, params))
         return operations_dict
 
+    def _get_operation(self, url, method, params, model_name):
+        operation = {
+            OperationField.METHOD: method,
+            OperationField.URL: self._base_path + url,
+            OperationField.MODEL_NAME: model_name,
+            OperationField.RETURN_MULTIPLE_ITEMS: self._return_multiple_items(params),
+            OperationField.TAGS: params.get(OperationField.TAGS, [])
+        }
+        if OperationField.PARAMETERS in params:
+            operation[OperationField.PARAMETERS] = self._get_rest_params(params[OperationField.PARAMETERS])
+        return operation
+
     def _enrich_operations_with_docs(self, operations, docs):
         def get_operation_docs(op):
             op_url = op[OperationField.URL][len(self._base_path):]
@@ -331,6 +479,7 @@ class FdmSwaggerValidator:
         """
         self._operations = spec[SpecProp.OPERATIONS]
         self._models = spec[SpecProp.MODELS]
+        self._compiled_models = {}
 
     def validate_data(self, operation_name, data=None):
         """
@@ -370,10 +519,10 @@ class FdmSwaggerValidator:
         self._check_validate_data_params(data, operation_name)
 
         operation = self._operations[operation_name]
-        model = self._models[operation[OperationField.MODEL_NAME]]
+        validate_model = self._get_compiled_model(operation[OperationField.MODEL_NAME])
         status = self._init_report()
 
-        self._validate_object(status, model, data, '')
+        validate_model(status, data, None)
 
         if len(status[PropName.REQUIRED]) > 0 or len(status[PropName.INVALID_TYPE]) > 0:
             return False, self._delete_empty_field_from_report(status)
@@ -502,19 +651,125 @@ class FdmSwaggerValidator:
                 if prop_name in params and not self._is_correct_simple_types(expected_type, value):
                     self._add_invalid_type_report(status, '', prop_name, expected_type, value)
 
-    def _validate_object(self, status, model, data, path):
+    def _get_compiled_model(self, model_name):
+        compiled_model = self._compiled_models.get(model_name)
+        if compiled_model is None:
+            compiled_model = self._compile_model(self._models[model_name])
+            self._compiled_models[model_name] = compiled_model
+        return compiled_model
+
+    def _compile_model(self, model):
+        """
+        Compiles the model specification into a function that validates data against the model and adds found
+        errors to the report. The function receives the report, the data and the path to the data, the path is
+        converted into a string only when an error is reported (see `_path_to_str`).
+
+        Only enums and objects are validated, other models (including the ones defined with 'allOf') accept
+        any data.
+        """
         if self._is_enum(model):
-            self._check_enum(status, model, data, path)
+            return self._compile_enum(model)
         elif self._is_object(model):
-            self._check_object(status, model, data, path)
+            return self._compile_object(model)
+        else:
+            return lambda status, data, path: None
+
+    def _compile_enum(self, model):
+        enum = model[PropName.ENUM]
+        try:
+            enum_values = frozenset(enum)
+        except TypeError:
+            enum_values = enum
+
+        def is_enum_value(value):
+            try:
+                return value in enum_values
+            except TypeError:
+                # unhashable values are compared one by one
+                return value in enum
+
+        def validate_enum(status, value, path):
+            if not is_enum_value(value):
+                self._add_invalid_type_report(status, self._path_to_str(path), '', PropName.ENUM, value)
+
+        return validate_enum
+
+    def _compile_object(self, model):
+        required_fields = tuple(model.get(PropName.REQUIRED, ()))
+        if PropName.PROPERTIES in model:
+            property_validators = [(prop_name, self._compile_type_check(prop_spec))
+                                   for prop_name, prop_spec in model[PropName.PROPERTIES].items()]
+        else:
+            property_validators = None
+
+        def validate_object(status, data, path):
+            if not isinstance(data, dict):
+                self._add_invalid_type_report(status, self._path_to_str(path), '', PropType.OBJECT, data)
+                return
+
+            for field in required_fields:
+                if field not in data:
+                    status[PropName.REQUIRED].append(self._path_to_str((path, field)))
+
+            if property_validators is None:
+                raise KeyError(PropName.PROPERTIES)
+            for prop_name, validate_type in property_validators:
+                if prop_name in data:
+                    validate_type(status, data[prop_name], (path, prop_name))
+
+        return validate_object
+
+    def _compile_type_check(self, prop_spec):
+        if PropName.TYPE not in prop_spec:
+            return _raise_missing_key(PropName.TYPE)
+
+        expected_type = prop_spec[PropName.TYPE]
+        if expected_type == PropType.OBJECT:
+            return self._compile_ref_check(prop_spec)
+        elif expected_type == PropType.ARRAY:
+            return self._compile_array_check(prop_spec)
+
+        is_correct_type = _SIMPLE_TYPE_CHECKS.get(expected_type, lambda value: False)
+
+        def validate_simple_type(status, value, path):
+            if not is_correct_type(value):
+                self._add_invalid_type_report(status, self._path_to_str(path), '', expected_type, value)
+
+        return validate_simple_type
+
+    def _compile_ref_check(self, prop_spec):
+        if PropName.REF not in prop_spec:
+            return _raise_missing_key(PropName.REF)
+
+        model_name = _get_model_name_from_url(prop_spec[PropName.REF])
+
+        # referenced models are compiled on first use, so recursive models are supported
+        def validate_ref(status, value, path):
+            self._get_compiled_model(model_name)(status, value, path)
+
+        return validate_ref
+
+    def _compile_array_check(self, prop_spec):
+        if PropName.ITEMS in prop_spec:
+            validate_item = self._compile_type_check(prop_spec[PropName.ITEMS])
+        else:
+            validate_item = None
+
+        def validate_array(status, value, path):
+            if not isinstance(value, list):
+                self._add_invalid_type_report(status, self._path_to_str(path), '', PropType.ARRAY, value)
+                return
+
+            if validate_item is None:
+                raise KeyError(PropName.ITEMS)
+            for i, item in enumerate(value):
+                validate_item(status, item, (path, i))
+
+        return validate_array
 
     def _is_enum(self, model):
         return self._is_string_type(model) and PropName.ENUM in model
 
-    def _check_enum(self, status, model, value, path):
-        if value not in model[PropName.ENUM]:
-            self._add_invalid_type_report(status, path, '', PropName.ENUM, value)
-
     def _add_invalid_type_report(self, status, path, prop_name, expected_type, actually_value):
         status[PropName.INVALID_TYPE].append({
             'path': self._create_path_to_field(path, prop_name),
@@ -522,75 +777,29 @@ class FdmSwaggerValidator:
             'actually_value': actually_value
         })
 
-    def _check_object(self, status, model, data, path):
-        if not isinstance(data, dict):
-            self._add_invalid_type_report(status, path, '', PropType.OBJECT, data)
-            return None
-
-        if PropName.REQUIRED in model:
-            self._check_required_fields(status, model[PropName.REQUIRED], data, path)
-
-        model_properties = model[PropName.PROPERTIES]
-        for prop in model_properties.keys():
-            if prop in data:
-                model_prop_val = model_properties[prop]
-                expected_type = model_prop_val[PropName.TYPE]
-                actually_value = data[prop]
-                self._check_types(status, actually_value, expected_type, model_prop_val, path, prop)
-
-    def _check_types(self, status, actually_value, expected_type, model, path, prop_name):
-        if expected_type == PropType.OBJECT:
-            ref_model = self._get_model_by_ref(model)
-
-            self._validate_object(status, ref_model, actually_value,
-                                  path=self._create_path_to_field(path, prop_name))
-        elif expected_type == PropType.ARRAY:
-            self._check_array(status, model, actually_value,
-                              path=self._create_path_to_field(path, prop_name))
-        elif not self._is_correct_simple_types(expected_type, actually_value):
-            self._add_invalid_type_report(status, path, prop_name, expected_type, actually_value)
-
-    def _get_model_by_ref(self, model_prop_val):
-        model = _get_model_name_from_url(model_prop_val[PropName.REF])
-        return self._models[model]
-
-    def _check_required_fields(self, status, required_fields, data, path):
-        missed_required_fields = [self._create_path_to_field(path, field) for field in
-                                  required_fields if field not in data.keys()]
-        if len(missed_required_fields) > 0:
-            status[PropName.REQUIRED] += missed_required_fields
-
-    def _check_array(self, status, model, data, path):
-        if not isinstance(data, list):
-            self._add_invalid_type_report(status, path, '', PropType.ARRAY, data)
-        else:
-            item_model = model[PropName.ITEMS]
-            for i, item_data in enumerate(data):
-                self._check_types(status, item_data, item_model[PropName.TYPE], item_model, "{0}[{1}]".format(path, i),
-                                  '')
+    @classmethod
+    def _path_to_str(cls, path):
+        """
+        Converts the path used by compiled validators into a string. The path is None for the root object, and
+        a (parent_path, field_name) or (parent_path, item_index) tuple for nested fields and array items.
+        """
+        segments = []
+        while path is not None:
+            path, segment = path
+            segments.append(segment)
+
+        path_str = ''
+        for segment in reversed(segments):
+            if isinstance(segment, int):
+                path_str = "{0}[{1}]".format(path_str, segment)
+            else:
+                path_str = cls._create_path_to_field(path_str, segment)
+        return path_str
 
     @staticmethod
     def _is_correct_simple_types(expected_type, value):
-        def is_numeric_string(s):
-            try:
-                float(s)
-                return True
-            except ValueError:
-                return False
-
-        if expected_type == PropType.STRING:
-            return isinstance(value, string_types)
-        elif expected_type == PropType.BOOLEAN:
-            return isinstance(value, bool)
-        elif expected_type == PropType.INTEGER:
-            is_integer = isinstance(value, integer_types) and not isinstance(value, bool)
-            is_digit_string = isinstance(value, string_types) and value.isdigit()
-            return is_integer or is_digit_string
-        elif expected_type == PropType.NUMBER:
-            is_number = isinstance(value, (integer_types, float)) and not isinstance(value, bool)
-            is_numeric_string = isinstance(value, string_types) and is_numeric_string(value)
-            return is_number or is_numeric_string
-        return False
+        is_correct_type = _SIMPLE_TYPE_CHECKS.get(expected_type)
+        return is_correct_type(value) if is_correct_type else False
 
     @staticmethod
     def _is_string_type(model):
@@ -0,0 +1,243 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import os
+import re
+
+try:
+    from ansible.module_utils.common import write_file_atomically
+except ImportError:
+    from module_utils.common import write_file_atomically
+
+PARTIAL_CONTENT_STATUS_CODE = 206
+
+PARTIAL_FILE_SUFFIX = '.part'
+METADATA_FILE_SUFFIX = '.download.json'
+
+CONTENT_RANGE_REGEX = r'bytes (\d+)-\d+/(\d+|\*)'
+
+
+class DownloadResult:
+    DESTINATION = 'destination'
+    DOWNLOADED = 'downloaded'
+
+
+class DownloadMeta:
+    FILE = 'file'
+    PARTIAL = 'partial'
+    ETAG = 'etag'
+    LAST_MODIFIED = 'last_modified'
+    CONTENT_LENGTH = 'content_length'
+    SIZE = 'size'
+    MTIME = 'mtime'
+
+
+class FileDownload(object):
+    """
+    Downloads a file to the destination path so that the next download of the same file can be skipped or resumed.
+
+    Validators of the downloaded file (ETag, Last-Modified and Content-Length) are kept in a hidden metadata file
+    next to the destination. They are sent as conditional headers with the next request and compared with
+    the response headers before the body is read, so a file that is not modified is not transferred again.
+
+    The content is written to a hidden partial file next to the destination that replaces the destination once
+    the download completes. When the download is interrupted and the server supports byte ranges, the partial
+    file is kept, and the next download requests only the missing bytes.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path to the destination file
+        :type path: str
+        """
+        self.path = path
+        dir_name, file_name = os.path.split(path)
+        self._partial_path = os.path.join(dir_name, '.%s%s' % (file_name, PARTIAL_FILE_SUFFIX))
+        self._metadata_path = os.path.join(dir_name, '.%s%s' % (file_name, METADATA_FILE_SUFFIX))
+        self._metadata = self._load_metadata()
+
+    def request_headers(self):
+        """
+        Returns conditional and range headers for the download request based on the state of the previous download.
+
+        :return: dict of request headers
+        :rtype: dict
+        """
+        headers = {}
+        file_meta = self._get_intact_file_meta()
+        if file_meta.get(DownloadMeta.ETAG):
+            headers['If-None-Match'] = file_meta[DownloadMeta.ETAG]
+        if file_meta.get(DownloadMeta.LAST_MODIFIED):
+            headers['If-Modified-Since'] = file_meta[DownloadMeta.LAST_MODIFIED]
+
+        partial_size = self._get_partial_size()
+        range_validator = _get_range_validator(self._metadata.get(DownloadMeta.PARTIAL, {}))
+        if partial_size and range_validator:
+            headers['Range'] = 'bytes=%s-' % partial_size
+            headers['If-Range'] = range_validator
+        return headers
+
+    def is_not_modified(self, response):
+        """
+        Checks whether the local file is the same as the one being downloaded by comparing the response headers
+        with the validators of the previous download.
+
+        :param response: response with the file
+        :return: True if the local file is up to date
+        :rtype: bool
+        """
+        file_meta = self._get_intact_file_meta()
+        validators = _get_validators(response)
+        compared_fields = [field for field in (DownloadMeta.ETAG, DownloadMeta.LAST_MODIFIED)
+                           if file_meta.get(field) and validators.get(field)]
+        if not compared_fields or any(file_meta[field] != validators[field] for field in compared_fields):
+            return False
+        content_length = validators.get(DownloadMeta.CONTENT_LENGTH)
+        return content_length is None or content_length == file_meta[DownloadMeta.SIZE]
+
+    def discard_partial(self):
+        """
+        Removes the partial file, so the next download starts from the beginning.
+        """
+        _remove_silently(self._partial_path)
+        self._metadata.pop(DownloadMeta.PARTIAL, None)
+        self._save_metadata()
+
+    def write(self, response, chunk_size):
+        """
+        Writes the response body to the partial file and replaces the destination file with it once the whole
+        body is written. When writing fails, the partial file is kept for resuming if the server supports byte
+        ranges, otherwise it is removed.
+
+        :param response: response with the file, the body is read in chunks
+        :param chunk_size: maximum number of bytes read at once
+        :type chunk_size: int
+        """
+        validators = _get_validators(response)
+        offset = self._get_resume_offset(response)
+        try:
+            with open(self._partial_path, 'r+b' if offset else 'wb') as output_file:
+                output_file.seek(offset)
+                output_file.truncate()
+                chunk = response.read(chunk_size)
+                while chunk:
+                    output_file.write(chunk)
+                    chunk = response.read(chunk_size)
+
+            content_length = validators.get(DownloadMeta.CONTENT_LENGTH)
+            if content_length is not None and content_length != self._get_partial_size():
+                raise IOError('Download of %s is incomplete: received %s of %s bytes.' % (
+                    self.path, self._get_partial_size(), content_length))
+        except Exception:
+            if _is_resumable(response, validators):
+                self._metadata[DownloadMeta.PARTIAL] = validators
+                self._save_metadata()
+            else:
+                self.discard_partial()
+            raise
+
+        os.rename(self._partial_path, self.path)
+        file_stat = os.stat(self.path)
+        validators.update({DownloadMeta.SIZE: file_stat.st_size, DownloadMeta.MTIME: file_stat.st_mtime})
+        self._metadata = {DownloadMeta.FILE: validators}
+        self._save_metadata()
+
+    def _get_resume_offset(self, response):
+        if response.getcode() != PARTIAL_CONTENT_STATUS_CODE:
+            return 0
+
+        match = re.match(CONTENT_RANGE_REGEX, response.info().get('Content-Range') or '')
+        if match is None or int(match.group(1)) > self._get_partial_size():
+            raise ValueError('Unexpected Content-Range header in response for %s: %s' % (
+                self.path, response.info().get('Content-Range')))
+        return int(match.group(1))
+
+    def _get_intact_file_meta(self):
+        """
+        Returns validators of the destination file if the file has not been changed since it was downloaded.
+        """
+        file_meta = self._metadata.get(DownloadMeta.FILE) or {}
+        try:
+            file_stat = os.stat(self.path)
+        except OSError:
+            return {}
+        is_intact = file_meta.get(DownloadMeta.SIZE) == file_stat.st_size and \
+            file_meta.get(DownloadMeta.MTIME) == file_stat.st_mtime
+        return file_meta if is_intact else {}
+
+    def _get_partial_size(self):
+        try:
+            return os.path.getsize(self._partial_path)
+        except OSError:
+            return 0
+
+    def _load_metadata(self):
+        try:
+            with open(self._metadata_path) as f:
+                metadata = json.load(f)
+            return metadata if isinstance(metadata, dict) else {}
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _save_metadata(self):
+        has_validators = any(_get_range_validator(meta) or meta.get(DownloadMeta.ETAG)
+                             for meta in self._metadata.values())
+        if has_validators:
+            write_file_atomically(self._metadata_path, 'w', lambda f: json.dump(self._metadata, f))
+        else:
+            _remove_silently(self._metadata_path)
+
+
+def _get_validators(response):
+    headers = response.info()
+    validators = {}
+    if headers.get('ETag'):
+        validators[DownloadMeta.ETAG] = headers.get('ETag')
+    if headers.get('Last-Modified'):
+        validators[DownloadMeta.LAST_MODIFIED] = headers.get('Last-Modified')
+
+    # the length of the whole file, partial responses contain it in Content-Range header
+    if response.getcode() == PARTIAL_CONTENT_STATUS_CODE:
+        match = re.match(CONTENT_RANGE_REGEX, headers.get('Content-Range') or '')
+        content_length = match.group(2) if match else None
+    else:
+        content_length = headers.get('Content-Length')
+    if content_length is not None and content_length.isdigit():
+        validators[DownloadMeta.CONTENT_LENGTH] = int(content_length)
+    return validators
+
+
+def _get_range_validator(validators):
+    # weak ETags cannot be used in If-Range header
+    etag = validators.get(DownloadMeta.ETAG)
+    if etag and not etag.startswith('W/'):
+        return etag
+    return validators.get(DownloadMeta.LAST_MODIFIED)
+
+
+def _is_resumable(response, validators):
+    accepts_ranges = response.getcode() == PARTIAL_CONTENT_STATUS_CODE or \
+        (response.info().get('Accept-Ranges') or '').lower() == 'bytes'
+    return accepts_ranges and _get_range_validator(validators) is not None
+
+
+def _remove_silently(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
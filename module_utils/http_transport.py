@@ -0,0 +1,125 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import urllib3
+from urllib3.exceptions import HTTPError as Urllib3HTTPError, InsecureRequestWarning
+from urllib3.util.retry import Retry
+
+from ansible.module_utils.six import BytesIO
+from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
+
+DEFAULT_POOL_SIZE = 4
+
+# Requests are retried only once and only when the connection fails before a response is received, e.g. when
+# the device has closed a kept-alive socket. Read errors are retried for idempotent methods only.
+STALE_CONNECTION_RETRIES = Retry(total=1, connect=1, read=1, redirect=0, status=0, raise_on_redirect=False,
+                                 raise_on_status=False)
+
+
+class PooledResponse(object):
+    """
+    Wraps urllib3 response in the interface of the response returned by `open_url`, so the callers of
+    `connection.send` can work with both of them.
+    """
+
+    def __init__(self, response):
+        self._response = response
+
+    def getcode(self):
+        return self._response.status
+
+    def info(self):
+        return self._response.headers
+
+    def read(self, amt=None):
+        return self._response.read(amt)
+
+    def close(self):
+        # the connection cannot be reused until the response body is read completely
+        if not self._response.isclosed():
+            self._response.close()
+        self._response.release_conn()
+
+
+class PooledHttpTransport(object):
+    """
+    HTTP(S) transport that keeps connections to the device alive and reuses them for subsequent requests.
+    The pool holds at most `pool_size` connections, requests wait for a free connection when all of them are
+    in use. Connections dropped by the device are detected before reuse and replaced with new ones.
+    """
+
+    def __init__(self, base_url, pool_size=DEFAULT_POOL_SIZE, validate_certs=True, timeout=None):
+        """
+        :param base_url: scheme, host and port of the device, e.g. 'https://192.168.0.1:443'
+        :type base_url: str
+        :param pool_size: maximum number of connections kept open
+        :type pool_size: int
+        :param validate_certs: whether the device certificate is validated
+        :type validate_certs: bool
+        :param timeout: socket timeout in seconds
+        :type timeout: int
+        """
+        self._base_url = base_url
+        pool_kwargs = dict(maxsize=pool_size, block=True, retries=STALE_CONNECTION_RETRIES,
+                           timeout=timeout if timeout else urllib3.Timeout.DEFAULT_TIMEOUT)
+        if base_url.startswith('https'):
+            pool_kwargs['cert_reqs'] = 'CERT_REQUIRED' if validate_certs else 'CERT_NONE'
+            if not validate_certs:
+                urllib3.disable_warnings(InsecureRequestWarning)
+        self._pool = urllib3.connection_from_url(base_url, **pool_kwargs)
+
+    def send(self, path, data=None, method='get', headers=None):
+        """
+        Sends the request over a pooled connection. Mirrors `connection.send` contract: returns the response
+        and a buffer with the response body, raises HTTPError for non-2xx responses and URLError when the device
+        cannot be reached.
+
+        :return: tuple of the response and BytesIO with the response body
+        """
+        url = self._base_url + path
+        try:
+            response = self._pool.urlopen(method.upper(), path, body=data, headers=headers, redirect=False)
+        except Urllib3HTTPError as e:
+            raise URLError(e)
+
+        response_data = BytesIO(response.data)
+        if not 200 <= response.status < 300:
+            raise HTTPError(url, response.status, response.reason, response.headers, response_data)
+        return PooledResponse(response), response_data
+
+    def open(self, path, method='get', headers=None):
+        """
+        Sends the request without reading the response body, so it can be read in chunks. The connection returns
+        to the pool once the returned response is closed.
+
+        :return: response with `read` and `close` methods in addition to `getcode` and `info`
+        """
+        url = self._base_url + path
+        try:
+            response = self._pool.urlopen(method.upper(), path, headers=headers, redirect=False,
+                                          preload_content=False)
+        except Urllib3HTTPError as e:
+            raise URLError(e)
+
+        if not 200 <= response.status < 300:
+            response_data = BytesIO(response.read())
+            response.release_conn()
+            raise HTTPError(url, response.status, response.reason, response.headers, response_data)
+        return PooledResponse(response)
+
+    def close(self):
+        self._pool.close()
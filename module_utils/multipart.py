@@ -0,0 +1,115 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import os
+
+from urllib3.fields import RequestField
+from urllib3.filepost import choose_boundary
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+PROGRESS_STEP_PERCENT = 10
+
+
+class MultipartFileBody(object):
+    """
+    File-like multipart/form-data request body with a single file field, encoded the same way as
+    `urllib3.encode_multipart_formdata` does. The file is read from disk in chunks while the body is being sent,
+    so memory usage does not depend on the file size.
+
+    The body supports `tell` and `seek`, so it can be rewound when the request is retried.
+    """
+
+    def __init__(self, field_name, file_path, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+        """
+        :param field_name: name of the form field containing the file
+        :type field_name: str
+        :param file_path: path to the file to send
+        :type file_path: str
+        :param chunk_size: number of bytes read from the file at once when the caller reads the rest of the body
+        :type chunk_size: int
+        :param progress_callback: function called with the number of sent bytes and the body size every time
+                                  another PROGRESS_STEP_PERCENT of the body is sent
+        :type progress_callback: callable
+        """
+        boundary = choose_boundary()
+        field = RequestField(field_name, None, os.path.basename(file_path))
+        field.make_multipart()
+
+        self.content_type = 'multipart/form-data; boundary=%s' % boundary
+        self._head = ('--%s\r\n' % boundary).encode('utf-8') + field.render_headers().encode('utf-8')
+        self._tail = ('\r\n--%s--\r\n' % boundary).encode('utf-8')
+        self._file_size = os.path.getsize(file_path)
+        self._file = open(file_path, 'rb')
+        self._chunk_size = chunk_size
+        self._progress_callback = progress_callback
+        self._position = 0
+        self._reported_step = 0
+
+    @property
+    def content_length(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def __len__(self):
+        return self.content_length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(self._chunk_size), b''))
+
+        file_start = len(self._head)
+        file_end = file_start + self._file_size
+        chunk = b''
+        if self._position < file_start:
+            chunk = self._head[self._position:self._position + size]
+        elif self._position < file_end:
+            self._file.seek(self._position - file_start)
+            chunk = self._file.read(min(size, file_end - self._position))
+        elif self._position < self.content_length:
+            chunk = self._tail[self._position - file_end:self._position - file_end + size]
+
+        self._position += len(chunk)
+        self._report_progress()
+        return chunk
+
+    def _progress_step(self):
+        return self._position * 100 // (self.content_length * PROGRESS_STEP_PERCENT)
+
+    def _report_progress(self):
+        if self._progress_callback is not None and self._progress_step() > self._reported_step:
+            self._reported_step = self._progress_step()
+            self._progress_callback(self._position, self.content_length)
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.content_length
+        self._position = max(0, min(offset, self.content_length))
+        self._reported_step = self._progress_step()
+        return self._position
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
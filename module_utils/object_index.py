@@ -0,0 +1,170 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import copy
+
+# path parameter identifying a single object, it is not a part of the scope the object belongs to
+OBJECT_ID_PATH_PARAM = 'objId'
+
+
+class _IndexScope(object):
+
+    def __init__(self):
+        self.complete = False
+        self.objects_by_id = {}
+        self.ids_by_name = {}
+        self.known_names = set()
+
+    def put(self, obj):
+        self.remove(obj['id'])
+        self.objects_by_id[obj['id']] = obj
+        self.ids_by_name.setdefault(obj.get('name'), []).append(obj['id'])
+
+    def remove(self, obj_id):
+        obj = self.objects_by_id.pop(obj_id, None)
+        if obj is not None:
+            ids = self.ids_by_name[obj.get('name')]
+            ids.remove(obj_id)
+            if not ids:
+                del self.ids_by_name[obj.get('name')]
+
+    def forget_name(self, name):
+        for obj_id in list(self.ids_by_name.get(name, [])):
+            self.remove(obj_id)
+        self.known_names.discard(name)
+        # the list has missed a change, so other names cannot be trusted to be complete either
+        self.complete = False
+
+    def is_name_known(self, name):
+        return self.complete or name in self.known_names
+
+    def find_by_name(self, name):
+        return [self.objects_by_id[obj_id] for obj_id in self.ids_by_name.get(name, [])]
+
+
+class ObjectIndex(object):
+    """
+    In-memory index of configuration objects used for idempotency checks. Objects are indexed by model name and
+    path parameters, as objects of some models belong to a parent object, and then by name and id.
+
+    The index is filled by list scans and updated with the objects returned by add, edit and delete operations,
+    so it should live as long as the connection to the device. The index has to be invalidated when objects are
+    changed in a way it cannot account for.
+    """
+
+    def __init__(self):
+        self._scopes = {}
+
+    @staticmethod
+    def _scope_key(model_name, path_params):
+        return model_name, tuple(sorted(
+            (name, str(value)) for name, value in (path_params or {}).items() if name != OBJECT_ID_PATH_PARAM
+        ))
+
+    def _get_scope(self, model_name, path_params):
+        return self._scopes.setdefault(self._scope_key(model_name, path_params), _IndexScope())
+
+    def get_all(self, model_name, path_params):
+        """
+        Returns all objects of the model if the complete list has been indexed.
+
+        :param model_name: name of the model
+        :type model_name: str
+        :param path_params: path parameters the objects were fetched with
+        :type path_params: dict
+        :return: list of objects or None if the list is unknown
+        :rtype: list
+        """
+        scope = self._scopes.get(self._scope_key(model_name, path_params))
+        if scope is None or not scope.complete:
+            return None
+        return copy.deepcopy(list(scope.objects_by_id.values()))
+
+    def find_by_name(self, model_name, path_params, name):
+        """
+        Returns objects of the model with the given name if they are known.
+
+        :return: list of objects or None if objects with the name are unknown
+        :rtype: list
+        """
+        scope = self._scopes.get(self._scope_key(model_name, path_params))
+        if scope is None or not scope.is_name_known(name):
+            return None
+        return copy.deepcopy(scope.find_by_name(name))
+
+    def put_all(self, model_name, path_params, objects):
+        """
+        Replaces indexed objects of the model with the complete list of its objects.
+        """
+        scope = _IndexScope()
+        for obj in objects:
+            scope.put(copy.deepcopy(obj))
+        scope.complete = True
+        self._scopes[self._scope_key(model_name, path_params)] = scope
+
+    def put_by_name(self, model_name, path_params, name, objects):
+        """
+        Indexes all objects of the model with the given name.
+        """
+        scope = self._get_scope(model_name, path_params)
+        for obj_id in list(scope.ids_by_name.get(name, [])):
+            scope.remove(obj_id)
+        for obj in objects:
+            scope.put(copy.deepcopy(obj))
+        scope.known_names.add(name)
+
+    def forget_name(self, model_name, path_params, name):
+        """
+        Drops indexed objects of the model with the given name, so they are fetched from the device again. Used when
+        the device reports a change the index cannot know about, e.g. an object created by another writer.
+        """
+        scope = self._scopes.get(self._scope_key(model_name, path_params))
+        if scope is not None:
+            scope.forget_name(name)
+
+    def add(self, model_name, path_params, obj):
+        """
+        Indexes the object created by add operation. As the device has accepted the object, there are no other
+        objects with the same name.
+        """
+        scope = self._get_scope(model_name, path_params)
+        scope.put(copy.deepcopy(obj))
+        scope.known_names.add(obj.get('name'))
+
+    def update(self, model_name, path_params, obj):
+        """
+        Updates the object changed by edit operation.
+        """
+        self._get_scope(model_name, path_params).put(copy.deepcopy(obj))
+
+    def remove(self, model_name, path_params, obj_id):
+        """
+        Removes the object deleted by delete operation.
+        """
+        scope = self._scopes.get(self._scope_key(model_name, path_params))
+        if scope is not None:
+            scope.remove(obj_id)
+
+    def invalidate(self, model_name=None):
+        """
+        Drops indexed objects of the model or all indexed objects if the model is not specified.
+        """
+        if model_name is None:
+            self._scopes.clear()
+        else:
+            for key in [key for key in self._scopes if key[0] == model_name]:
+                del self._scopes[key]
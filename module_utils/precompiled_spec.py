@@ -0,0 +1,135 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import mmap
+import struct
+
+try:
+    from ansible.module_utils.fdm_swagger_client import SpecProp, LazySpecMapping, build_model_operations
+except ImportError:
+    from module_utils.fdm_swagger_client import SpecProp, LazySpecMapping, build_model_operations
+
+MAGIC = b'FTDSPEC\x01'
+INDEX_LENGTH_FORMAT = '>I'
+HEADER_SIZE = len(MAGIC) + struct.calcsize(INDEX_LENGTH_FORMAT)
+
+
+class InvalidPrecompiledSpec(ValueError):
+    pass
+
+
+def _to_compact_json(value):
+    return json.dumps(value, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def dump_precompiled_spec(spec, output_file):
+    """
+    Serializes the parsed specification into the precompiled format. The format is designed to be memory-mapped,
+    so processes loading the same file share its pages and decode only the entries they actually use:
+
+        +-------+--------------+------------+--------------------------------------------+
+        | magic | index length |   index    |                entry blobs                 |
+        |  8 B  | 4 B, uint BE | JSON, utf8 | compact JSON of every model and operation  |
+        +-------+--------------+------------+--------------------------------------------+
+
+    The index contains offsets and lengths of model and operation blobs (relative to the beginning of the blob
+    section) and names of operations available for each model.
+
+    :param spec: data from FdmSwaggerParser().parse_spec()
+    :type spec: dict
+    :param output_file: binary file-like object the precompiled specification is written to
+    """
+    blobs = []
+    offset = [0]
+
+    def add_blob(value):
+        blob = _to_compact_json(value)
+        blobs.append(blob)
+        position = [offset[0], len(blob)]
+        offset[0] += len(blob)
+        return position
+
+    models = spec[SpecProp.MODELS]
+    operations = spec[SpecProp.OPERATIONS]
+    index = {
+        SpecProp.MODELS: dict((name, add_blob(models[name])) for name in sorted(models)),
+        SpecProp.OPERATIONS: dict((name, add_blob(operations[name])) for name in sorted(operations)),
+        # model name can be None, so model operations are stored as a list of pairs rather than a JSON object
+        SpecProp.MODEL_OPERATIONS: [
+            [model_name, sorted(model_ops)] for model_name, model_ops in build_model_operations(operations).items()
+        ]
+    }
+
+    index_blob = _to_compact_json(index)
+    output_file.write(MAGIC)
+    output_file.write(struct.pack(INDEX_LENGTH_FORMAT, len(index_blob)))
+    output_file.write(index_blob)
+    for blob in blobs:
+        output_file.write(blob)
+
+
+def load_precompiled_spec(path):
+    """
+    Memory-maps the precompiled specification. Only the index is read eagerly, while models and operations
+    are decoded the first time they are accessed.
+
+    :param path: path to the file written by `dump_precompiled_spec`
+    :type path: str
+    :return: specification in the same format as FdmSwaggerParser().parse_spec() returns
+    :rtype: dict
+    :raises InvalidPrecompiledSpec if the file is not a valid precompiled specification
+    """
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise InvalidPrecompiledSpec('Precompiled specification is empty: %s' % path)
+
+    if len(data) < HEADER_SIZE or data[:len(MAGIC)] != MAGIC:
+        raise InvalidPrecompiledSpec('File is not a precompiled specification: %s' % path)
+
+    index_length = struct.unpack(INDEX_LENGTH_FORMAT, data[len(MAGIC):HEADER_SIZE])[0]
+    blobs_start = HEADER_SIZE + index_length
+    if len(data) < blobs_start:
+        raise InvalidPrecompiledSpec('Precompiled specification is truncated: %s' % path)
+    try:
+        index = json.loads(data[HEADER_SIZE:blobs_start].decode('utf-8'))
+    except ValueError:
+        raise InvalidPrecompiledSpec('Precompiled specification has a corrupted index: %s' % path)
+
+    def section_loader(section_index):
+        def load(name):
+            offset, length = section_index[name]
+            start = blobs_start + offset
+            return json.loads(data[start:start + length].decode('utf-8'))
+
+        return load
+
+    models_index = index[SpecProp.MODELS]
+    operations_index = index[SpecProp.OPERATIONS]
+    model_operations_index = dict((model_name, op_names) for model_name, op_names in index[SpecProp.MODEL_OPERATIONS])
+
+    operations = LazySpecMapping(operations_index, section_loader(operations_index))
+    return {
+        SpecProp.MODELS: LazySpecMapping(models_index, section_loader(models_index)),
+        SpecProp.OPERATIONS: operations,
+        SpecProp.MODEL_OPERATIONS: LazySpecMapping(
+            model_operations_index,
+            lambda model_name: dict((op_name, operations[op_name]) for op_name in model_operations_index[model_name])
+        )
+    }
@@ -0,0 +1,108 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import threading
+from collections import OrderedDict
+
+VERSION_PROPERTY = 'version'
+
+
+class CachedResponse(object):
+    def __init__(self, validator, status_code, body):
+        self.validator = validator
+        self.status_code = status_code
+        self.body = body
+
+
+class ResponseCache(object):
+    """
+    A bounded in-memory cache of GET responses keyed by the full URL of the request. Every response is kept
+    with its validator, so the next request for the same URL can be sent as a conditional one, and the cached
+    body is used when the device responds that it is not modified. Least recently used responses are evicted
+    once the cache is full.
+
+    Bodies are kept as text, so every caller gets its own copy of the response.
+    """
+
+    def __init__(self, max_entries):
+        """
+        :param max_entries: maximum number of cached responses
+        :type max_entries: int
+        """
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """
+        :param url: full URL of the request including query parameters
+        :type url: str
+        :return: the cached response or None if there is no response for the URL
+        :rtype: CachedResponse
+        """
+        with self._lock:
+            entry = self._entries.pop(url, None)
+            if entry is not None:
+                self._entries[url] = entry
+            return entry
+
+    def put(self, url, validator, status_code, body):
+        """
+        Caches the response. Responses without a validator cannot be revalidated, so they are not cached
+        and replace the previously cached response for the URL.
+
+        :param url: full URL of the request including query parameters
+        :type url: str
+        :param validator: value of `If-None-Match` header for the next request
+        :type validator: str
+        :param status_code: status code of the response
+        :type status_code: int
+        :param body: body of the response
+        :type body: str
+        """
+        with self._lock:
+            self._entries.pop(url, None)
+            if not validator or self._max_entries <= 0:
+                return
+            self._entries[url] = CachedResponse(validator, status_code, body)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def remove(self, url):
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_response_validator(etag, response):
+    """
+    Returns the validator of the response, which is its ETag or, when the device does not send one, the version
+    of the returned object formatted as an entity tag.
+
+    :param etag: value of `ETag` response header
+    :type etag: str
+    :param response: parsed body of the response
+    :return: the validator or None if the response cannot be revalidated
+    :rtype: str
+    """
+    if etag:
+        return etag
+    if isinstance(response, dict) and response.get(VERSION_PROPERTY):
+        return '"%s"' % response[VERSION_PROPERTY]
+    return None
@@ -0,0 +1,169 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import random
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+TOO_MANY_REQUESTS_STATUS_CODE = 429
+SERVICE_UNAVAILABLE_STATUS_CODE = 503
+RETRYABLE_STATUS_CODES = (TOO_MANY_REQUESTS_STATUS_CODE, SERVICE_UNAVAILABLE_STATUS_CODE)
+
+IDEMPOTENT_METHODS = ('get', 'put', 'delete')
+
+
+class RetryBudget(object):
+    """
+    Limits the total number of retries of requests sent to a single device. Once the budget is spent, failing
+    requests are not retried anymore, so a device that keeps failing does not slow down the whole play.
+    The instance should live as long as the connection to the device.
+    """
+
+    def __init__(self, max_retries):
+        """
+        :param max_retries: maximum number of retries during the connection
+        :type max_retries: int
+        """
+        self._remaining_retries = max_retries
+        self._lock = threading.Lock()
+
+    def consume(self):
+        """
+        Takes a single retry from the budget.
+
+        :return: True if the budget allowed the retry, otherwise False
+        :rtype: bool
+        """
+        with self._lock:
+            if self._remaining_retries <= 0:
+                return False
+            self._remaining_retries -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request is retried and how long to wait before retrying it. Delays grow
+    exponentially with random jitter, so requests from many hosts that failed at the same time are not retried
+    at the same time either. The delay requested by the server in `Retry-After` header is never shortened.
+    """
+
+    def __init__(self, max_retries, base_delay, max_delay, budget, retry_non_idempotent=False):
+        """
+        :param max_retries: maximum number of retries of a single request
+        :type max_retries: int
+        :param base_delay: upper bound of the delay before the first retry in seconds
+        :type base_delay: float
+        :param max_delay: maximum delay before a retry in seconds, requests are not retried when the server asks
+            to wait longer
+        :type max_delay: float
+        :param budget: retry budget of the device
+        :type budget: RetryBudget
+        :param retry_non_idempotent: whether requests with non-idempotent methods (e.g. POST) are retried
+        :type retry_non_idempotent: bool
+        """
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._budget = budget
+        self._retry_non_idempotent = retry_non_idempotent
+
+    def start(self, method):
+        """
+        Starts tracking retries of a single request.
+
+        :param method: HTTP method of the request
+        :type method: str
+        :rtype: RequestRetries
+        """
+        is_retryable = self._retry_non_idempotent or method.lower() in IDEMPOTENT_METHODS
+        return RequestRetries(self, self._max_retries if is_retryable else 0)
+
+    def get_delay(self, retry_number, retry_after=None):
+        """
+        Computes the delay before the retry.
+
+        :param retry_number: number of the retry starting from 0
+        :type retry_number: int
+        :param retry_after: value of `Retry-After` response header
+        :type retry_after: str
+        :return: delay in seconds or None if the server asks to wait longer than the maximum delay
+        :rtype: float
+        """
+        delay = random.uniform(0, min(self._max_delay, self._base_delay * 2 ** retry_number))
+        requested_delay = parse_retry_after(retry_after)
+        if requested_delay is not None:
+            if requested_delay > self._max_delay:
+                return None
+            delay = max(delay, requested_delay)
+        return delay
+
+    def consume_budget(self):
+        return self._budget.consume()
+
+
+class RequestRetries(object):
+    """
+    Retries of a single request. Keeps the number of retries and the total time spent waiting for them.
+    """
+
+    def __init__(self, policy, max_retries):
+        self._policy = policy
+        self._max_retries = max_retries
+        self.count = 0
+        self.total_delay = 0
+
+    def wait_before_retry(self, retry_after=None):
+        """
+        Waits before the next retry of the failed request if it can be retried.
+
+        :param retry_after: value of `Retry-After` header of the failed response
+        :type retry_after: str
+        :return: True if the request should be retried, otherwise False
+        :rtype: bool
+        """
+        if self.count >= self._max_retries:
+            return False
+        delay = self._policy.get_delay(self.count, retry_after)
+        if delay is None or not self._policy.consume_budget():
+            return False
+
+        time.sleep(delay)
+        self.count += 1
+        self.total_delay += delay
+        return True
+
+
+def parse_retry_after(value):
+    """
+    Parses the value of `Retry-After` header, which is either a number of seconds or an HTTP date.
+
+    :type value: str
+    :return: number of seconds to wait or None if the value is missing or invalid
+    :rtype: float
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
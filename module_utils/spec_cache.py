@@ -0,0 +1,200 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import errno
+import hashlib
+import json
+import os
+
+try:
+    from ansible.module_utils.common import write_file_atomically
+    from ansible.module_utils.precompiled_spec import dump_precompiled_spec, load_precompiled_spec, \
+        InvalidPrecompiledSpec
+except ImportError:
+    from module_utils.common import write_file_atomically
+    from module_utils.precompiled_spec import dump_precompiled_spec, load_precompiled_spec, InvalidPrecompiledSpec
+
+DEFAULT_MAX_CACHE_SIZE = 50 * 1024 * 1024
+
+ENTRY_SUFFIX = '.spec'
+HOST_META_SUFFIX = '.meta.json'
+UNKNOWN_VERSION = 'unknown'
+
+
+class CacheMeta:
+    ENTRY = 'entry'
+    ETAG = 'etag'
+    LAST_MODIFIED = 'last_modified'
+
+
+def spec_content_hash(content):
+    """
+    Calculates a hash of the raw API specification as it was received from the device.
+
+    :param content: raw API specification
+    :type content: bytes or str
+    :return: hex digest of the content
+    :rtype: str
+    """
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _hash_key(*parts):
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class SpecCache(object):
+    """
+    A disk cache for parsed API specifications. Every entry is keyed by the device host, the API version
+    declared in the specification and a hash of the raw specification content. In addition, the cache remembers
+    the validators (ETag and Last-Modified) of the last specification received from each host, so the specification
+    can be revalidated with a conditional request.
+
+    Entries are stored in the precompiled format, so they are memory-mapped on load and only the models and
+    operations that are actually used get decoded. Entries are written atomically and the total size of the cache
+    is kept under `max_size` by evicting the least recently used entries.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self._cache_dir = os.path.expanduser(cache_dir)
+        self._max_size = max_size
+
+    def get_validators(self, host):
+        """
+        Returns the ETag and Last-Modified values of the last cached specification for the host.
+
+        :type host: str
+        :return: dict with 'etag' and 'last_modified' keys, empty dict when nothing is cached for the host
+        :rtype: dict
+        """
+        meta = self._read_json(self._host_meta_path(host))
+        if not meta or not os.path.isfile(self._entry_path(meta[CacheMeta.ENTRY])):
+            return {}
+        return dict((k, meta.get(k)) for k in (CacheMeta.ETAG, CacheMeta.LAST_MODIFIED) if meta.get(k))
+
+    def get_latest(self, host):
+        """
+        Returns the last cached specification for the host. Used when the device confirms that the specification
+        has not been modified since it was cached.
+
+        :type host: str
+        :return: parsed API specification or None if it is not cached
+        :rtype: dict
+        """
+        meta = self._read_json(self._host_meta_path(host))
+        return self._load_entry(meta[CacheMeta.ENTRY]) if meta else None
+
+    def get(self, host, version, content_hash):
+        """
+        Returns a cached specification that was parsed from the exactly same content.
+
+        :type host: str
+        :type version: str
+        :type content_hash: str
+        :return: parsed API specification or None if it is not cached
+        :rtype: dict
+        """
+        return self._load_entry(_hash_key(host, version or UNKNOWN_VERSION, content_hash))
+
+    def put(self, host, version, content_hash, spec, etag=None, last_modified=None):
+        """
+        Stores the parsed specification and remembers its validators for further conditional requests.
+
+        :type host: str
+        :type version: str
+        :type content_hash: str
+        :param spec: data from FdmSwaggerParser().parse_spec()
+        :type spec: dict
+        :param etag: ETag header returned with the specification
+        :param last_modified: Last-Modified header returned with the specification
+        """
+        self._ensure_cache_dir()
+        entry = _hash_key(host, version or UNKNOWN_VERSION, content_hash)
+        entry_path = self._entry_path(entry)
+        # entries are immutable as their key contains the content hash, so existing ones are not rewritten
+        if not os.path.isfile(entry_path):
+            write_file_atomically(entry_path, 'wb', lambda f: dump_precompiled_spec(spec, f))
+        write_file_atomically(self._host_meta_path(host), 'w', lambda f: json.dump({
+            CacheMeta.ENTRY: entry,
+            CacheMeta.ETAG: etag,
+            CacheMeta.LAST_MODIFIED: last_modified
+        }, f))
+        self._evict()
+
+    def _load_entry(self, entry):
+        path = self._entry_path(entry)
+        try:
+            spec = load_precompiled_spec(path)
+        except (IOError, OSError, InvalidPrecompiledSpec):
+            # a missing or corrupted entry is treated as a cache miss
+            return None
+        # touching the file keeps the modification time usable as the LRU order
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return spec
+
+    def _evict(self):
+        entries = []
+        for filename in os.listdir(self._cache_dir):
+            if filename.endswith(ENTRY_SUFFIX):
+                path = os.path.join(self._cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # the entry has been removed meanwhile, e.g. by another process evicting entries
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        # the most recently written entry is never evicted, even if it alone exceeds the limit
+        for _, size, path in sorted(entries)[:-1]:
+            if total_size <= self._max_size:
+                break
+            _remove_silently(path)
+            total_size -= size
+
+    def _ensure_cache_dir(self):
+        try:
+            os.makedirs(self._cache_dir, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def _entry_path(self, entry):
+        return os.path.join(self._cache_dir, entry + ENTRY_SUFFIX)
+
+    def _host_meta_path(self, host):
+        return os.path.join(self._cache_dir, _hash_key(host) + HOST_META_SUFFIX)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+
+def _remove_silently(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
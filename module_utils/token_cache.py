@@ -0,0 +1,122 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import base64
+import errno
+import hashlib
+import json
+import os
+import stat
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
+try:
+    from ansible.module_utils.common import write_file_atomically
+except ImportError:
+    from module_utils.common import write_file_atomically
+
+ENTRY_SUFFIX = '.token'
+KEY_DERIVATION_ITERATIONS = 100000
+
+
+class TokenInfo:
+    ACCESS_TOKEN = 'access_token'
+    REFRESH_TOKEN = 'refresh_token'
+    ACCESS_TOKEN_EXPIRES_AT = 'access_token_expires_at'
+    REFRESH_TOKEN_EXPIRES_AT = 'refresh_token_expires_at'
+
+
+class TokenCache(object):
+    """
+    A disk cache of the tokens received by the latest login of the user to the device, so new connections can
+    reuse them instead of logging in with the password again.
+
+    Every entry is encrypted with a key derived from the password of the user, so the tokens can be read only
+    by someone who knows the password, and changing the password invalidates the cached tokens. Entries are
+    readable only by their owner, and entries with other permissions are ignored.
+    """
+
+    def __init__(self, cache_dir, host, username, password):
+        """
+        :param cache_dir: directory the tokens are stored in
+        :type cache_dir: str
+        :param host: URL of the device
+        :type host: str
+        :param username: name of the user the tokens belong to
+        :type username: str
+        :param password: password of the user, the encryption key is derived from it
+        :type password: str
+        """
+        if not HAS_CRYPTOGRAPHY:
+            raise ValueError('The cryptography Python library is required to cache tokens')
+
+        self._cache_dir = os.path.expanduser(cache_dir)
+        key_id = hashlib.sha256(('%s|%s' % (host, username)).encode('utf-8')).hexdigest()
+        self._path = os.path.join(self._cache_dir, key_id + ENTRY_SUFFIX)
+        self._fernet = Fernet(_derive_key(password, salt=key_id.encode('utf-8')))
+
+    def load(self):
+        """
+        Returns the cached tokens with their expiration times.
+
+        :return: dict with the fields from TokenInfo or None if there are no valid cached tokens
+        :rtype: dict
+        """
+        try:
+            file_stat = os.stat(self._path)
+            if file_stat.st_uid != os.getuid() or stat.S_IMODE(file_stat.st_mode) & 0o077:
+                return None
+            with open(self._path, 'rb') as f:
+                tokens = json.loads(self._fernet.decrypt(f.read()).decode('utf-8'))
+        except (IOError, OSError, ValueError, InvalidToken):
+            return None
+        return tokens if isinstance(tokens, dict) and tokens.get(TokenInfo.REFRESH_TOKEN) else None
+
+    def save(self, tokens):
+        """
+        Replaces the cached tokens.
+
+        :param tokens: dict with the fields from TokenInfo
+        :type tokens: dict
+        """
+        try:
+            os.makedirs(self._cache_dir, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        content = self._fernet.encrypt(json.dumps(tokens).encode('utf-8'))
+        write_file_atomically(self._path, 'wb', lambda f: f.write(content), permissions=0o600)
+
+    def remove(self):
+        try:
+            os.remove(self._path)
+        except OSError:
+            pass
+
+
+def _derive_key(password, salt):
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KEY_DERIVATION_ITERATIONS,
+                     backend=default_backend())
+    return base64.urlsafe_b64encode(kdf.derive(password.encode('utf-8')))
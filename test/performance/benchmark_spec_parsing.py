@@ -0,0 +1,58 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+Measures the time to the first request, i.e. the time needed to parse the API specification and to prepare
+everything that is required to send a typical 'upsertNetworkObject' request: the operation specs of the model
+and validation of the request data.
+
+Usage (from the project root):
+    python test/performance/benchmark_spec_parsing.py [number_of_runs]
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..'))
+
+from module_utils.fdm_swagger_client import FdmSwaggerParser, FdmSwaggerValidator, SpecProp
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'unit', 'module_utils', 'test_data',
+                         'ngfw_with_ex.json')
+NETWORK_OBJECT = {'name': 'Ansible-network-host', 'subType': 'HOST', 'value': '192.168.2.0', 'type': 'networkobject'}
+
+
+def first_request(spec, lazy):
+    api_spec = FdmSwaggerParser().parse_spec(spec, lazy=lazy)
+    api_spec[SpecProp.MODEL_OPERATIONS].get('NetworkObject')
+    api_spec[SpecProp.OPERATIONS].get('addNetworkObject')
+    FdmSwaggerValidator(api_spec).validate_data('addNetworkObject', NETWORK_OBJECT)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with open(SPEC_PATH, 'rb') as f:
+        spec = json.loads(f.read().decode('utf-8'))
+
+    for lazy in (False, True):
+        best_time = min(timeit.repeat(lambda: first_request(spec, lazy), number=1, repeat=runs))
+        print('%-6s parsing: %.2f ms to the first request' % ('lazy' if lazy else 'eager', best_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
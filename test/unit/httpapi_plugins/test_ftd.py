@@ -16,32 +16,44 @@
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 #
 import json
+import os
+import shutil
+import tempfile
+import threading
 
 from ansible.compat.tests import mock
 from ansible.compat.tests import unittest
-from ansible.compat.tests.mock import mock_open, patch
+from ansible.compat.tests.mock import patch
 from ansible.errors import AnsibleConnectionFailure
 from ansible.module_utils.connection import ConnectionError
-from ansible.module_utils.six import BytesIO, PY3, StringIO
-from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.six import BytesIO, StringIO
+from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
 
 from httpapi_plugins.ftd import HttpApi, BASE_HEADERS
 
 from module_utils.common import HTTPMethod, ResponseParams
 from module_utils.fdm_swagger_client import FdmSwaggerParser, SpecProp
 
-if PY3:
-    BUILTINS_NAME = 'builtins'
-else:
-    BUILTINS_NAME = '__builtin__'
-
 
 class FakeFtdHttpApiPlugin(HttpApi):
     def __init__(self, conn):
         super(FakeFtdHttpApiPlugin, self).__init__(conn)
         self.hostvars = {
             'token_path': '/testLoginUrl',
-            'spec_path': '/testSpecUrl'
+            'spec_path': '/testSpecUrl',
+            'spec_cache_dir': None,
+            'spec_cache_max_size': 1024,
+            'keep_alive': False,
+            'connection_pool_size': 4,
+            'page_prefetch_workers': 1,
+            'upsert_strategy': 'add_first',
+            'retries': 0,
+            'retry_delay': 1,
+            'max_retry_delay': 30,
+            'retry_non_idempotent': False,
+            'retry_budget': 30,
+            'token_cache_dir': None,
+            'response_cache_size': 0
         }
 
     def get_option(self, var):
@@ -133,6 +145,169 @@ class TestFtdHttpApi(unittest.TestCase):
                                     'token_to_revoke': 'REFRESH_TOKEN_TO_REVOKE'})
         self.connection_mock.send.assert_called_once_with(mock.ANY, expected_body, headers=mock.ANY, method=mock.ANY)
 
+    def _make_temp_dir(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        return temp_dir
+
+    def _enable_token_cache(self):
+        cache_dir = self._make_temp_dir()
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock.get_option.side_effect = lambda name: {'remote_user': 'foo', 'password': 'bar'}[name]
+        self.ftd_plugin.hostvars['token_cache_dir'] = cache_dir
+        return cache_dir
+
+    def _new_plugin_with_token_cache(self, cache_dir):
+        connection_mock = mock.Mock()
+        connection_mock._url = 'https://testhost.com'
+        connection_mock.get_option.side_effect = self.connection_mock.get_option.side_effect
+        plugin = FakeFtdHttpApiPlugin(connection_mock)
+        plugin.hostvars['token_cache_dir'] = cache_dir
+        return plugin
+
+    @patch('httpapi_plugins.ftd.time')
+    def test_login_should_reuse_cached_access_token_in_new_connection(self, time_mock):
+        cache_dir = self._enable_token_cache()
+        time_mock.time.return_value = 1000
+        self.connection_mock.send.return_value = self._connection_response(
+            {'access_token': 'ACCESS_TOKEN', 'refresh_token': 'REFRESH_TOKEN', 'expires_in': 1800})
+        self.ftd_plugin.login('foo', 'bar')
+        time_mock.time.return_value = 2000
+
+        plugin = self._new_plugin_with_token_cache(cache_dir)
+        plugin.login('foo', 'bar')
+
+        assert 'ACCESS_TOKEN' == plugin.access_token
+        assert 'REFRESH_TOKEN' == plugin.refresh_token
+        assert {'Authorization': 'Bearer ACCESS_TOKEN'} == plugin.connection._auth
+        plugin.connection.send.assert_not_called()
+
+    @patch('httpapi_plugins.ftd.time')
+    def test_login_should_refresh_expiring_cached_access_token_in_new_connection(self, time_mock):
+        cache_dir = self._enable_token_cache()
+        time_mock.time.return_value = 1000
+        self.connection_mock.send.return_value = self._connection_response(
+            {'access_token': 'ACCESS_TOKEN', 'refresh_token': 'REFRESH_TOKEN', 'expires_in': 1800})
+        self.ftd_plugin.login('foo', 'bar')
+        time_mock.time.return_value = 1000 + 1800 - 30
+
+        plugin = self._new_plugin_with_token_cache(cache_dir)
+        plugin.connection.send.return_value = self._connection_response(
+            {'access_token': 'NEW_ACCESS_TOKEN', 'refresh_token': 'NEW_REFRESH_TOKEN', 'expires_in': 1800})
+        plugin.login('foo', 'bar')
+
+        refresh_body = json.dumps({'grant_type': 'refresh_token', 'refresh_token': 'REFRESH_TOKEN'})
+        plugin.connection.send.assert_called_once_with(mock.ANY, refresh_body, headers=mock.ANY, method=mock.ANY)
+        assert 'NEW_ACCESS_TOKEN' == plugin.access_token
+        next_plugin = self._new_plugin_with_token_cache(cache_dir)
+        next_plugin.login('foo', 'bar')
+        assert 'NEW_ACCESS_TOKEN' == next_plugin.access_token
+        next_plugin.connection.send.assert_not_called()
+
+    def test_login_should_request_new_tokens_when_cached_refresh_token_is_rejected(self):
+        cache_dir = self._enable_token_cache()
+        self.connection_mock.send.return_value = self._connection_response(
+            {'access_token': 'ACCESS_TOKEN', 'refresh_token': 'REFRESH_TOKEN'})
+        self.ftd_plugin.login('foo', 'bar')
+
+        plugin = self._new_plugin_with_token_cache(cache_dir)
+        plugin.connection.send.side_effect = [
+            HTTPError('http://testhost.com', 400, '', {}, StringIO('{"message": "Invalid refresh token"}')),
+            self._connection_response({'access_token': 'NEW_ACCESS_TOKEN', 'refresh_token': 'NEW_REFRESH_TOKEN'})
+        ]
+        plugin.login('foo', 'bar')
+
+        password_body = json.dumps({'grant_type': 'password', 'username': 'foo', 'password': 'bar'})
+        assert password_body == plugin.connection.send.call_args[0][1]
+        assert 'NEW_ACCESS_TOKEN' == plugin.access_token
+
+    def test_logout_should_not_revoke_cached_tokens(self):
+        self._enable_token_cache()
+        self.connection_mock.send.return_value = self._connection_response(
+            {'access_token': 'ACCESS_TOKEN', 'refresh_token': 'REFRESH_TOKEN'})
+        self.ftd_plugin.login('foo', 'bar')
+
+        self.ftd_plugin.logout()
+
+        assert 1 == self.connection_mock.send.call_count
+        assert self.ftd_plugin.access_token is None
+
+    def test_logout_should_revoke_tokens_replaced_in_cache_by_another_connection(self):
+        cache_dir = self._enable_token_cache()
+        self.connection_mock.send.return_value = self._connection_response(
+            {'access_token': 'ACCESS_TOKEN', 'refresh_token': 'REFRESH_TOKEN'})
+        self.ftd_plugin.login('foo', 'bar')
+        plugin = self._new_plugin_with_token_cache(cache_dir)
+        plugin.connection.send.return_value = self._connection_response(
+            {'access_token': 'OTHER_ACCESS_TOKEN', 'refresh_token': 'OTHER_REFRESH_TOKEN'})
+        plugin.refresh_token = 'REFRESH_TOKEN'
+        plugin.login('foo', 'bar')
+
+        self.ftd_plugin.logout()
+
+        expected_body = json.dumps({'grant_type': 'revoke_token', 'access_token': 'ACCESS_TOKEN',
+                                    'token_to_revoke': 'REFRESH_TOKEN'})
+        self.connection_mock.send.assert_called_with(mock.ANY, expected_body, headers=mock.ANY, method=mock.ANY)
+
+    def _login_with_expiring_tokens(self, time_mock, expires_in=1800):
+        time_mock.time.return_value = 1000
+        self.connection_mock.send.return_value = self._connection_response({
+            'access_token': 'ACCESS_TOKEN', 'refresh_token': 'REFRESH_TOKEN', 'expires_in': expires_in,
+            'refresh_expires_in': 2400
+        })
+        self.ftd_plugin.login('foo', 'bar')
+        self.connection_mock.get_option.side_effect = lambda name: {'remote_user': 'foo', 'password': 'bar'}[name]
+        self.connection_mock.send.return_value = self._connection_response({
+            'access_token': 'NEW_ACCESS_TOKEN', 'refresh_token': 'NEW_REFRESH_TOKEN', 'expires_in': expires_in
+        })
+
+    @patch('httpapi_plugins.ftd.time')
+    def test_send_request_should_not_refresh_token_long_before_expiry(self, time_mock):
+        self._login_with_expiring_tokens(time_mock)
+        time_mock.time.return_value = 1000 + 1800 - 61
+
+        self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+
+        assert 'ACCESS_TOKEN' == self.ftd_plugin.access_token
+        assert 2 == self.connection_mock.send.call_count
+
+    @patch('httpapi_plugins.ftd.time')
+    def test_send_request_should_refresh_token_in_background_ahead_of_expiry(self, time_mock):
+        self._login_with_expiring_tokens(time_mock)
+        time_mock.time.return_value = 1000 + 1800 - 30
+
+        self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+        self.ftd_plugin._token_refresh_thread.join()
+
+        assert 'NEW_ACCESS_TOKEN' == self.ftd_plugin.access_token
+        refresh_body = json.dumps({'grant_type': 'refresh_token', 'refresh_token': 'REFRESH_TOKEN'})
+        self.connection_mock.send.assert_any_call(mock.ANY, refresh_body, headers=mock.ANY, method=HTTPMethod.POST)
+        assert 3 == self.connection_mock.send.call_count
+
+    @patch('httpapi_plugins.ftd.time')
+    def test_send_request_should_refresh_expiring_token_before_request_only_once(self, time_mock):
+        self._login_with_expiring_tokens(time_mock)
+        time_mock.time.return_value = 1000 + 1800
+
+        self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+        self.ftd_plugin._refresh_token(1000 + 1800)
+
+        assert 'NEW_ACCESS_TOKEN' == self.ftd_plugin.access_token
+        assert {'Authorization': 'Bearer NEW_ACCESS_TOKEN'} == self.connection_mock._auth
+        assert self.ftd_plugin._token_refresh_thread is None
+        assert 3 == self.connection_mock.send.call_count
+
+    @patch('httpapi_plugins.ftd.time')
+    def test_token_refresh_should_request_new_tokens_when_refresh_token_expired(self, time_mock):
+        self._login_with_expiring_tokens(time_mock)
+        time_mock.time.return_value = 1000 + 2400
+
+        self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+
+        password_body = json.dumps({'grant_type': 'password', 'username': 'foo', 'password': 'bar'})
+        self.connection_mock.send.assert_any_call(mock.ANY, password_body, headers=mock.ANY, method=HTTPMethod.POST)
+        assert 'NEW_REFRESH_TOKEN' == self.ftd_plugin.refresh_token
+
     def test_send_request_should_send_correct_request(self):
         exp_resp = {'id': '123', 'name': 'foo'}
         self.connection_mock.send.return_value = self._connection_response(exp_resp)
@@ -165,6 +340,120 @@ class TestFtdHttpApi(unittest.TestCase):
         assert {ResponseParams.SUCCESS: False, ResponseParams.STATUS_CODE: 500,
                 ResponseParams.RESPONSE: {'errorMessage': 'ERROR'}} == resp
 
+    @patch('module_utils.retry.time')
+    def test_send_request_should_retry_when_device_is_overloaded(self, time_mock):
+        self.ftd_plugin.hostvars['retries'] = 3
+        self.connection_mock.send.side_effect = [
+            HTTPError('http://testhost.com', 503, '', {'Retry-After': '2'}, StringIO('')),
+            AnsibleConnectionFailure('Connection reset by peer'),
+            self._connection_response({'id': '123'})
+        ]
+
+        resp = self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+
+        assert {'id': '123'} == resp[ResponseParams.RESPONSE]
+        assert 2 == resp[ResponseParams.RETRIES]
+        assert 2 <= resp[ResponseParams.RETRY_DELAY] <= 4
+        assert 3 == self.connection_mock.send.call_count
+        assert 2 == time_mock.sleep.call_count
+
+    @patch('module_utils.retry.time')
+    def test_send_request_should_return_error_when_retries_are_exhausted(self, time_mock):
+        self.ftd_plugin.hostvars['retries'] = 1
+        self.connection_mock.send.side_effect = [
+            HTTPError('http://testhost.com', 429, '', {}, StringIO('{"errorMessage": "ERROR"}')) for dummy in range(2)
+        ]
+
+        resp = self.ftd_plugin.send_request('/test', HTTPMethod.DELETE)
+
+        assert not resp[ResponseParams.SUCCESS]
+        assert 429 == resp[ResponseParams.STATUS_CODE]
+        assert 1 == resp[ResponseParams.RETRIES]
+        assert 2 == self.connection_mock.send.call_count
+
+    @patch('module_utils.retry.time')
+    def test_send_request_should_not_retry_post_requests_by_default(self, time_mock):
+        self.ftd_plugin.hostvars['retries'] = 3
+        self.connection_mock.send.side_effect = HTTPError('http://testhost.com', 503, '', {}, StringIO(''))
+
+        resp = self.ftd_plugin.send_request('/test', HTTPMethod.POST, body_params={'name': 'foo'})
+
+        assert {ResponseParams.SUCCESS: False, ResponseParams.STATUS_CODE: 503, ResponseParams.RESPONSE: {}} == resp
+        time_mock.sleep.assert_not_called()
+
+    @patch('module_utils.retry.time')
+    def test_send_request_should_stop_retrying_when_retry_budget_is_spent(self, time_mock):
+        self.ftd_plugin.hostvars['retries'] = 3
+        self.ftd_plugin.hostvars['retry_budget'] = 2
+        self.connection_mock.send.side_effect = AnsibleConnectionFailure('Connection refused')
+
+        for expected_call_count in [3, 4]:
+            with self.assertRaises(AnsibleConnectionFailure):
+                self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+            assert expected_call_count == self.connection_mock.send.call_count
+
+    def test_send_request_should_serve_not_modified_responses_from_cache(self):
+        self.ftd_plugin.hostvars['response_cache_size'] = 10
+        exp_resp = {'id': '123', 'version': 'abc'}
+        first_response = self._connection_response(exp_resp)
+        first_response[0].info.return_value = {'ETag': 'W/"etag"'}
+        self.connection_mock.send.side_effect = [
+            first_response,
+            HTTPError('http://testhost.com', 304, '', {}, StringIO(''))
+        ]
+
+        first_resp = self.ftd_plugin.send_request('/test/{objId}', HTTPMethod.GET, path_params={'objId': '123'})
+        second_resp = self.ftd_plugin.send_request('/test/{objId}', HTTPMethod.GET, path_params={'objId': '123'})
+
+        assert first_resp == second_resp
+        assert {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+                ResponseParams.RESPONSE: exp_resp} == second_resp
+        conditional_headers = dict(BASE_HEADERS)
+        conditional_headers['If-None-Match'] = 'W/"etag"'
+        self.connection_mock.send.assert_has_calls([
+            mock.call('/test/123', None, method=HTTPMethod.GET, headers=BASE_HEADERS),
+            mock.call('/test/123', None, method=HTTPMethod.GET, headers=conditional_headers)
+        ])
+
+    def test_send_request_should_use_object_version_as_validator_when_there_is_no_etag(self):
+        self.ftd_plugin.hostvars['response_cache_size'] = 10
+        first_response = self._connection_response({'id': '123', 'version': 'abc'})
+        first_response[0].info.return_value = {}
+        second_response = self._connection_response({'id': '123', 'version': 'def'})
+        second_response[0].info.return_value = {}
+        self.connection_mock.send.side_effect = [first_response, second_response]
+
+        self.ftd_plugin.send_request('/test/123', HTTPMethod.GET)
+        resp = self.ftd_plugin.send_request('/test/123', HTTPMethod.GET)
+
+        assert {'id': '123', 'version': 'def'} == resp[ResponseParams.RESPONSE]
+        assert '"abc"' == self.connection_mock.send.call_args[1]['headers']['If-None-Match']
+
+    def test_send_request_should_drop_cached_response_when_object_is_changed(self):
+        self.ftd_plugin.hostvars['response_cache_size'] = 10
+        get_response = self._connection_response({'id': '123', 'version': 'abc'})
+        get_response[0].info.return_value = {}
+        self.connection_mock.send.side_effect = [
+            get_response,
+            self._connection_response({'id': '123', 'version': 'def'}),
+            HTTPError('http://testhost.com', 404, '', {}, StringIO(''))
+        ]
+
+        self.ftd_plugin.send_request('/test/123', HTTPMethod.GET)
+        self.ftd_plugin.send_request('/test/123', HTTPMethod.PUT, body_params={'id': '123'})
+        resp = self.ftd_plugin.send_request('/test/123', HTTPMethod.GET)
+
+        assert 404 == resp[ResponseParams.STATUS_CODE]
+        self.connection_mock.send.assert_called_with('/test/123', None, method=HTTPMethod.GET, headers=BASE_HEADERS)
+
+    def test_send_request_should_return_not_modified_error_when_response_is_not_cached(self):
+        self.ftd_plugin.hostvars['response_cache_size'] = 10
+        self.connection_mock.send.side_effect = HTTPError('http://testhost.com', 304, '', {}, StringIO(''))
+
+        resp = self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+
+        assert {ResponseParams.SUCCESS: False, ResponseParams.STATUS_CODE: 304, ResponseParams.RESPONSE: {}} == resp
+
     def test_send_request_raises_exception_when_invalid_response(self):
         self.connection_mock.send.return_value = self._connection_response('nonValidJson')
 
@@ -192,60 +481,254 @@ class TestFtdHttpApi(unittest.TestCase):
         self.ftd_plugin._ignore_http_errors = True
         assert not self.ftd_plugin.handle_httperror(HTTPError('http://testhost.com', 401, '', {}, None))
 
-    @patch('os.path.isdir', mock.Mock(return_value=False))
-    def test_download_file(self):
-        self.connection_mock.send.return_value = self._connection_response('File content')
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file(self, open_url_mock):
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = {'Authorization': 'Bearer ACCESS_TOKEN'}
+        self.connection_mock.get_option.side_effect = lambda name: {'validate_certs': False, 'timeout': 30}[name]
+        open_url_mock.return_value = self._stream_response(b'File content')
+        download_dir = self._make_temp_dir()
+        to_path = os.path.join(download_dir, 'test.txt')
 
-        open_mock = mock_open()
-        with patch('%s.open' % BUILTINS_NAME, open_mock):
-            self.ftd_plugin.download_file('/files/1', '/tmp/test.txt')
+        self.ftd_plugin.download_file('/files/1', to_path)
 
-        open_mock.assert_called_once_with('/tmp/test.txt', 'wb')
-        open_mock().write.assert_called_once_with(b'File content')
+        with open(to_path, 'rb') as f:
+            assert b'File content' == f.read()
+        assert ['test.txt'] == os.listdir(download_dir)
+        exp_headers = dict(BASE_HEADERS)
+        exp_headers['Authorization'] = 'Bearer ACCESS_TOKEN'
+        open_url_mock.assert_called_once_with('https://testhost.com/files/1', method=HTTPMethod.GET,
+                                              headers=exp_headers, timeout=30, validate_certs=False)
+        open_url_mock.return_value.close.assert_called_once_with()
 
-    @patch('os.path.isdir', mock.Mock(return_value=True))
-    def test_download_file_should_extract_filename_from_headers(self):
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file_should_extract_filename_from_headers(self, open_url_mock):
         filename = 'test_file.txt'
-        response = mock.Mock()
-        response.info.return_value = {'Content-Disposition': 'attachment; filename="%s"' % filename}
-        dummy, response_data = self._connection_response('File content')
-        self.connection_mock.send.return_value = response, response_data
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        response = self._stream_response(b'File content',
+                                         {'Content-Disposition': 'attachment; filename="%s"' % filename})
+        open_url_mock.return_value = response
+        download_dir = self._make_temp_dir()
+
+        self.ftd_plugin.download_file('/files/1', download_dir)
+
+        with open(os.path.join(download_dir, filename), 'rb') as f:
+            assert b'File content' == f.read()
+
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file_should_keep_existing_file_when_download_fails(self, open_url_mock):
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        response = self._stream_response(b'File content')
+        response.read.side_effect = [b'File', IOError('Connection reset')]
+        open_url_mock.return_value = response
+        download_dir = self._make_temp_dir()
+        to_path = os.path.join(download_dir, 'test.txt')
+        with open(to_path, 'wb') as f:
+            f.write(b'Old content')
+
+        self.assertRaises(IOError, self.ftd_plugin.download_file, '/files/1', to_path)
+
+        with open(to_path, 'rb') as f:
+            assert b'Old content' == f.read()
+        assert ['test.txt'] == os.listdir(download_dir)
+        response.close.assert_called_once_with()
+
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file_should_refresh_token_and_retry_on_auth_errors(self, open_url_mock):
+        self.ftd_plugin.refresh_token = 'REFRESH_TOKEN'
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = {'Authorization': 'Bearer OLD_TOKEN'}
+        self.connection_mock.send.return_value = self._connection_response(
+            {'access_token': 'NEW_TOKEN', 'refresh_token': 'NEW_REFRESH_TOKEN'}
+        )
+        open_url_mock.side_effect = [
+            HTTPError('https://testhost.com/files/1', 401, '', {}, StringIO('')),
+            self._stream_response(b'File content')
+        ]
+        to_path = os.path.join(self._make_temp_dir(), 'test.txt')
+
+        self.ftd_plugin.download_file('/files/1', to_path)
+
+        with open(to_path, 'rb') as f:
+            assert b'File content' == f.read()
+        assert 'Bearer NEW_TOKEN' == open_url_mock.call_args[1]['headers']['Authorization']
+
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file_should_skip_download_when_file_not_modified(self, open_url_mock):
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        to_path = os.path.join(self._make_temp_dir(), 'test.txt')
+        open_url_mock.return_value = self._stream_response(b'File content', {'ETag': '"1"', 'Content-Length': '12'})
+        self.ftd_plugin.download_file('/files/1', to_path)
+
+        open_url_mock.side_effect = HTTPError('https://testhost.com/files/1', 304, '', {}, StringIO(''))
+        self.ftd_plugin.download_file('/files/1', to_path)
+
+        assert '"1"' == open_url_mock.call_args[1]['headers']['If-None-Match']
+        with open(to_path, 'rb') as f:
+            assert b'File content' == f.read()
+
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file_should_not_read_body_when_response_headers_match_local_file(self, open_url_mock):
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        download_dir = self._make_temp_dir()
+        headers = {'Content-Disposition': 'attachment; filename="test.txt"', 'ETag': '"1"', 'Content-Length': '12'}
+        open_url_mock.return_value = self._stream_response(b'File content', headers)
+        self.ftd_plugin.download_file('/files/1', download_dir)
+
+        response = self._stream_response(b'File content', headers)
+        open_url_mock.return_value = response
+        self.ftd_plugin.download_file('/files/1', download_dir)
+
+        response.read.assert_not_called()
+        response.close.assert_called_once_with()
+
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_file_should_restart_download_when_range_not_satisfiable(self, open_url_mock):
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        download_dir = self._make_temp_dir()
+        to_path = os.path.join(download_dir, 'test.txt')
+        with open(os.path.join(download_dir, '.test.txt.part'), 'wb') as f:
+            f.write(b'File content that is too long')
+        with open(os.path.join(download_dir, '.test.txt.download.json'), 'w') as f:
+            json.dump({'partial': {'etag': '"1"'}}, f)
+        open_url_mock.side_effect = [
+            HTTPError('https://testhost.com/files/1', 416, '', {}, StringIO('')),
+            self._stream_response(b'File content')
+        ]
+
+        self.ftd_plugin.download_file('/files/1', to_path)
+
+        assert 'bytes=29-' == open_url_mock.call_args_list[0][1]['headers']['Range']
+        assert 'Range' not in open_url_mock.call_args_list[1][1]['headers']
+        with open(to_path, 'rb') as f:
+            assert b'File content' == f.read()
+
+    def test_upload_files_should_upload_concurrently_and_return_result_per_file(self):
+        uploading = threading.Barrier(2) if hasattr(threading, 'Barrier') else None
+
+        def upload_file(from_path, to_url):
+            if uploading:
+                uploading.wait(timeout=5)
+            if from_path == '/tmp/broken.txt':
+                raise IOError('No such file')
+            return {'id': from_path}
+
+        with patch.object(self.ftd_plugin, 'upload_file', side_effect=upload_file):
+            results = self.ftd_plugin.upload_files([
+                {'from_path': '/tmp/test1.txt', 'to_url': '/files'},
+                {'from_path': '/tmp/broken.txt', 'to_url': '/files'}
+            ], 2)
+
+        assert [
+            {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: {'id': '/tmp/test1.txt'}},
+            {ResponseParams.SUCCESS: False, ResponseParams.RESPONSE: 'No such file'}
+        ] == results
+
+    @patch('httpapi_plugins.ftd.open_url')
+    def test_download_files_should_return_result_per_file(self, open_url_mock):
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        download_dir = self._make_temp_dir()
+        open_url_mock.side_effect = lambda url, **kwargs: self._stream_response(url.encode())
+
+        results = self.ftd_plugin.download_files([
+            {'from_url': '/files/{objId}', 'to_path': os.path.join(download_dir, '1.txt'),
+             'path_params': {'objId': '1'}},
+            {'from_url': '/files/{objId}', 'to_path': os.path.join(download_dir, '2.txt'),
+             'path_params': {'objId': '2'}}
+        ], 4)
+
+        assert [
+            {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: {'destination': os.path.join(download_dir, '1.txt'),
+                                                                     'downloaded': True}},
+            {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: {'destination': os.path.join(download_dir, '2.txt'),
+                                                                     'downloaded': True}}
+        ] == results
+        with open(os.path.join(download_dir, '2.txt'), 'rb') as f:
+            assert b'https://testhost.com/files/2' == f.read()
+
+    def test_request_body_should_be_kept_per_thread(self):
+        self.ftd_plugin._request_body = 'BODY'
+        bodies = []
+
+        thread = threading.Thread(target=lambda: bodies.append(self.ftd_plugin._request_body))
+        thread.start()
+        thread.join()
+
+        assert [None] == bodies
+        assert 'BODY' == self.ftd_plugin._request_body
+
+    @patch('httpapi_plugins.ftd.PooledHttpTransport')
+    def test_download_file_should_use_pooled_transport_when_keep_alive_enabled(self, transport_class_mock):
+        self.ftd_plugin.hostvars['keep_alive'] = True
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        transport = transport_class_mock.return_value
+        transport.open.return_value = self._stream_response(b'File content')
+        to_path = os.path.join(self._make_temp_dir(), 'test.txt')
+
+        self.ftd_plugin.download_file('/files/1', to_path)
+
+        with open(to_path, 'rb') as f:
+            assert b'File content' == f.read()
+        transport.open.assert_called_once_with('/files/1', method=HTTPMethod.GET, headers=BASE_HEADERS)
+        transport.open.return_value.close.assert_called_once_with()
 
-        open_mock = mock_open()
-        with patch('%s.open' % BUILTINS_NAME, open_mock):
-            self.ftd_plugin.download_file('/files/1', '/tmp/')
+    def test_upload_file(self):
+        sent_bodies = []
 
-        open_mock.assert_called_once_with('/tmp/%s' % filename, 'wb')
-        open_mock().write.assert_called_once_with(b'File content')
+        def send(url, data, method, headers):
+            sent_bodies.append(self._read_body(data))
+            return self._connection_response({'id': '123'})
 
-    @patch('os.path.basename', mock.Mock(return_value='test.txt'))
-    @patch('httpapi_plugins.ftd.encode_multipart_formdata',
-           mock.Mock(return_value=('--Encoded data--', 'multipart/form-data')))
-    def test_upload_file(self):
-        self.connection_mock.send.return_value = self._connection_response({'id': '123'})
+        self.connection_mock.send.side_effect = send
 
-        open_mock = mock_open()
-        with patch('%s.open' % BUILTINS_NAME, open_mock):
-            resp = self.ftd_plugin.upload_file('/tmp/test.txt', '/files')
+        with tempfile.NamedTemporaryFile(suffix='test.txt') as src_file:
+            src_file.write(b'file content')
+            src_file.flush()
+            resp = self.ftd_plugin.upload_file(src_file.name, '/files')
 
         assert {'id': '123'} == resp
-        exp_headers = dict(BASE_HEADERS)
-        exp_headers['Content-Length'] = len('--Encoded data--')
-        exp_headers['Content-Type'] = 'multipart/form-data'
-        self.connection_mock.send.assert_called_once_with('/files', data='--Encoded data--',
-                                                          headers=exp_headers, method=HTTPMethod.POST)
-        open_mock.assert_called_once_with('/tmp/test.txt', 'rb')
-
-    @patch('os.path.basename', mock.Mock(return_value='test.txt'))
-    @patch('httpapi_plugins.ftd.encode_multipart_formdata',
-           mock.Mock(return_value=('--Encoded data--', 'multipart/form-data')))
+        self.connection_mock.send.assert_called_once_with('/files', data=mock.ANY, headers=mock.ANY,
+                                                          method=HTTPMethod.POST)
+        headers = self.connection_mock.send.call_args[1]['headers']
+        assert headers['Content-Type'].startswith('multipart/form-data; boundary=')
+        assert len(sent_bodies[0]) == headers['Content-Length']
+        assert b'name="fileToUpload"; filename="%s"' % os.path.basename(src_file.name).encode() in sent_bodies[0]
+        assert b'\r\n\r\nfile content\r\n' in sent_bodies[0]
+
+    def test_upload_file_should_send_the_whole_body_again_when_retried_after_token_refresh(self):
+        sent_bodies = []
+
+        def send(url, data, method, headers):
+            sent_bodies.append(self._read_body(data))
+            if len(sent_bodies) == 1:
+                self.ftd_plugin.handle_httperror(HTTPError('http://testhost.com', 401, '', {}, None))
+                return send(url, data, method, headers)
+            return self._connection_response({'id': '123'})
+
+        self.connection_mock.send.side_effect = send
+
+        with tempfile.NamedTemporaryFile() as src_file:
+            src_file.write(b'file content')
+            src_file.flush()
+            with patch.object(self.ftd_plugin, 'login'):
+                self.ftd_plugin.upload_file(src_file.name, '/files')
+
+        assert 2 == len(sent_bodies)
+        assert sent_bodies[0] == sent_bodies[1]
+
     def test_upload_file_raises_exception_when_invalid_response(self):
         self.connection_mock.send.return_value = self._connection_response('invalidJsonResponse')
 
-        open_mock = mock_open()
-        with patch('%s.open' % BUILTINS_NAME, open_mock):
+        with tempfile.NamedTemporaryFile() as src_file:
             with self.assertRaises(ConnectionError) as res:
-                self.ftd_plugin.upload_file('/tmp/test.txt', '/files')
+                self.ftd_plugin.upload_file(src_file.name, '/files')
 
         assert 'Invalid JSON response' in str(res.exception)
 
@@ -307,6 +790,178 @@ class TestFtdHttpApi(unittest.TestCase):
 
         assert self.ftd_plugin.get_operation_specs_by_model_name('nonExistingOperation') is None
 
+    @patch('httpapi_plugins.ftd.SpecCache')
+    def test_api_spec_should_use_cached_spec_when_not_modified(self, spec_cache_class_mock):
+        self.ftd_plugin.hostvars['spec_cache_dir'] = '/tmp/spec_cache'
+        spec_cache = spec_cache_class_mock.return_value
+        spec_cache.get_validators.return_value = {'etag': '"123"'}
+        spec_cache.get_latest.return_value = {SpecProp.OPERATIONS: {'testOp': 'Specification for testOp'}}
+        self.connection_mock.send.side_effect = HTTPError('http://testhost.com', 304, '', {}, StringIO(''))
+
+        assert 'Specification for testOp' == self.ftd_plugin.get_operation_spec('testOp')
+
+        spec_cache_class_mock.assert_called_once_with('/tmp/spec_cache', 1024)
+        exp_headers = dict(BASE_HEADERS)
+        exp_headers['If-None-Match'] = '"123"'
+        self.connection_mock.send.assert_called_once_with('/testSpecUrl', None, method=HTTPMethod.GET,
+                                                          headers=exp_headers)
+        spec_cache.put.assert_not_called()
+
+    @patch('httpapi_plugins.ftd.SpecCache')
+    @patch.object(FdmSwaggerParser, 'parse_spec')
+    def test_api_spec_should_download_spec_again_when_not_modified_spec_is_not_cached(self, parse_spec_mock,
+                                                                                      spec_cache_class_mock):
+        self.ftd_plugin.hostvars['spec_cache_dir'] = '/tmp/spec_cache'
+        spec_cache = spec_cache_class_mock.return_value
+        spec_cache.get_validators.return_value = {'etag': '"123"', 'last_modified': 'Mon, 01 Oct 2018 10:00:00 GMT'}
+        spec_cache.get_latest.return_value = None
+        spec_cache.get.return_value = None
+        parse_spec_mock.return_value = {SpecProp.OPERATIONS: {'testOp': 'Specification for testOp'}}
+        response, response_data = self._connection_response({'info': {'version': '2.0.0'}, 'paths': {}})
+        response.info.return_value = {'ETag': '"123"'}
+        self.connection_mock.send.side_effect = [
+            HTTPError('http://testhost.com', 304, '', {}, StringIO('')),
+            (response, response_data)
+        ]
+
+        assert 'Specification for testOp' == self.ftd_plugin.get_operation_spec('testOp')
+
+        self.connection_mock.send.assert_called_with('/testSpecUrl', None, method=HTTPMethod.GET,
+                                                     headers=BASE_HEADERS)
+        assert 2 == self.connection_mock.send.call_count
+        spec_cache.put.assert_called_once_with(self.connection_mock._url, '2.0.0', mock.ANY,
+                                               parse_spec_mock.return_value, etag='"123"', last_modified=None)
+
+    @patch('httpapi_plugins.ftd.SpecCache')
+    @patch.object(FdmSwaggerParser, 'parse_spec')
+    def test_api_spec_should_parse_and_cache_spec_when_modified(self, parse_spec_mock, spec_cache_class_mock):
+        self.ftd_plugin.hostvars['spec_cache_dir'] = '/tmp/spec_cache'
+        spec_cache = spec_cache_class_mock.return_value
+        spec_cache.get_validators.return_value = {}
+        spec_cache.get.return_value = None
+        parse_spec_mock.return_value = {SpecProp.OPERATIONS: {'testOp': 'Specification for testOp'}}
+        response, response_data = self._connection_response({'info': {'version': '2.0.0'}, 'paths': {}})
+        response.info.return_value = {'ETag': '"456"'}
+        self.connection_mock.send.return_value = response, response_data
+
+        assert 'Specification for testOp' == self.ftd_plugin.get_operation_spec('testOp')
+
+        parse_spec_mock.assert_called_once_with({'info': {'version': '2.0.0'}, 'paths': {}})
+        spec_cache.put.assert_called_once_with(self.connection_mock._url, '2.0.0', mock.ANY,
+                                               parse_spec_mock.return_value, etag='"456"', last_modified=None)
+
+    @patch('httpapi_plugins.ftd.SpecCache')
+    @patch.object(FdmSwaggerParser, 'parse_spec')
+    def test_api_spec_should_not_parse_spec_when_content_is_cached(self, parse_spec_mock, spec_cache_class_mock):
+        self.ftd_plugin.hostvars['spec_cache_dir'] = '/tmp/spec_cache'
+        spec_cache = spec_cache_class_mock.return_value
+        spec_cache.get_validators.return_value = {}
+        spec_cache.get.return_value = {SpecProp.OPERATIONS: {'testOp': 'Specification for testOp'}}
+        response, response_data = self._connection_response({'info': {'version': '2.0.0'}, 'paths': {}})
+        response.info.return_value = {}
+        self.connection_mock.send.return_value = response, response_data
+
+        assert 'Specification for testOp' == self.ftd_plugin.get_operation_spec('testOp')
+
+        parse_spec_mock.assert_not_called()
+
+    @patch('httpapi_plugins.ftd.execute_operation_in_connection')
+    def test_execute_operation_should_run_operation_in_connection(self, execute_operation_mock):
+        execute_operation_mock.return_value = {'success': True, 'response': {'id': '123'}, 'config_changed': True}
+
+        result = self.ftd_plugin.execute_operation('addNetworkObject', {'data': {'name': 'foo'}}, True)
+
+        assert execute_operation_mock.return_value == result
+        execute_operation_mock.assert_called_once_with(self.ftd_plugin, 'addNetworkObject',
+                                                       {'data': {'name': 'foo'}}, True,
+                                                       page_size_limits=self.ftd_plugin._page_size_limits,
+                                                       page_prefetch_workers=1,
+                                                       object_index=self.ftd_plugin._object_index,
+                                                       upsert_strategy='add_first',
+                                                       upsert_statistics=self.ftd_plugin._upsert_statistics)
+
+    @patch('httpapi_plugins.ftd.PooledHttpTransport')
+    def test_send_request_should_use_pooled_transport_when_keep_alive_enabled(self, transport_class_mock):
+        self.ftd_plugin.hostvars['keep_alive'] = True
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = {'Authorization': 'Bearer ACCESS_TOKEN'}
+        self.connection_mock.get_option.side_effect = lambda name: {'validate_certs': False, 'timeout': 30}[name]
+        transport = transport_class_mock.return_value
+        transport.send.return_value = self._connection_response({'id': '123'})
+
+        self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+        resp = self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+
+        assert {ResponseParams.SUCCESS: True, ResponseParams.STATUS_CODE: 200,
+                ResponseParams.RESPONSE: {'id': '123'}} == resp
+        transport_class_mock.assert_called_once_with('https://testhost.com', pool_size=4, validate_certs=False,
+                                                     timeout=30)
+        exp_headers = dict(BASE_HEADERS)
+        exp_headers['Authorization'] = 'Bearer ACCESS_TOKEN'
+        transport.send.assert_called_with('/test', None, method=HTTPMethod.GET, headers=exp_headers)
+        self.connection_mock.send.assert_not_called()
+
+    @patch('httpapi_plugins.ftd.PooledHttpTransport')
+    def test_pooled_transport_should_refresh_token_and_retry_on_auth_errors(self, transport_class_mock):
+        self.ftd_plugin.hostvars['keep_alive'] = True
+        self.ftd_plugin.refresh_token = 'REFRESH_TOKEN'
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = {'Authorization': 'Bearer OLD_TOKEN'}
+        transport = transport_class_mock.return_value
+        transport.send.side_effect = [
+            HTTPError('https://testhost.com/test', 401, '', {}, StringIO('')),
+            self._connection_response({'access_token': 'NEW_TOKEN', 'refresh_token': 'NEW_REFRESH_TOKEN'}),
+            self._connection_response({'id': '123'})
+        ]
+
+        resp = self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+
+        assert {'id': '123'} == resp[ResponseParams.RESPONSE]
+        assert 'NEW_TOKEN' == self.ftd_plugin.access_token
+        last_call_headers = transport.send.call_args[1]['headers']
+        assert 'Bearer NEW_TOKEN' == last_call_headers['Authorization']
+
+    @patch('httpapi_plugins.ftd.PooledHttpTransport')
+    def test_pooled_transport_should_raise_connection_failure_when_device_unreachable(self, transport_class_mock):
+        self.ftd_plugin.hostvars['keep_alive'] = True
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        transport_class_mock.return_value.send.side_effect = URLError('Connection refused')
+
+        with self.assertRaises(AnsibleConnectionFailure) as res:
+            self.ftd_plugin.send_request('/test', HTTPMethod.GET)
+        assert 'Could not connect to https://testhost.com/test: Connection refused' == str(res.exception)
+
+    @patch('httpapi_plugins.ftd.PooledHttpTransport')
+    def test_logout_should_close_pooled_transport(self, transport_class_mock):
+        self.ftd_plugin.hostvars['keep_alive'] = True
+        self.connection_mock._url = 'https://testhost.com'
+        self.connection_mock._auth = None
+        transport = transport_class_mock.return_value
+        transport.send.return_value = self._connection_response(None)
+
+        self.ftd_plugin.logout()
+
+        transport.close.assert_called_once_with()
+        assert self.ftd_plugin._transport is None
+
+    @staticmethod
+    def _stream_response(content, headers=None):
+        response_mock = mock.Mock()
+        response_mock.getcode.return_value = 200
+        response_mock.info.return_value = headers or {}
+        response_mock.read.side_effect = BytesIO(content).read
+        return response_mock
+
+    @staticmethod
+    def _read_body(body):
+        chunks = []
+        chunk = body.read(8192)
+        while chunk:
+            chunks.append(chunk)
+            chunk = body.read(8192)
+        return b''.join(chunks)
+
     @staticmethod
     def _connection_response(response, status=200):
         response_mock = mock.Mock()
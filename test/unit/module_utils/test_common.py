@@ -15,8 +15,24 @@
 # You should have received a copy of the GNU General Public License
 # along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
 #
+import os
 
-from module_utils.common import equal_objects
+import pytest
+
+from module_utils import common
+from module_utils.common import equal_objects, write_file_atomically, poll_until, PollTimeoutError, \
+    object_fingerprint, ObjectFingerprints
+
+
+@pytest.fixture(autouse=True)
+def check_fingerprints_agree_with_equal_objects(monkeypatch):
+    # every comparison made by the tests below also verifies that fingerprints give the same result
+    def checked_equal_objects(d1, d2, unordered_fields=None):
+        result = common.equal_objects(d1, d2, unordered_fields)
+        assert result == (object_fingerprint(d1, unordered_fields) == object_fingerprint(d2, unordered_fields))
+        return result
+
+    monkeypatch.setitem(globals(), 'equal_objects', checked_equal_objects)
 
 
 # simple objects
@@ -246,3 +262,91 @@ def test_equal_objects_return_true_with_equal_nested_list_of_object_references()
             }
         }
     )
+
+
+def test_equal_objects_should_ignore_order_of_references_in_unordered_fields():
+    refs = [{'id': '1', 'type': 'network'}, {'id': '2', 'type': 'network'}, {'id': '2', 'type': 'network'}]
+    reordered_refs = [{'id': '2', 'type': 'network', 'name': 'a'}, {'id': '1', 'type': 'network'},
+                      {'id': '2', 'type': 'network'}]
+
+    assert not equal_objects({'foo': refs}, {'foo': reordered_refs})
+    assert equal_objects({'foo': refs}, {'foo': reordered_refs}, unordered_fields=['foo'])
+    assert not equal_objects({'foo': refs}, {'foo': reordered_refs[:2]}, unordered_fields=['foo'])
+    assert not equal_objects({'foo': refs}, {'foo': [refs[0], refs[0], refs[1]]}, unordered_fields=['foo'])
+    assert not equal_objects({'foo': {'bar': refs}}, {'foo': {'bar': reordered_refs}}, unordered_fields=['foo'])
+
+
+def test_equal_objects_should_keep_order_of_values_other_than_references_in_unordered_fields():
+    assert not equal_objects({'foo': ['1', '2']}, {'foo': ['2', '1']}, unordered_fields=['foo'])
+    assert not equal_objects({'foo': [{'id': '1', 'type': 'network'}, {'id': '2'}]},
+                             {'foo': [{'id': '2'}, {'id': '1', 'type': 'network'}]}, unordered_fields=['foo'])
+
+
+def test_object_fingerprint_should_compare_refs_by_id_and_type_only():
+    assert object_fingerprint({'foo': {'id': '1', 'type': 'network', 'name': 'a'}}) == \
+        object_fingerprint({'foo': {'id': '1', 'type': 'network', 'version': '2'}})
+    assert object_fingerprint({'foo': {'id': '1', 'name': 'a'}}) != \
+        object_fingerprint({'foo': {'id': '1', 'name': 'a', 'type': ''}})
+
+
+def test_object_fingerprint_should_distinguish_value_types():
+    fingerprints = set(object_fingerprint({'foo': value}) for value in
+                       ['1', 1, 1.0, True, ['1'], {'1': '1'}, ('1',), {1: '1'}, {'o1': '1'}])
+
+    assert 9 == len(fingerprints)
+
+
+def test_object_fingerprints_should_compute_fingerprint_of_object_once(mocker):
+    fingerprint_mock = mocker.patch('module_utils.common.object_fingerprint',
+                                    side_effect=lambda obj, unordered_fields: obj['name'])
+    obj = {'name': 'foo'}
+    fingerprints = ObjectFingerprints()
+
+    assert fingerprints.equal(obj, {'name': 'foo'})
+    assert not fingerprints.equal(obj, {'name': 'bar'})
+    assert 3 == fingerprint_mock.call_count
+
+
+def test_write_file_atomically_should_replace_file_with_written_content(tmpdir):
+    path = str(tmpdir.join('file.txt'))
+    tmpdir.join('file.txt').write('old')
+
+    write_file_atomically(path, 'w', lambda f: f.write('new'), permissions=0o600)
+
+    assert 'new' == tmpdir.join('file.txt').read()
+    assert 0o600 == os.stat(path).st_mode & 0o777
+    assert ['file.txt'] == os.listdir(str(tmpdir))
+
+
+def test_write_file_atomically_should_remove_temporary_file_on_failure(tmpdir):
+    path = str(tmpdir.join('file.txt'))
+
+    def fail(f):
+        f.write('partial')
+        raise IOError('Write failed')
+
+    with pytest.raises(IOError):
+        write_file_atomically(path, 'w', fail)
+
+    assert [] == os.listdir(str(tmpdir))
+
+
+def test_poll_until_should_double_interval_up_to_max_and_raise_on_timeout(mocker):
+    time_mock = mocker.patch('module_utils.common.time')
+    clock = [0]
+    time_mock.time.side_effect = lambda: clock[0]
+    time_mock.sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+    poll = mocker.Mock(side_effect=range(100))
+
+    with pytest.raises(PollTimeoutError) as ex:
+        poll_until(poll, lambda result: False, timeout=20, poll_interval=1, max_poll_interval=8)
+
+    assert [1, 2, 4, 8, 5] == [call[0][0] for call in time_mock.sleep.call_args_list]
+    assert 5 == ex.value.last_result
+
+
+def test_poll_until_should_return_first_final_result(mocker):
+    time_mock = mocker.patch('module_utils.common.time')
+    time_mock.time.return_value = 0
+
+    assert 3 == poll_until(mocker.Mock(side_effect=[1, 2, 3, 4]), lambda result: result == 3, 10, 1, 1)
@@ -17,6 +17,8 @@
 #
 
 import json
+import threading
+import time
 import unittest
 
 import pytest
@@ -24,13 +26,14 @@ from ansible.compat.tests import mock
 from ansible.compat.tests.mock import call, patch
 
 from module_utils.configuration import iterate_over_pageable_resource, BaseConfigurationResource, \
-    OperationChecker, OperationNamePrefix, ParamName, QueryParams
+    OperationChecker, OperationNamePrefix, ParamName, QueryParams, RemoteConfigurationResource, \
+    execute_operation_in_connection, CheckModeException, FtdInvalidOperationNameError, PageSizeLimits
 
 try:
-    from ansible.module_utils.common import HTTPMethod, FtdUnexpectedResponse
+    from ansible.module_utils.common import HTTPMethod, FtdUnexpectedResponse, FtdServerError, FtdConfigurationError
     from ansible.module_utils.fdm_swagger_client import ValidationError, OperationField
 except ImportError:
-    from module_utils.common import HTTPMethod, FtdUnexpectedResponse
+    from module_utils.common import HTTPMethod, FtdUnexpectedResponse, FtdServerError, FtdConfigurationError
     from module_utils.fdm_swagger_client import ValidationError, OperationField
 
 
@@ -148,6 +151,19 @@ class TestBaseConfigurationResource(object):
             ]
         )
 
+    @patch.object(BaseConfigurationResource, '_send_request')
+    def test_get_objects_by_filter_should_use_adaptive_page_size(self, send_request_mock, connection_mock):
+        send_request_mock.return_value = {'items': [{'name': 'obj1'}], 'paging': {'count': 1}}
+        connection_mock.get_operation_spec.return_value = {
+            'method': HTTPMethod.GET,
+            'url': '/object/'
+        }
+        resource = BaseConfigurationResource(connection_mock, False, PageSizeLimits(initial_page_size=500))
+
+        assert [{'name': 'obj1'}] == list(resource.get_objects_by_filter('test', {ParamName.FILTERS: {'name': 'obj1'}}))
+        send_request_mock.assert_called_once_with('/object/', 'get', {}, {},
+                                                  {QueryParams.FILTER: 'name:obj1', 'limit': 500, 'offset': 0})
+
     def test_module_should_fail_if_validation_error_in_data(self, connection_mock):
         connection_mock.get_operation_spec.return_value = {'method': HTTPMethod.POST, 'url': '/test'}
         report = {
@@ -306,6 +322,67 @@ class TestBaseConfigurationResource(object):
                 'required': ['other_param']}}
 
 
+class TestRemoteExecution(object):
+
+    @patch.object(BaseConfigurationResource, 'execute_operation')
+    def test_execute_operation_in_connection_should_return_response(self, execute_operation_mock):
+        execute_operation_mock.return_value = {'id': '123'}
+        conn = mock.Mock()
+
+        result = execute_operation_in_connection(conn, 'addNetworkObject', {'data': {}}, False)
+
+        assert {'success': True, 'response': {'id': '123'}, 'config_changed': False} == result
+        execute_operation_mock.assert_called_once_with('addNetworkObject', {'data': {}})
+
+    @pytest.mark.parametrize('error', [
+        FtdInvalidOperationNameError('testOp'),
+        FtdConfigurationError('Config error', {'id': '123'}),
+        FtdServerError({'error': 'foo'}, 500),
+        FtdUnexpectedResponse('Unexpected response'),
+        ValidationError({'Invalid data provided': {'required': ['name']}}),
+        CheckModeException()
+    ])
+    def test_remote_execution_should_raise_the_same_errors(self, error):
+        with patch.object(BaseConfigurationResource, 'execute_operation', side_effect=error):
+            result = execute_operation_in_connection(mock.Mock(), 'testOp', {}, True)
+        json.dumps(result)
+        conn = mock.Mock()
+        conn.execute_operation.return_value = result
+        resource = RemoteConfigurationResource(conn, True)
+
+        with pytest.raises(type(error)) as ex:
+            resource.execute_operation('testOp', {})
+
+        assert error.args == ex.value.args
+        assert vars(error) == vars(ex.value)
+        conn.execute_operation.assert_called_once_with('testOp', {}, True)
+
+    def test_execute_operation_in_connection_should_not_serialize_unexpected_errors(self):
+        with patch.object(BaseConfigurationResource, 'execute_operation', side_effect=KeyError('foo')):
+            with pytest.raises(KeyError):
+                execute_operation_in_connection(mock.Mock(), 'testOp', {})
+
+    def test_remote_resource_should_report_config_changes(self):
+        conn = mock.Mock()
+        conn.execute_operation.return_value = {'success': True, 'response': {'id': '123'}, 'config_changed': True}
+        resource = RemoteConfigurationResource(conn)
+
+        assert {'id': '123'} == resource.execute_operation('addNetworkObject', {})
+        assert resource.config_changed
+
+    def test_execute_operation_in_connection_should_report_config_changes(self, mocker):
+        conn = mocker.Mock()
+        conn.get_operation_spec.return_value = {'method': HTTPMethod.POST, 'url': '/object/networks'}
+        conn.validate_data.return_value = True, None
+        conn.validate_query_params.return_value = True, None
+        conn.validate_path_params.return_value = True, None
+        conn.send_request.return_value = {'success': True, 'status_code': 200, 'response': {'id': '123'}}
+
+        result = execute_operation_in_connection(conn, 'runAction', {'data': {}})
+
+        assert {'success': True, 'response': {'id': '123'}, 'config_changed': True} == result
+
+
 class TestIterateOverPageableResource(object):
 
     def test_iterate_over_pageable_resource_with_no_items(self):
@@ -406,6 +483,203 @@ class TestIterateOverPageableResource(object):
             call(params={'query_params': {'offset': '1', 'limit': '1'}})
         ])
 
+    def test_adaptive_iteration_should_start_with_large_page_and_stop_by_paging_count(self):
+        resource_func = mock.Mock(side_effect=[
+            {'items': ['foo', 'bar'], 'paging': {'limit': 2, 'offset': 0, 'count': 3}},
+            {'items': ['buzz'], 'paging': {'limit': 2, 'offset': 2, 'count': 3}},
+        ])
+        limits = PageSizeLimits(initial_page_size=1000)
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList')
+
+        assert ['foo', 'bar', 'buzz'] == list(items)
+        resource_func.assert_has_calls([
+            call(params={'query_params': {'offset': 0, 'limit': 1000}}),
+            call(params={'query_params': {'offset': 2, 'limit': 2}})
+        ])
+        assert 2 == limits.get('getObjectList')
+        assert 1000 == limits.get('getOtherObjectList')
+
+    def test_adaptive_iteration_should_learn_limit_when_server_silently_returns_less_items(self):
+        resource_func = mock.Mock(side_effect=[
+            {'items': ['foo', 'bar'], 'paging': {'count': 5}},
+            {'items': ['buzz', 'qux'], 'paging': {'count': 5}},
+            {'items': ['quux'], 'paging': {'count': 5}},
+        ])
+        limits = PageSizeLimits(initial_page_size=100)
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList')
+
+        assert ['foo', 'bar', 'buzz', 'qux', 'quux'] == list(items)
+        assert 3 == resource_func.call_count
+        assert 2 == limits.get('getObjectList')
+
+    def test_adaptive_iteration_should_reduce_limit_when_server_rejects_it(self):
+        resource_func = mock.Mock(side_effect=[
+            FtdServerError({'error': 'Invalid limit'}, 422),
+            {'items': ['item%s' % i for i in range(10)], 'paging': {'count': 30}},
+            FtdServerError({'error': 'Invalid limit'}, 400),
+            {'items': ['item%s' % i for i in range(10, 30)], 'paging': {'count': 30}},
+        ])
+        limits = PageSizeLimits(initial_page_size=100)
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList')
+
+        assert ['item%s' % i for i in range(30)] == list(items)
+        resource_func.assert_has_calls([
+            call(params={'query_params': {'offset': 0, 'limit': 100}}),
+            call(params={'query_params': {'offset': 0, 'limit': 10}}),
+            call(params={'query_params': {'offset': 10, 'limit': 50}}),
+            call(params={'query_params': {'offset': 10, 'limit': 25}})
+        ])
+        assert 25 == limits.get('getObjectList')
+
+    def test_adaptive_iteration_should_not_learn_limit_when_page_is_rejected_for_another_reason(self):
+        original_error = FtdServerError({'error': 'Invalid filter'}, 400)
+        resource_func = mock.Mock(side_effect=[original_error, FtdServerError({'error': 'Invalid filter'}, 400)])
+        limits = PageSizeLimits(initial_page_size=100)
+
+        with pytest.raises(FtdServerError) as ex:
+            list(iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList'))
+
+        assert original_error is ex.value
+        assert 2 == resource_func.call_count
+        assert 100 == limits.get('getObjectList')
+
+    def test_adaptive_iteration_should_not_learn_limit_when_only_default_page_size_is_accepted(self):
+        resource_func = mock.Mock(side_effect=[
+            FtdServerError({'error': 'Invalid limit'}, 422),
+            {'items': ['foo'], 'paging': {'count': 1}},
+        ])
+        limits = PageSizeLimits(initial_page_size=100)
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList')
+
+        assert ['foo'] == list(items)
+        assert 100 == limits.get('getObjectList')
+
+    def test_adaptive_iteration_should_raise_error_when_default_page_size_is_rejected(self):
+        resource_func = mock.Mock(side_effect=FtdServerError({'error': 'Invalid limit'}, 422))
+        limits = PageSizeLimits(initial_page_size=10)
+
+        with pytest.raises(FtdServerError):
+            list(iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList'))
+        resource_func.assert_called_once_with(params={'query_params': {'offset': 0, 'limit': 10}})
+
+    def test_adaptive_iteration_should_use_learned_limit_and_stop_without_paging(self):
+        resource_func = mock.Mock(side_effect=[
+            {'items': ['foo', 'bar']},
+            {'items': ['buzz']},
+        ])
+        limits = PageSizeLimits()
+        limits.reduce('getObjectList', 2)
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {}}, limits, 'getObjectList')
+
+        assert ['foo', 'bar', 'buzz'] == list(items)
+        resource_func.assert_has_calls([
+            call(params={'query_params': {'offset': 0, 'limit': 2}}),
+            call(params={'query_params': {'offset': 2, 'limit': 2}})
+        ])
+
+    def test_adaptive_iteration_should_preserve_user_defined_limit(self):
+        resource_func = mock.Mock(return_value={'items': []})
+
+        items = iterate_over_pageable_resource(resource_func, {'query_params': {'limit': 5}}, PageSizeLimits(),
+                                               'getObjectList')
+
+        assert [] == list(items)
+        resource_func.assert_called_once_with(params={'query_params': {'offset': 0, 'limit': 5}})
+
+
+class FakePageableResource(object):
+    """
+    Serves pages of `objects` the same way FTD does. `on_request` is called with the request number and can modify
+    the objects to simulate changes made by other clients during the iteration.
+    """
+
+    def __init__(self, objects, on_request=None):
+        self.objects = objects
+        self.on_request = on_request
+        self.requested_offsets = []
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, params):
+        with self._lock:
+            self.requested_offsets.append(params['query_params']['offset'])
+            if self.on_request:
+                self.on_request(len(self.requested_offsets))
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests, self._concurrent_requests)
+            offset, limit = int(params['query_params']['offset']), int(params['query_params']['limit'])
+            page = {'items': self.objects[offset:offset + limit],
+                    'paging': {'limit': limit, 'offset': offset, 'count': len(self.objects)}}
+        time.sleep(0.001)
+        with self._lock:
+            self._concurrent_requests -= 1
+        return page
+
+
+class TestPagePrefetch(object):
+
+    @staticmethod
+    def _objects(ids):
+        return [{'id': str(i), 'name': 'obj%s' % i} for i in ids]
+
+    def test_prefetch_should_return_items_in_offset_order(self):
+        objects = self._objects(range(23))
+        resource = FakePageableResource(list(objects))
+        limits = PageSizeLimits(initial_page_size=5)
+
+        items = list(iterate_over_pageable_resource(resource, {'query_params': {}}, limits, 'getObjectList',
+                                                    max_workers=3))
+
+        assert objects == items
+        assert [0, 5, 10, 15, 20] == sorted(resource.requested_offsets)
+        assert resource.max_concurrent_requests <= 3
+
+    def test_prefetch_should_not_be_used_when_first_page_is_the_last_one(self):
+        objects = self._objects(range(3))
+        resource = FakePageableResource(list(objects))
+
+        items = list(iterate_over_pageable_resource(resource, {'query_params': {}}, PageSizeLimits(5),
+                                                    'getObjectList', max_workers=3))
+
+        assert objects == items
+        assert [0] == resource.requested_offsets
+
+    def test_prefetch_should_refetch_pages_when_objects_are_deleted_during_iteration(self):
+        objects = self._objects(range(12))
+
+        def delete_first_object(request_number):
+            if request_number == 2:
+                del resource.objects[0]
+
+        resource = FakePageableResource(list(objects), delete_first_object)
+
+        items = list(iterate_over_pageable_resource(resource, {'query_params': {}}, PageSizeLimits(4),
+                                                    'getObjectList', max_workers=2))
+
+        assert objects[1:] == items
+
+    def test_prefetch_should_refetch_pages_when_objects_are_added_during_iteration(self):
+        objects = self._objects(range(12))
+        new_object = {'id': 'new', 'name': 'new'}
+
+        def add_object(request_number):
+            if request_number == 3:
+                resource.objects.insert(0, new_object)
+
+        resource = FakePageableResource(list(objects), add_object)
+
+        items = list(iterate_over_pageable_resource(resource, {'query_params': {}}, PageSizeLimits(4),
+                                                    'getObjectList', max_workers=2))
+
+        assert [new_object] + objects == items
+        assert len(items) == len(set(item['id'] for item in items))
+
 
 class TestOperationCheckerClass(unittest.TestCase):
     def setUp(self):
@@ -20,6 +20,8 @@ import copy
 import os
 import unittest
 
+from ansible.compat.tests import mock
+
 try:
     from ansible.module_utils.fdm_swagger_client import FdmSwaggerParser
     from ansible.module_utils.common import HTTPMethod
@@ -381,3 +383,45 @@ class TestFdmSwaggerParser(unittest.TestCase):
                 'deleteNoneModel': expected_operations['deleteNoneModel']
             }
         } == fdm_data['model_operations']
+
+    def test_lazy_mode_should_return_the_same_spec(self):
+        eager_data = FdmSwaggerParser().parse_spec(copy.deepcopy(base))
+        lazy_data = FdmSwaggerParser().parse_spec(copy.deepcopy(base), lazy=True)
+
+        assert eager_data['models'] == lazy_data['models']
+        assert eager_data['operations'] == dict(lazy_data['operations'])
+        assert eager_data['model_operations'] == dict(lazy_data['model_operations'])
+
+    @mock.patch.object(FdmSwaggerParser, '_get_rest_params')
+    @mock.patch.object(FdmSwaggerParser, '_get_model_name')
+    def test_lazy_mode_should_parse_operations_on_first_access(self, get_model_name_mock, get_rest_params_mock):
+        get_model_name_mock.return_value = 'NetworkObject'
+
+        fdm_data = FdmSwaggerParser().parse_spec(copy.deepcopy(base), lazy=True)
+
+        assert 'addNetworkObject' in fdm_data['operations']
+        get_model_name_mock.assert_not_called()
+        get_rest_params_mock.assert_not_called()
+
+        assert 'NetworkObject' == fdm_data['operations']['addNetworkObject']['modelName']
+        assert 1 == get_model_name_mock.call_count
+        assert 1 == get_rest_params_mock.call_count
+
+        fdm_data['model_operations'].get('NetworkObject')
+        assert len(fdm_data['operations']) == get_model_name_mock.call_count
+
+    def test_lazy_mode_should_add_documentation_on_first_access(self):
+        docs = {
+            'definitions': {},
+            'paths': {
+                '/object/networks': {
+                    'post': {'description': 'Description for addNetworkObject operation'}
+                }
+            }
+        }
+
+        fdm_data = FdmSwaggerParser().parse_spec(copy.deepcopy(base), docs, lazy=True)
+
+        ops = fdm_data['operations']
+        assert 'Description for addNetworkObject operation' == ops['addNetworkObject']['description']
+        assert '' == ops['deleteNetworkObject']['description']
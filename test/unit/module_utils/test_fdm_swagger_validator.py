@@ -20,6 +20,7 @@ import os
 import unittest
 
 import pytest
+from ansible.compat.tests import mock
 
 try:
     from ansible.module_utils.fdm_swagger_client import FdmSwaggerValidator, IllegalArgumentException
@@ -1077,3 +1078,70 @@ class TestFdmSwaggerValidator(unittest.TestCase):
                     'expected_type': 'object',
                     'actually_value': []}
             ]}) == sort_validator_rez(rez)
+
+    def test_validate_data_should_compile_model_once(self):
+        validator = FdmSwaggerValidator(mock_data)
+        data = {'subType': 'HOST', 'type': 'networkobject', 'value': '1.1.1.1',
+                'objects': [{'id': '1', 'type': 'networkobject'}]}
+
+        with mock.patch.object(FdmSwaggerValidator, '_compile_model',
+                               side_effect=validator._compile_model) as compile_model_mock:
+            assert (True, None) == validator.validate_data('getNetworkObjectList', data)
+            assert (True, None) == validator.validate_data('getNetworkObjectList', data)
+
+        assert 3 == compile_model_mock.call_count
+
+    def test_validate_data_should_not_build_paths_for_valid_data(self):
+        data = {'subType': 'HOST', 'type': 'networkobject', 'value': '1.1.1.1',
+                'objects': [{'id': '1', 'type': 'networkobject'}]}
+
+        with mock.patch.object(FdmSwaggerValidator, '_path_to_str') as path_to_str_mock:
+            assert (True, None) == FdmSwaggerValidator(mock_data).validate_data('getNetworkObjectList', data)
+
+        path_to_str_mock.assert_not_called()
+
+    def test_validate_data_with_recursive_model(self):
+        recursive_mock_data = {
+            'models': {
+                'TreeNode': {
+                    'type': 'object',
+                    'properties': {
+                        'name': {'type': 'string'},
+                        'children': {'type': 'array', 'items': {'type': 'object', '$ref': '#/definitions/TreeNode'}}
+                    },
+                    'required': ['name']
+                }
+            },
+            'operations': {
+                'addTreeNode': {
+                    'modelName': 'TreeNode'
+                }
+            }
+        }
+        data = {'name': 'root', 'children': [{'name': 'child', 'children': [{'name': 1}, {}]}]}
+
+        valid, rez = FdmSwaggerValidator(recursive_mock_data).validate_data('addTreeNode', data)
+
+        assert not valid
+        assert {
+            'required': ['children[0].children[1].name'],
+            'invalid_type': [{
+                'path': 'children[0].children[0].name',
+                'expected_type': 'string',
+                'actually_value': 1
+            }]
+        } == rez
+
+    def test_validate_data_should_report_unhashable_enum_values(self):
+        data = {'subType': ['HOST'], 'type': 'networkobject', 'value': '1.1.1.1'}
+
+        valid, rez = FdmSwaggerValidator(mock_data).validate_data('getNetworkObjectList', data)
+
+        assert not valid
+        assert {
+            'invalid_type': [{
+                'path': 'subType',
+                'expected_type': 'enum',
+                'actually_value': ['HOST']
+            }]
+        } == rez
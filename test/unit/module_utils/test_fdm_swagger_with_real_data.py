@@ -76,3 +76,11 @@ class TestFdmSwagger(unittest.TestCase):
             without_model_name)
         assert sorted(self.fdm_data['model_operations'][None].keys()) == sorted(['deleteDeployment', 'startUpgrade'])
         assert expected_operations_counter == len(operations)
+
+    def test_lazy_parse_should_return_the_same_spec_as_eager_parse(self):
+        eager_data = FdmSwaggerParser().parse_spec(self.base_data)
+        lazy_data = FdmSwaggerParser().parse_spec(self.base_data, lazy=True)
+
+        assert eager_data['models'] == lazy_data['models']
+        assert eager_data['operations'] == dict(lazy_data['operations'])
+        assert eager_data['model_operations'] == dict(lazy_data['model_operations'])
@@ -0,0 +1,151 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import os
+import shutil
+import tempfile
+import unittest
+
+from ansible.compat.tests import mock
+from ansible.module_utils.six import BytesIO
+
+from module_utils.file_download import FileDownload
+
+CHUNK_SIZE = 4
+
+
+class TestFileDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.download_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.download_dir, 'backup.tar')
+
+    def tearDown(self):
+        shutil.rmtree(self.download_dir)
+
+    @staticmethod
+    def _response(content, headers=None, status=200, fail_after=None):
+        response = mock.Mock()
+        response.getcode.return_value = status
+        response.info.return_value = headers or {}
+        body = BytesIO(content)
+
+        def read(amt):
+            if fail_after is not None and body.tell() >= fail_after:
+                raise IOError('Connection reset')
+            return body.read(amt)
+
+        response.read.side_effect = read
+        return response
+
+    def _read_file(self, path=None):
+        with open(path or self.path, 'rb') as f:
+            return f.read()
+
+    def test_write_should_replace_destination_and_remember_validators(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'Old content')
+
+        FileDownload(self.path).write(self._response(b'New content', {'ETag': '"1"', 'Content-Length': '11'}),
+                                      CHUNK_SIZE)
+
+        assert b'New content' == self._read_file()
+        assert ['.backup.tar.download.json', 'backup.tar'] == sorted(os.listdir(self.download_dir))
+        assert {'If-None-Match': '"1"'} == FileDownload(self.path).request_headers()
+
+    def test_write_should_not_leave_metadata_when_response_has_no_validators(self):
+        FileDownload(self.path).write(self._response(b'Content'), CHUNK_SIZE)
+
+        assert ['backup.tar'] == os.listdir(self.download_dir)
+        assert {} == FileDownload(self.path).request_headers()
+
+    def test_is_not_modified_should_compare_validators_and_size_of_local_file(self):
+        headers = {'ETag': '"1"', 'Last-Modified': 'Mon, 01 Oct 2018 10:00:00 GMT', 'Content-Length': '7'}
+        FileDownload(self.path).write(self._response(b'Content', headers), CHUNK_SIZE)
+        download = FileDownload(self.path)
+
+        assert download.is_not_modified(self._response(b'', headers))
+        assert download.is_not_modified(self._response(b'', {'ETag': '"1"'}))
+        assert not download.is_not_modified(self._response(b'', dict(headers, ETag='"2"')))
+        assert not download.is_not_modified(self._response(b'', dict(headers, **{'Content-Length': '8'})))
+        assert not download.is_not_modified(self._response(b'', {'Content-Length': '7'}))
+
+    def test_is_not_modified_should_be_false_when_local_file_changed(self):
+        headers = {'ETag': '"1"', 'Content-Length': '7'}
+        FileDownload(self.path).write(self._response(b'Content', headers), CHUNK_SIZE)
+        with open(self.path, 'wb') as f:
+            f.write(b'Changed')
+        os.utime(self.path, (0, 0))
+
+        download = FileDownload(self.path)
+
+        assert not download.is_not_modified(self._response(b'', headers))
+        assert {} == download.request_headers()
+
+    def test_interrupted_download_should_be_resumed_with_range_request(self):
+        headers = {'ETag': '"1"', 'Content-Length': '12', 'Accept-Ranges': 'bytes'}
+        with open(self.path, 'wb') as f:
+            f.write(b'Old content')
+
+        with self.assertRaises(IOError):
+            FileDownload(self.path).write(self._response(b'File content', headers, fail_after=8), CHUNK_SIZE)
+
+        assert b'Old content' == self._read_file()
+        download = FileDownload(self.path)
+        assert {'Range': 'bytes=8-', 'If-Range': '"1"'} == download.request_headers()
+
+        download.write(self._response(b'tent', {'ETag': '"1"', 'Content-Range': 'bytes 8-11/12'}, status=206),
+                       CHUNK_SIZE)
+
+        assert b'File content' == self._read_file()
+        assert ['.backup.tar.download.json', 'backup.tar'] == sorted(os.listdir(self.download_dir))
+        assert {'If-None-Match': '"1"'} == FileDownload(self.path).request_headers()
+
+    def test_full_response_to_range_request_should_overwrite_partial_file(self):
+        headers = {'ETag': '"1"', 'Content-Length': '12', 'Accept-Ranges': 'bytes'}
+        with self.assertRaises(IOError):
+            FileDownload(self.path).write(self._response(b'File content', headers, fail_after=8), CHUNK_SIZE)
+
+        FileDownload(self.path).write(self._response(b'New', {'ETag': '"2"', 'Content-Length': '3'}), CHUNK_SIZE)
+
+        assert b'New' == self._read_file()
+
+    def test_interrupted_download_should_be_discarded_when_server_does_not_support_ranges(self):
+        with self.assertRaises(IOError):
+            FileDownload(self.path).write(self._response(b'File content', {'ETag': '"1"'}, fail_after=8),
+                                          CHUNK_SIZE)
+
+        assert [] == os.listdir(self.download_dir)
+        assert {} == FileDownload(self.path).request_headers()
+
+    def test_truncated_body_should_be_kept_for_resuming(self):
+        headers = {'Last-Modified': 'Mon, 01 Oct 2018 10:00:00 GMT', 'Content-Length': '20', 'Accept-Ranges': 'bytes'}
+
+        with self.assertRaises(IOError):
+            FileDownload(self.path).write(self._response(b'File content', headers), CHUNK_SIZE)
+
+        assert not os.path.exists(self.path)
+        assert {'Range': 'bytes=12-', 'If-Range': 'Mon, 01 Oct 2018 10:00:00 GMT'} == \
+            FileDownload(self.path).request_headers()
+
+    def test_weak_etag_should_not_be_used_for_resuming(self):
+        headers = {'ETag': 'W/"1"', 'Content-Length': '12', 'Accept-Ranges': 'bytes'}
+
+        with self.assertRaises(IOError):
+            FileDownload(self.path).write(self._response(b'File content', headers, fail_after=8), CHUNK_SIZE)
+
+        assert 'Range' not in FileDownload(self.path).request_headers()
@@ -0,0 +1,117 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+from ansible.compat.tests import mock
+from ansible.module_utils.six.moves.urllib.error import HTTPError, URLError
+from urllib3.exceptions import NewConnectionError
+
+from module_utils.http_transport import PooledHttpTransport
+
+BASE_URL = 'https://ftd.example.com:443'
+
+
+class TestPooledHttpTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = PooledHttpTransport(BASE_URL, pool_size=2, validate_certs=False, timeout=10)
+        self.urlopen_mock = mock.Mock()
+        self.transport._pool.urlopen = self.urlopen_mock
+
+    @staticmethod
+    def _urllib3_response(status, data=b'', headers=None):
+        response = mock.Mock()
+        response.status = status
+        response.reason = 'Reason'
+        response.data = data
+        response.headers = headers or {}
+        return response
+
+    def test_pool_should_be_bounded_and_keep_connections_alive(self):
+        pool = PooledHttpTransport(BASE_URL, pool_size=2)._pool
+
+        assert 2 == pool.pool.maxsize
+        assert pool.block
+        assert 'CERT_REQUIRED' == pool.cert_reqs
+
+    def test_pool_should_not_validate_certs_when_disabled(self):
+        assert 'CERT_NONE' == self.transport._pool.cert_reqs
+
+    def test_send_should_return_response_and_data(self):
+        self.urlopen_mock.return_value = self._urllib3_response(200, b'{"id": "123"}', {'ETag': '"1"'})
+
+        response, response_data = self.transport.send('/object/networks', '{"name": "foo"}', method='post',
+                                                      headers={'Accept': 'application/json'})
+
+        assert 200 == response.getcode()
+        assert {'ETag': '"1"'} == response.info()
+        assert b'{"id": "123"}' == response_data.getvalue()
+        self.urlopen_mock.assert_called_once_with('POST', '/object/networks', body='{"name": "foo"}',
+                                                  headers={'Accept': 'application/json'}, redirect=False)
+
+    def test_send_should_raise_http_error_for_non_success_status(self):
+        self.urlopen_mock.return_value = self._urllib3_response(404, b'{"error": "Not found"}')
+
+        with self.assertRaises(HTTPError) as res:
+            self.transport.send('/object/networks/123')
+
+        assert 404 == res.exception.code
+        assert BASE_URL + '/object/networks/123' == res.exception.geturl()
+        assert b'{"error": "Not found"}' == res.exception.read()
+
+    def test_send_should_raise_url_error_when_connection_fails(self):
+        self.urlopen_mock.side_effect = NewConnectionError(None, 'Connection refused')
+
+        self.assertRaises(URLError, self.transport.send, '/object/networks')
+
+    def test_open_should_return_response_without_reading_body(self):
+        urllib3_response = self._urllib3_response(200)
+        urllib3_response.read.side_effect = [b'File ', b'content', b'']
+        self.urlopen_mock.return_value = urllib3_response
+
+        response = self.transport.open('/action/downloadfile', headers={'Accept': 'application/octet-stream'})
+
+        assert b'File ' == response.read(5)
+        assert b'content' == response.read(7)
+        response.close()
+        urllib3_response.release_conn.assert_called_once_with()
+        self.urlopen_mock.assert_called_once_with('GET', '/action/downloadfile',
+                                                  headers={'Accept': 'application/octet-stream'}, redirect=False,
+                                                  preload_content=False)
+
+    def test_open_should_release_connection_and_raise_http_error_for_non_success_status(self):
+        urllib3_response = self._urllib3_response(404)
+        urllib3_response.read.return_value = b'{"error": "Not found"}'
+        self.urlopen_mock.return_value = urllib3_response
+
+        with self.assertRaises(HTTPError) as res:
+            self.transport.open('/action/downloadfile')
+
+        assert 404 == res.exception.code
+        assert b'{"error": "Not found"}' == res.exception.read()
+        urllib3_response.release_conn.assert_called_once_with()
+
+    def test_closing_response_should_close_connection_when_body_not_read(self):
+        urllib3_response = self._urllib3_response(200)
+        urllib3_response.isclosed.return_value = False
+        self.urlopen_mock.return_value = urllib3_response
+
+        self.transport.open('/action/downloadfile').close()
+
+        urllib3_response.close.assert_called_once_with()
+        urllib3_response.release_conn.assert_called_once_with()
@@ -0,0 +1,104 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import os
+import shutil
+import tempfile
+import unittest
+
+from ansible.compat.tests import mock
+from urllib3 import encode_multipart_formdata
+from urllib3.fields import RequestField
+
+from module_utils.multipart import MultipartFileBody
+
+BOUNDARY = 'a1b2c3'
+
+
+class TestMultipartFileBody(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, 'upgrade.sh')
+        self.content = os.urandom(100000)
+        with open(self.file_path, 'wb') as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def _read_all(body, size):
+        chunks = []
+        while True:
+            chunk = body.read(size)
+            if not chunk:
+                return chunks
+            chunks.append(chunk)
+
+    @mock.patch('module_utils.multipart.choose_boundary', mock.Mock(return_value=BOUNDARY))
+    def test_body_should_be_encoded_as_by_encode_multipart_formdata(self):
+        field = RequestField('fileToUpload', self.content, 'upgrade.sh')
+        field.make_multipart()
+        expected_body, expected_content_type = encode_multipart_formdata([field], boundary=BOUNDARY)
+
+        with MultipartFileBody('fileToUpload', self.file_path) as body:
+            assert expected_content_type == body.content_type
+            assert len(expected_body) == body.content_length
+            assert expected_body == b''.join(self._read_all(body, 8192))
+
+    def test_body_should_be_read_in_chunks_of_limited_size(self):
+        with MultipartFileBody('fileToUpload', self.file_path) as body:
+            chunks = self._read_all(body, 4096)
+
+        assert body.content_length == sum(len(chunk) for chunk in chunks)
+        assert max(len(chunk) for chunk in chunks) <= 4096
+
+    def test_read_without_size_should_return_rest_of_body(self):
+        with MultipartFileBody('fileToUpload', self.file_path, chunk_size=4096) as body:
+            whole_body = body.read()
+            body.seek(0)
+            assert whole_body[:10] == body.read(10)
+
+            assert body.content_length == len(whole_body)
+            assert whole_body[10:] == body.read(-1)
+            body.seek(10)
+            assert whole_body[10:] == body.read(None)
+            assert b'' == body.read()
+
+    def test_body_should_be_sent_again_after_seek(self):
+        with MultipartFileBody('fileToUpload', self.file_path) as body:
+            first_read = b''.join(self._read_all(body, 10000))
+            assert body.content_length == body.tell()
+
+            body.seek(0)
+            assert first_read == b''.join(self._read_all(body, 10000))
+
+    def test_progress_should_be_reported_for_every_tenth_of_body(self):
+        progress_callback = mock.Mock()
+
+        with MultipartFileBody('fileToUpload', self.file_path, progress_callback=progress_callback) as body:
+            self._read_all(body, 1000)
+
+        assert 10 == progress_callback.call_count
+        progress_callback.assert_called_with(body.content_length, body.content_length)
+
+    def test_close_should_close_the_file(self):
+        body = MultipartFileBody('fileToUpload', self.file_path)
+        body.close()
+
+        assert body._file.closed
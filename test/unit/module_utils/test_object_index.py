@@ -0,0 +1,102 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import unittest
+
+from module_utils.object_index import ObjectIndex
+
+FOO = {'id': '1', 'name': 'foo', 'value': '1'}
+BAR = {'id': '2', 'name': 'bar', 'value': '2'}
+
+
+class TestObjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ObjectIndex()
+
+    def test_lookups_should_return_none_when_nothing_is_indexed(self):
+        assert self.index.get_all('NetworkObject', {}) is None
+        assert self.index.find_by_name('NetworkObject', {}, 'foo') is None
+
+    def test_put_all_should_make_all_objects_and_names_known(self):
+        self.index.put_all('NetworkObject', {}, [FOO, BAR])
+
+        assert [BAR, FOO] == sorted(self.index.get_all('NetworkObject', {}), key=lambda o: o['id'], reverse=True)
+        assert [FOO] == self.index.find_by_name('NetworkObject', {}, 'foo')
+        assert [] == self.index.find_by_name('NetworkObject', {}, 'missing')
+        assert self.index.get_all('NetworkGroup', {}) is None
+
+    def test_put_by_name_should_make_only_the_name_known(self):
+        self.index.put_by_name('NetworkObject', {}, 'foo', [FOO])
+
+        assert [FOO] == self.index.find_by_name('NetworkObject', {}, 'foo')
+        assert self.index.find_by_name('NetworkObject', {}, 'bar') is None
+        assert self.index.get_all('NetworkObject', {}) is None
+
+    def test_objects_should_be_indexed_by_path_params_without_object_id(self):
+        self.index.put_all('AccessRule', {'parentId': 'policy1'}, [FOO])
+
+        assert [FOO] == self.index.find_by_name('AccessRule', {'parentId': 'policy1', 'objId': '1'}, 'foo')
+        assert self.index.find_by_name('AccessRule', {'parentId': 'policy2'}, 'foo') is None
+
+    def test_add_update_and_remove_should_keep_index_consistent(self):
+        self.index.put_all('NetworkObject', {}, [FOO])
+
+        self.index.add('NetworkObject', {}, BAR)
+        self.index.update('NetworkObject', {'objId': '1'}, dict(FOO, name='renamed'))
+        self.index.remove('NetworkObject', {'objId': '2'}, '2')
+
+        assert [] == self.index.find_by_name('NetworkObject', {}, 'foo')
+        assert [] == self.index.find_by_name('NetworkObject', {}, 'bar')
+        assert [dict(FOO, name='renamed')] == self.index.get_all('NetworkObject', {})
+
+    def test_add_should_make_name_of_added_object_known(self):
+        self.index.add('NetworkObject', {}, FOO)
+
+        assert [FOO] == self.index.find_by_name('NetworkObject', {}, 'foo')
+        assert self.index.get_all('NetworkObject', {}) is None
+
+    def test_forget_name_should_make_the_name_unknown_again(self):
+        self.index.put_by_name('NetworkObject', {}, 'foo', [])
+        self.index.put_all('NetworkGroup', {}, [FOO, BAR])
+
+        self.index.forget_name('NetworkObject', {}, 'foo')
+        self.index.forget_name('NetworkGroup', {}, 'foo')
+        self.index.forget_name('AccessRule', {}, 'foo')
+
+        assert self.index.find_by_name('NetworkObject', {}, 'foo') is None
+        assert self.index.find_by_name('NetworkGroup', {}, 'foo') is None
+        assert self.index.get_all('NetworkGroup', {}) is None
+
+    def test_invalidate_should_drop_objects_of_model_or_all_objects(self):
+        self.index.put_all('NetworkObject', {}, [FOO])
+        self.index.put_all('NetworkGroup', {}, [BAR])
+
+        self.index.invalidate('NetworkObject')
+        assert self.index.get_all('NetworkObject', {}) is None
+        assert [BAR] == self.index.get_all('NetworkGroup', {})
+
+        self.index.invalidate()
+        assert self.index.get_all('NetworkGroup', {}) is None
+
+    def test_returned_objects_should_not_change_index(self):
+        obj = dict(FOO)
+        self.index.put_all('NetworkObject', {}, [obj])
+        obj['value'] = 'changed'
+        self.index.get_all('NetworkObject', {})[0]['value'] = 'changed'
+
+        assert [FOO] == self.index.find_by_name('NetworkObject', {}, 'foo')
@@ -0,0 +1,136 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from module_utils.fdm_swagger_client import FdmSwaggerParser, FdmSwaggerValidator, SpecProp, LazySpecMapping
+from module_utils.precompiled_spec import dump_precompiled_spec, load_precompiled_spec, InvalidPrecompiledSpec
+
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+TEST_DATA_FOLDER = os.path.join(DIR_PATH, 'test_data')
+
+
+class TestPrecompiledSpec(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(TEST_DATA_FOLDER, 'ngfw_with_ex.json'), 'rb') as f:
+            cls.parsed_spec = FdmSwaggerParser().parse_spec(json.loads(f.read().decode('utf-8')))
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.spec_path = os.path.join(self.tmp_dir, 'ngfw.spec')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _dump_and_load(self, spec):
+        with open(self.spec_path, 'wb') as f:
+            dump_precompiled_spec(spec, f)
+        return load_precompiled_spec(self.spec_path)
+
+    def test_loaded_spec_should_be_equal_to_parsed_spec(self):
+        loaded_spec = self._dump_and_load(self.parsed_spec)
+
+        assert self.parsed_spec[SpecProp.MODELS] == dict(loaded_spec[SpecProp.MODELS])
+        assert self.parsed_spec[SpecProp.OPERATIONS] == dict(loaded_spec[SpecProp.OPERATIONS])
+        assert self.parsed_spec[SpecProp.MODEL_OPERATIONS] == dict(loaded_spec[SpecProp.MODEL_OPERATIONS])
+
+    def test_loaded_spec_should_decode_entries_on_first_access(self):
+        loaded_spec = self._dump_and_load(self.parsed_spec)
+        operations = loaded_spec[SpecProp.OPERATIONS]
+
+        assert 'getNetworkObjectList' in operations
+        assert not operations._entries
+
+        operation = operations['getNetworkObjectList']
+
+        assert self.parsed_spec[SpecProp.OPERATIONS]['getNetworkObjectList'] == operation
+        assert operation is operations['getNetworkObjectList']
+        assert ['getNetworkObjectList'] == list(operations._entries)
+
+    def test_model_operations_should_share_operation_entries(self):
+        loaded_spec = self._dump_and_load(self.parsed_spec)
+
+        model_operations = loaded_spec[SpecProp.MODEL_OPERATIONS]['NetworkObject']
+
+        assert type(model_operations) is dict
+        assert model_operations['addNetworkObject'] is loaded_spec[SpecProp.OPERATIONS]['addNetworkObject']
+
+    def test_model_operations_should_support_operations_without_model(self):
+        loaded_spec = self._dump_and_load(self.parsed_spec)
+
+        assert sorted(['deleteDeployment', 'startUpgrade']) == sorted(loaded_spec[SpecProp.MODEL_OPERATIONS][None])
+
+    def test_validator_should_work_with_loaded_spec(self):
+        loaded_spec = self._dump_and_load(self.parsed_spec)
+        validator = FdmSwaggerValidator(loaded_spec)
+        expected_validator = FdmSwaggerValidator(self.parsed_spec)
+        data = {'name': 'foo', 'subType': 'HOST', 'value': 1}
+
+        assert expected_validator.validate_data('addNetworkObject', data) == \
+            validator.validate_data('addNetworkObject', data)
+        assert expected_validator.validate_path_params('editNetworkObject', {'objId': 1}) == \
+            validator.validate_path_params('editNetworkObject', {'objId': 1})
+
+    def test_load_raises_exception_when_file_is_empty(self):
+        open(self.spec_path, 'wb').close()
+
+        self.assertRaises(InvalidPrecompiledSpec, load_precompiled_spec, self.spec_path)
+
+    def test_load_raises_exception_when_file_has_wrong_format(self):
+        with open(self.spec_path, 'wb') as f:
+            f.write(b'{"models": {}, "operations": {}}')
+
+        self.assertRaises(InvalidPrecompiledSpec, load_precompiled_spec, self.spec_path)
+
+    def test_load_raises_exception_when_file_is_truncated(self):
+        with open(self.spec_path, 'wb') as f:
+            dump_precompiled_spec(self.parsed_spec, f)
+        with open(self.spec_path, 'r+b') as f:
+            f.truncate(100)
+
+        self.assertRaises(InvalidPrecompiledSpec, load_precompiled_spec, self.spec_path)
+
+
+class TestLazySpecMapping(unittest.TestCase):
+
+    def test_should_load_entries_only_once(self):
+        loaded_keys = []
+
+        def loader(key):
+            loaded_keys.append(key)
+            return {'name': key}
+
+        mapping = LazySpecMapping(['foo', 'bar'], loader)
+
+        assert {'name': 'foo'} == mapping['foo']
+        assert {'name': 'foo'} == mapping.get('foo')
+        assert ['foo'] == loaded_keys
+        assert 2 == len(mapping)
+        assert ['bar', 'foo'] == sorted(mapping)
+
+    def test_should_behave_as_dict_for_missing_keys(self):
+        mapping = LazySpecMapping(['foo'], lambda key: key)
+
+        assert 'bar' not in mapping
+        assert mapping.get('bar') is None
+        self.assertRaises(KeyError, lambda: mapping['bar'])
@@ -0,0 +1,85 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import pytest
+
+from module_utils.response_cache import ResponseCache, get_response_validator
+
+
+def test_response_cache_should_return_cached_response():
+    cache = ResponseCache(max_entries=2)
+    cache.put('/object/1', '"etag"', 200, '{"id": "1"}')
+
+    cached_response = cache.get('/object/1')
+
+    assert '"etag"' == cached_response.validator
+    assert 200 == cached_response.status_code
+    assert '{"id": "1"}' == cached_response.body
+    assert cache.get('/object/2') is None
+
+
+def test_response_cache_should_evict_least_recently_used_response():
+    cache = ResponseCache(max_entries=2)
+    cache.put('/object/1', '"1"', 200, '{}')
+    cache.put('/object/2', '"2"', 200, '{}')
+    cache.get('/object/1')
+
+    cache.put('/object/3', '"3"', 200, '{}')
+
+    assert 2 == len(cache)
+    assert cache.get('/object/2') is None
+    assert cache.get('/object/1') is not None
+    assert cache.get('/object/3') is not None
+
+
+def test_response_cache_should_key_responses_by_full_url():
+    cache = ResponseCache(max_entries=2)
+    cache.put('/object?offset=0', '"1"', 200, '{"items": [1]}')
+    cache.put('/object?offset=1', '"2"', 200, '{"items": [2]}')
+
+    assert '{"items": [1]}' == cache.get('/object?offset=0').body
+    assert '{"items": [2]}' == cache.get('/object?offset=1').body
+
+
+def test_response_cache_should_drop_cached_response_when_new_one_has_no_validator():
+    cache = ResponseCache(max_entries=2)
+    cache.put('/object/1', '"1"', 200, '{}')
+
+    cache.put('/object/1', None, 200, '{}')
+
+    assert cache.get('/object/1') is None
+
+
+def test_response_cache_should_remove_response():
+    cache = ResponseCache(max_entries=2)
+    cache.put('/object/1', '"1"', 200, '{}')
+
+    cache.remove('/object/1')
+    cache.remove('/object/2')
+
+    assert 0 == len(cache)
+
+
+@pytest.mark.parametrize('etag, response, expected_validator', [
+    ('"abc"', {'version': 'xyz'}, '"abc"'),
+    (None, {'version': 'xyz'}, '"xyz"'),
+    (None, {'items': []}, None),
+    (None, [], None),
+    ('', {}, None)
+])
+def test_get_response_validator(etag, response, expected_validator):
+    assert expected_validator == get_response_validator(etag, response)
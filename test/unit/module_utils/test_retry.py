@@ -0,0 +1,85 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import pytest
+
+from module_utils.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+
+@pytest.fixture
+def time_mock(mocker):
+    time_mock = mocker.patch('module_utils.retry.time')
+    time_mock.time.return_value = 1538388000
+    return time_mock
+
+
+@pytest.mark.parametrize('value, expected_delay', [
+    (None, None),
+    ('', None),
+    ('120', 120),
+    ('Mon, 01 Oct 2018 10:01:00 GMT', 60),
+    ('Mon, 01 Oct 2018 09:00:00 GMT', 0),
+    ('soon', None)
+])
+def test_parse_retry_after(value, expected_delay, time_mock):
+    assert expected_delay == parse_retry_after(value)
+
+
+def test_get_delay_should_grow_exponentially_with_jitter_up_to_max_delay(mocker):
+    uniform_mock = mocker.patch('module_utils.retry.random.uniform', side_effect=lambda low, high: high)
+    policy = RetryPolicy(5, 1, 5, RetryBudget(10))
+
+    assert [1, 2, 4, 5] == [policy.get_delay(retry_number) for retry_number in range(4)]
+    uniform_mock.assert_called_with(0, 5)
+
+
+def test_get_delay_should_respect_retry_after(mocker):
+    mocker.patch('module_utils.retry.random.uniform', return_value=0.5)
+    policy = RetryPolicy(5, 1, 30, RetryBudget(10))
+
+    assert 10 == policy.get_delay(0, '10')
+    assert 0.5 == policy.get_delay(0, '0')
+    assert policy.get_delay(0, '31') is None
+
+
+def test_request_retries_should_wait_and_count_retries(mocker, time_mock):
+    mocker.patch('module_utils.retry.random.uniform', side_effect=lambda low, high: high)
+    retries = RetryPolicy(2, 1, 30, RetryBudget(10)).start('GET')
+
+    assert retries.wait_before_retry()
+    assert retries.wait_before_retry('3')
+    assert not retries.wait_before_retry()
+    assert 2 == retries.count
+    assert 4 == retries.total_delay
+    assert [mocker.call(1), mocker.call(3)] == time_mock.sleep.call_args_list
+
+
+def test_request_retries_should_not_retry_non_idempotent_methods_unless_allowed(time_mock):
+    assert not RetryPolicy(2, 1, 30, RetryBudget(10)).start('post').wait_before_retry()
+    assert RetryPolicy(2, 1, 30, RetryBudget(10), retry_non_idempotent=True).start('post').wait_before_retry()
+
+
+def test_retry_budget_should_be_shared_by_requests(time_mock):
+    policy = RetryPolicy(2, 1, 30, RetryBudget(3))
+    first_request_retries = policy.start('get')
+    second_request_retries = policy.start('get')
+
+    assert first_request_retries.wait_before_retry()
+    assert first_request_retries.wait_before_retry()
+    assert second_request_retries.wait_before_retry()
+    assert not second_request_retries.wait_before_retry()
+    assert 3 == time_mock.sleep.call_count
@@ -0,0 +1,128 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import os
+import shutil
+import tempfile
+import unittest
+
+from ansible.compat.tests import mock
+
+from module_utils.fdm_swagger_client import SpecProp
+from module_utils.spec_cache import SpecCache, spec_content_hash, ENTRY_SUFFIX
+
+HOST = 'https://ftd.example.com'
+PARSED_SPEC = {
+    SpecProp.MODELS: {'NetworkObject': {'type': 'object'}},
+    SpecProp.OPERATIONS: {
+        'getNetworkObjectList': {'modelName': 'NetworkObject', 'url': '/object/networks'},
+        'deleteDeployment': {'modelName': None, 'url': '/operational/deploy/{objId}'}
+    },
+    SpecProp.MODEL_OPERATIONS: {
+        'NetworkObject': {'getNetworkObjectList': {'modelName': 'NetworkObject', 'url': '/object/networks'}},
+        None: {'deleteDeployment': {'modelName': None, 'url': '/operational/deploy/{objId}'}}
+    }
+}
+
+
+class TestSpecCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = SpecCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_get_returns_none_when_nothing_is_cached(self):
+        assert self.cache.get(HOST, '2.0.0', 'hash') is None
+        assert self.cache.get_latest(HOST) is None
+        assert {} == self.cache.get_validators(HOST)
+
+    def test_put_and_get_should_restore_parsed_spec(self):
+        self.cache.put(HOST, '2.0.0', 'hash', PARSED_SPEC)
+
+        assert PARSED_SPEC == self.cache.get(HOST, '2.0.0', 'hash')
+        assert PARSED_SPEC == self.cache.get_latest(HOST)
+
+    def test_get_should_not_return_entry_with_different_key(self):
+        self.cache.put(HOST, '2.0.0', 'hash', PARSED_SPEC)
+
+        assert self.cache.get(HOST, '2.0.0', 'otherHash') is None
+        assert self.cache.get(HOST, '3.0.0', 'hash') is None
+        assert self.cache.get('https://other.example.com', '2.0.0', 'hash') is None
+
+    def test_get_validators_should_return_validators_of_latest_spec(self):
+        self.cache.put(HOST, '2.0.0', 'hash1', PARSED_SPEC, etag='"123"', last_modified='Mon, 01 Oct 2018')
+        self.cache.put(HOST, '2.0.0', 'hash2', PARSED_SPEC, etag='"456"')
+
+        assert {'etag': '"456"'} == self.cache.get_validators(HOST)
+
+    def test_get_validators_should_be_empty_when_entry_is_evicted(self):
+        self.cache.put(HOST, '2.0.0', 'hash', PARSED_SPEC, etag='"123"')
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(ENTRY_SUFFIX):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+        assert {} == self.cache.get_validators(HOST)
+        assert self.cache.get_latest(HOST) is None
+
+    def test_get_should_treat_corrupted_entry_as_miss(self):
+        self.cache.put(HOST, '2.0.0', 'hash', PARSED_SPEC)
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(ENTRY_SUFFIX):
+                with open(os.path.join(self.cache_dir, filename), 'w') as f:
+                    f.write('{"models": ')
+
+        assert self.cache.get(HOST, '2.0.0', 'hash') is None
+
+    def test_put_should_evict_least_recently_used_entries(self):
+        cache = SpecCache(self.cache_dir, max_size=1)
+        cache.put(HOST, '2.0.0', 'hash1', PARSED_SPEC)
+        for filename in os.listdir(self.cache_dir):
+            os.utime(os.path.join(self.cache_dir, filename), (0, 0))
+        cache.put('https://other.example.com', '2.0.0', 'hash2', PARSED_SPEC)
+
+        assert cache.get(HOST, '2.0.0', 'hash1') is None
+        assert PARSED_SPEC == cache.get('https://other.example.com', '2.0.0', 'hash2')
+
+    def test_put_should_skip_entries_removed_during_eviction(self):
+        cache = SpecCache(self.cache_dir, max_size=1)
+        cache.put(HOST, '2.0.0', 'hash1', PARSED_SPEC)
+        listdir = os.listdir
+
+        def listdir_and_remove_entries(path):
+            filenames = listdir(path)
+            # another process evicts the entries after they have been listed
+            for filename in filenames:
+                os.remove(os.path.join(path, filename))
+            return filenames
+
+        with mock.patch('module_utils.spec_cache.os.listdir', side_effect=listdir_and_remove_entries):
+            cache.put('https://other.example.com', '2.0.0', 'hash2', PARSED_SPEC)
+
+        assert cache.get(HOST, '2.0.0', 'hash1') is None
+
+    def test_put_should_not_leave_temporary_files(self):
+        self.cache.put(HOST, '2.0.0', 'hash', PARSED_SPEC)
+
+        assert not [f for f in os.listdir(self.cache_dir) if f.endswith('.tmp')]
+
+
+def test_spec_content_hash_should_be_the_same_for_text_and_bytes():
+    assert spec_content_hash(b'{"paths": {}}') == spec_content_hash(u'{"paths": {}}')
+    assert spec_content_hash(b'{"paths": {}}') != spec_content_hash(b'{"paths": {"/": {}}}')
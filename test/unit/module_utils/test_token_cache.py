@@ -0,0 +1,75 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+import os
+import stat
+
+import pytest
+
+from module_utils.token_cache import TokenCache, TokenInfo, HAS_CRYPTOGRAPHY
+
+pytestmark = pytest.mark.skipif(not HAS_CRYPTOGRAPHY, reason='cryptography is required to cache tokens')
+
+HOST = 'https://ftd.example.com:443'
+TOKENS = {
+    TokenInfo.ACCESS_TOKEN: 'ACCESS_TOKEN',
+    TokenInfo.REFRESH_TOKEN: 'REFRESH_TOKEN',
+    TokenInfo.ACCESS_TOKEN_EXPIRES_AT: 1800,
+    TokenInfo.REFRESH_TOKEN_EXPIRES_AT: 2400
+}
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    return str(tmpdir.join('tokens'))
+
+
+def test_saved_tokens_should_be_loaded_with_the_same_password(cache_dir):
+    TokenCache(cache_dir, HOST, 'admin', 'secret').save(TOKENS)
+
+    assert TOKENS == TokenCache(cache_dir, HOST, 'admin', 'secret').load()
+    assert TokenCache(cache_dir, HOST, 'admin', 'changed').load() is None
+    assert TokenCache(cache_dir, HOST, 'other', 'secret').load() is None
+    assert TokenCache(cache_dir, 'https://other.example.com:443', 'admin', 'secret').load() is None
+
+
+def test_tokens_should_be_encrypted_and_readable_only_by_owner(cache_dir):
+    TokenCache(cache_dir, HOST, 'admin', 'secret').save(TOKENS)
+
+    entry_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+    with open(entry_path, 'rb') as f:
+        assert b'REFRESH_TOKEN' not in f.read()
+    assert 0o600 == stat.S_IMODE(os.stat(entry_path).st_mode)
+    assert 0o700 == stat.S_IMODE(os.stat(cache_dir).st_mode)
+
+
+def test_tokens_should_be_ignored_when_readable_by_others(cache_dir):
+    token_cache = TokenCache(cache_dir, HOST, 'admin', 'secret')
+    token_cache.save(TOKENS)
+    os.chmod(os.path.join(cache_dir, os.listdir(cache_dir)[0]), 0o644)
+
+    assert token_cache.load() is None
+
+
+def test_removed_tokens_should_not_be_loaded(cache_dir):
+    token_cache = TokenCache(cache_dir, HOST, 'admin', 'secret')
+    token_cache.remove()
+    token_cache.save(TOKENS)
+
+    token_cache.remove()
+
+    assert token_cache.load() is None
@@ -6,17 +6,22 @@ import copy
 import unittest
 
 from ansible.compat.tests import mock
+from ansible.module_utils.connection import ConnectionError
 
 try:
     from ansible.module_utils.common import FtdServerError, HTTPMethod, ResponseParams, FtdConfigurationError
     from ansible.module_utils.configuration import DUPLICATE_NAME_ERROR_MESSAGE, UNPROCESSABLE_ENTITY_STATUS, \
-        MULTIPLE_DUPLICATES_FOUND_ERROR, BaseConfigurationResource, FtdInvalidOperationNameError, QueryParams
+        MULTIPLE_DUPLICATES_FOUND_ERROR, BaseConfigurationResource, FtdInvalidOperationNameError, QueryParams, \
+        UpsertStatus, UpsertStrategy, UpsertStatistics
     from ansible.module_utils.fdm_swagger_client import ValidationError
+    from ansible.module_utils.object_index import ObjectIndex
 except ImportError:
     from module_utils.common import FtdServerError, HTTPMethod, ResponseParams, FtdConfigurationError
     from module_utils.configuration import DUPLICATE_NAME_ERROR_MESSAGE, UNPROCESSABLE_ENTITY_STATUS, \
-        MULTIPLE_DUPLICATES_FOUND_ERROR, BaseConfigurationResource, FtdInvalidOperationNameError, QueryParams
+        MULTIPLE_DUPLICATES_FOUND_ERROR, BaseConfigurationResource, FtdInvalidOperationNameError, QueryParams, \
+        UpsertStatus, UpsertStrategy, UpsertStatistics
     from module_utils.fdm_swagger_client import ValidationError
+    from module_utils.object_index import ObjectIndex
 
 
 ADD_RESPONSE = {'status': 'Object added'}
@@ -98,7 +103,8 @@ class TestUpsertOperationUnitTests(unittest.TestCase):
         )
         edit_object_mock.assert_called_once_with(
             get_operation_mock.return_value,
-            params
+            params,
+            existing_object
         )
 
     @mock.patch.object(BaseConfigurationResource, "get_operation_specs_by_model_name")
@@ -732,6 +738,354 @@ class TestUpsertOperationFunctionalTests(object):
         assert result.msg is MULTIPLE_DUPLICATES_FOUND_ERROR
         assert result.obj is None
 
+    @staticmethod
+    def _bulk_upsert_operations(url, url_with_id_templ):
+        return {
+            'getObjectList': {'method': HTTPMethod.GET, 'modelName': 'Object', 'url': url, 'returnMultipleItems': True},
+            'addObject': {'method': HTTPMethod.POST, 'modelName': 'Object', 'url': url},
+            'editObject': {'method': HTTPMethod.PUT, 'modelName': 'Object', 'url': url_with_id_templ},
+            'otherObjectOperation': {
+                'method': HTTPMethod.GET,
+                'modelName': 'Object',
+                'url': url_with_id_templ,
+                'returnMultipleItems': False}
+        }
+
+    def test_module_should_upsert_list_of_objects_fetching_existing_objects_once(self, connection_mock):
+        url = '/test'
+        url_with_id_templ = '{0}/{1}'.format(url, '{objId}')
+        existing_objects = [
+            {'name': 'unchangedObject', 'value': '1', 'type': 'object', 'id': '1', 'version': 'v1'},
+            {'name': 'changedObject', 'value': '2', 'type': 'object', 'id': '2', 'version': 'v2'},
+            {'name': 'notRequestedObject', 'value': '3', 'type': 'object', 'id': '3', 'version': 'v3'}
+        ]
+        params = {
+            'operation': 'upsertObject',
+            'data': [
+                {'name': 'newObject', 'value': '0', 'type': 'object'},
+                {'name': 'unchangedObject', 'value': '1', 'type': 'object'},
+                {'name': 'changedObject', 'value': '22', 'type': 'object'}
+            ]
+        }
+        sent_requests = []
+
+        def request_handler(url_path=None, http_method=None, body_params=None, path_params=None, query_params=None):
+            sent_requests.append((http_method, url_path, path_params))
+            if http_method == HTTPMethod.GET:
+                assert url_path == url
+                return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: {'items': existing_objects}}
+            elif http_method == HTTPMethod.POST:
+                assert body_params == {'name': 'newObject', 'value': '0', 'type': 'object'}
+                return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: dict(body_params, id='0')}
+            elif http_method == HTTPMethod.PUT:
+                assert body_params == {'name': 'changedObject', 'value': '22', 'type': 'object', 'id': '2',
+                                       'version': 'v2'}
+                return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: body_params}
+            else:
+                assert False
+
+        operations = self._bulk_upsert_operations(url, url_with_id_templ)
+        connection_mock.get_operation_spec = lambda name: operations[name]
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        connection_mock.send_request = request_handler
+
+        result = self._resource_execute_operation(params, connection=connection_mock)
+
+        assert [
+            {'name': 'newObject', 'status': UpsertStatus.ADDED,
+             'object': {'name': 'newObject', 'value': '0', 'type': 'object', 'id': '0'}},
+            {'name': 'unchangedObject', 'status': UpsertStatus.UNCHANGED, 'object': existing_objects[0]},
+            {'name': 'changedObject', 'status': UpsertStatus.UPDATED,
+             'object': {'name': 'changedObject', 'value': '22', 'type': 'object', 'id': '2', 'version': 'v2'}}
+        ] == result
+        assert [
+            (HTTPMethod.GET, url, {}),
+            (HTTPMethod.POST, url, {}),
+            (HTTPMethod.PUT, url_with_id_templ, {'objId': '2'})
+        ] == sent_requests
+        assert params['data'][2] == {'name': 'changedObject', 'value': '22', 'type': 'object'}
+
+    def test_bulk_upsert_should_report_objects_added_by_another_writer_meanwhile(self, connection_mock):
+        url = '/test'
+        # objects created by another writer after the list of existing objects has been fetched
+        created_objects = [
+            {'name': 'equalObject', 'value': '1', 'type': 'object', 'id': '1', 'version': 'v1'},
+            {'name': 'differentObject', 'value': '2', 'type': 'object', 'id': '2', 'version': 'v2'}
+        ]
+        sent_requests = []
+
+        def request_handler(url_path=None, http_method=None, body_params=None, path_params=None, query_params=None):
+            sent_requests.append(http_method)
+            if http_method == HTTPMethod.GET and QueryParams.FILTER not in query_params:
+                return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: {'items': []}}
+            elif http_method == HTTPMethod.GET:
+                name = query_params[QueryParams.FILTER][len('name:'):]
+                return {ResponseParams.SUCCESS: True,
+                        ResponseParams.RESPONSE: {'items': [o for o in created_objects if o['name'] == name]}}
+            elif http_method == HTTPMethod.POST:
+                return {ResponseParams.SUCCESS: False, ResponseParams.RESPONSE: DUPLICATE_NAME_ERROR_MESSAGE,
+                        ResponseParams.STATUS_CODE: UNPROCESSABLE_ENTITY_STATUS}
+            return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: body_params}
+
+        operations = self._bulk_upsert_operations(url, '/test/{objId}')
+        connection_mock.get_operation_spec = lambda name: operations[name]
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        connection_mock.send_request = request_handler
+        params = {'operation': 'upsertObject', 'data': [
+            {'name': 'equalObject', 'value': '1', 'type': 'object'},
+            {'name': 'differentObject', 'value': '22', 'type': 'object'}
+        ]}
+
+        result = self._resource_execute_operation(params, connection=connection_mock)
+
+        assert [
+            {'name': 'equalObject', 'status': UpsertStatus.UNCHANGED, 'object': created_objects[0]},
+            {'name': 'differentObject', 'status': UpsertStatus.UPDATED, 'object': dict(created_objects[1], value='22')}
+        ] == result
+        assert [HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.GET,
+                HTTPMethod.PUT] == sent_requests
+
+    def test_module_should_fail_when_bulk_upsert_object_has_multiple_existing_objects(self, connection_mock):
+        url = '/test'
+        operations = self._bulk_upsert_operations(url, '/test/{objId}')
+        connection_mock.get_operation_spec = lambda name: operations[name]
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        connection_mock.send_request.return_value = {
+            ResponseParams.SUCCESS: True,
+            ResponseParams.RESPONSE: {'items': [{'name': 'testObject', 'id': '1'}, {'name': 'testObject', 'id': '2'}]}
+        }
+        params = {'operation': 'upsertObject', 'data': [{'name': 'testObject', 'type': 'object'}]}
+
+        result = self._resource_execute_operation_with_expected_failure(
+            expected_exception_class=FtdConfigurationError, params=params, connection=connection_mock)
+
+        assert 'Cannot upsert object "testObject". Multiple objects with the same name exist.' == result.msg
+
+    @pytest.mark.parametrize('objects', [
+        [{'type': 'object'}],
+        ['testObject'],
+        [{'name': 'testObject'}, {'name': 'testObject'}]
+    ])
+    def test_module_should_fail_when_bulk_upsert_objects_cannot_be_matched_by_name(self, objects, connection_mock):
+        operations = self._bulk_upsert_operations('/test', '/test/{objId}')
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+        params = {'operation': 'upsertObject', 'data': objects}
+
+        self._resource_execute_operation_with_expected_failure(
+            expected_exception_class=FtdConfigurationError, params=params, connection=connection_mock)
+        connection_mock.send_request.assert_not_called()
+
+    def test_module_should_fail_when_list_of_objects_is_used_with_not_upsert_operation(self, connection_mock):
+        params = {'operation': 'addObject', 'data': [{'name': 'testObject'}]}
+
+        self._resource_execute_operation_with_expected_failure(
+            expected_exception_class=FtdConfigurationError, params=params, connection=connection_mock)
+        connection_mock.send_request.assert_not_called()
+
+    def _object_index_connection(self, connection_mock, existing_objects, sent_requests):
+        url = '/test'
+        operations = self._bulk_upsert_operations(url, '/test/{objId}')
+        operations['deployObject'] = {'method': HTTPMethod.POST, 'modelName': 'Deployment', 'url': '/deploy'}
+        connection_mock.get_operation_spec = lambda name: operations[name]
+        connection_mock.get_operation_specs_by_model_name.return_value = operations
+
+        def request_handler(url_path=None, http_method=None, body_params=None, path_params=None, query_params=None):
+            sent_requests.append(http_method)
+            if http_method == HTTPMethod.GET:
+                name = query_params[QueryParams.FILTER][len('name:'):] if QueryParams.FILTER in query_params else None
+                return {ResponseParams.SUCCESS: True,
+                        ResponseParams.RESPONSE: {'items': [o for o in existing_objects if name in (None, o['name'])]}}
+            elif http_method == HTTPMethod.POST and url_path == url:
+                if any(o['name'] == body_params['name'] for o in existing_objects):
+                    return {ResponseParams.SUCCESS: False, ResponseParams.RESPONSE: DUPLICATE_NAME_ERROR_MESSAGE,
+                            ResponseParams.STATUS_CODE: UNPROCESSABLE_ENTITY_STATUS}
+                existing_objects.append(dict(body_params, id=str(len(existing_objects))))
+                return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: existing_objects[-1]}
+            return {ResponseParams.SUCCESS: True, ResponseParams.RESPONSE: {}}
+
+        connection_mock.send_request = request_handler
+
+    def test_upsert_should_look_up_object_on_device_after_duplicate_name_error(self, connection_mock):
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'id': '0', 'version': 'v'}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        object_index = ObjectIndex()
+        params = {'operation': 'upsertObject', 'data': {'name': 'testObject', 'type': 'object'}}
+
+        for dummy in range(2):
+            resource = BaseConfigurationResource(connection_mock, object_index=object_index)
+            assert existing_objects[0] == resource.execute_operation('upsertObject', copy.deepcopy(params))
+
+        assert [HTTPMethod.POST, HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.GET] == sent_requests
+
+    @pytest.mark.parametrize('upsert_strategy, expected_requests', [
+        (UpsertStrategy.ADD_FIRST, [HTTPMethod.POST, HTTPMethod.GET, HTTPMethod.PUT]),
+        (UpsertStrategy.LOOKUP_FIRST, [HTTPMethod.GET, HTTPMethod.PUT])
+    ])
+    def test_upsert_should_edit_object_created_by_another_writer_after_it_was_not_found(
+            self, upsert_strategy, expected_requests, connection_mock):
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'value': '1', 'id': '0', 'version': 'v'}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        object_index = ObjectIndex()
+        # the object was created after the index had learned that there was no object with the name
+        object_index.put_by_name('Object', {}, 'testObject', [])
+        resource = BaseConfigurationResource(connection_mock, object_index=object_index,
+                                             upsert_strategy=upsert_strategy)
+
+        resource.execute_operation('upsertObject', {'data': {'name': 'testObject', 'type': 'object', 'value': '2'}})
+
+        assert expected_requests == sent_requests
+
+    def test_upsert_should_use_objects_added_in_the_same_connection(self, connection_mock):
+        sent_requests = []
+        self._object_index_connection(connection_mock, [], sent_requests)
+        object_index = ObjectIndex()
+        params = {'operation': 'upsertObject', 'data': {'name': 'testObject', 'type': 'object'}}
+
+        added_obj = BaseConfigurationResource(connection_mock, object_index=object_index).execute_operation(
+            'upsertObject', copy.deepcopy(params))
+        upserted_obj = BaseConfigurationResource(connection_mock, object_index=object_index).execute_operation(
+            'upsertObject', copy.deepcopy(params))
+
+        assert added_obj == upserted_obj
+        assert [HTTPMethod.POST, HTTPMethod.POST, HTTPMethod.GET] == sent_requests
+
+    def test_object_index_should_be_invalidated_by_unknown_writes(self, connection_mock):
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'id': '0', 'version': 'v'}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        object_index = ObjectIndex()
+        params = {'operation': 'upsertObject', 'data': {'name': 'testObject', 'type': 'object'}}
+
+        BaseConfigurationResource(connection_mock, object_index=object_index).execute_operation(
+            'upsertObject', copy.deepcopy(params))
+        BaseConfigurationResource(connection_mock, object_index=object_index).execute_operation(
+            'deployObject', {})
+        BaseConfigurationResource(connection_mock, object_index=object_index).execute_operation(
+            'upsertObject', copy.deepcopy(params))
+
+        assert [HTTPMethod.POST, HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.POST, HTTPMethod.GET] == sent_requests
+
+    def test_object_index_should_be_invalidated_when_write_fails_with_unknown_result(self, connection_mock):
+        existing_objects = []
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        send_request = connection_mock.send_request
+
+        def request_handler(url_path=None, http_method=None, body_params=None, path_params=None, query_params=None):
+            response = send_request(url_path, http_method, body_params, path_params, query_params)
+            if http_method == HTTPMethod.POST and len(existing_objects) == 1:
+                # the object is created, but the connection is lost before the response is received
+                raise ConnectionError('Connection reset by peer')
+            return response
+
+        connection_mock.send_request = request_handler
+        object_index = ObjectIndex()
+        params = {'data': [{'name': 'testObject', 'type': 'object'}]}
+
+        resource = BaseConfigurationResource(connection_mock, object_index=object_index)
+        with pytest.raises(ConnectionError):
+            resource.execute_operation('upsertObject', copy.deepcopy(params))
+        upserted_objs = resource.execute_operation('upsertObject', copy.deepcopy(params))
+
+        expected_result = [{'name': 'testObject', 'status': UpsertStatus.UNCHANGED, 'object': existing_objects[0]}]
+        assert expected_result == upserted_objs
+        assert [HTTPMethod.GET, HTTPMethod.POST, HTTPMethod.GET] == sent_requests
+
+    def test_lookup_first_upsert_should_edit_object_changed_on_device_after_it_was_cached(self, connection_mock):
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'value': '1', 'id': '0', 'version': 'v'}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        object_index = ObjectIndex()
+        params = {'data': {'name': 'testObject', 'type': 'object', 'value': '1'}}
+
+        resource = BaseConfigurationResource(connection_mock, object_index=object_index,
+                                             upsert_strategy=UpsertStrategy.LOOKUP_FIRST)
+        resource.execute_operation('upsertObject', copy.deepcopy(params))
+        # another writer changes the object after it has been cached
+        existing_objects[0] = dict(existing_objects[0], value='2')
+        resource.execute_operation('upsertObject', copy.deepcopy(params))
+
+        assert [HTTPMethod.GET, HTTPMethod.GET, HTTPMethod.PUT] == sent_requests
+
+    def test_lookup_first_upsert_should_not_try_to_add_existing_objects(self, connection_mock):
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'value': '1', 'id': '0', 'version': 'v'}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        resource = BaseConfigurationResource(connection_mock, upsert_strategy=UpsertStrategy.LOOKUP_FIRST)
+
+        unchanged_obj = resource.execute_operation('upsertObject',
+                                                   {'data': {'name': 'testObject', 'type': 'object', 'value': '1'}})
+        resource.execute_operation('upsertObject', {'data': {'name': 'testObject', 'type': 'object', 'value': '2'}})
+        added_obj = resource.execute_operation('upsertObject',
+                                               {'data': {'name': 'newObject', 'type': 'object', 'value': '3'}})
+
+        assert existing_objects[0] == unchanged_obj
+        assert existing_objects[1] == added_obj
+        assert [HTTPMethod.GET, HTTPMethod.GET, HTTPMethod.PUT, HTTPMethod.GET, HTTPMethod.POST] == sent_requests
+
+    def test_auto_upsert_should_look_up_first_when_most_objects_of_model_exist(self, connection_mock):
+        existing_objects = [{'name': 'object%s' % i, 'type': 'object', 'id': str(i)} for i in range(3)]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        upsert_statistics = UpsertStatistics()
+
+        for name in ['newObject', 'object0', 'object1', 'object2']:
+            BaseConfigurationResource(connection_mock, upsert_strategy=UpsertStrategy.AUTO,
+                                      upsert_statistics=upsert_statistics).execute_operation(
+                'upsertObject', {'data': {'name': name, 'type': 'object'}})
+
+        assert [
+            HTTPMethod.POST,
+            HTTPMethod.POST, HTTPMethod.GET,
+            HTTPMethod.POST, HTTPMethod.GET,
+            HTTPMethod.GET
+        ] == sent_requests
+
+    def test_upsert_should_edit_object_found_by_duplicate_check_without_fetching_it_again(self, connection_mock):
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'value': '1', 'id': '0', 'version': 'v1'}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        send_request = connection_mock.send_request
+        edit_requests = []
+
+        def request_handler(url_path=None, http_method=None, body_params=None, path_params=None, query_params=None):
+            if http_method == HTTPMethod.PUT:
+                edit_requests.append((body_params, path_params))
+            return send_request(url_path, http_method, body_params, path_params, query_params)
+
+        connection_mock.send_request = request_handler
+        params = {'operation': 'upsertObject',
+                  'data': {'name': 'testObject', 'type': 'object', 'value': '2', 'version': 'v0'}}
+
+        BaseConfigurationResource(connection_mock).execute_operation('upsertObject', params)
+
+        assert [HTTPMethod.POST, HTTPMethod.GET, HTTPMethod.PUT] == sent_requests
+        assert [({'name': 'testObject', 'type': 'object', 'value': '2', 'id': '0', 'version': 'v1'},
+                 {'objId': '0'})] == edit_requests
+
+    @pytest.mark.parametrize('ignore_reference_order, expected_requests', [
+        (True, [HTTPMethod.POST, HTTPMethod.GET]),
+        (False, [HTTPMethod.POST, HTTPMethod.GET, HTTPMethod.PUT])
+    ])
+    def test_upsert_should_ignore_order_of_references_when_requested(self, ignore_reference_order, expected_requests,
+                                                                     connection_mock):
+        refs = [{'id': '1', 'type': 'networkobject'}, {'id': '2', 'type': 'networkobject'}]
+        existing_objects = [{'name': 'testObject', 'type': 'object', 'id': '0', 'version': 'v', 'networks': refs}]
+        sent_requests = []
+        self._object_index_connection(connection_mock, existing_objects, sent_requests)
+        connection_mock.get_model_spec.return_value = {'properties': {
+            'networks': {'type': 'array', 'items': {'type': 'object', '$ref': '#/definitions/ReferenceModel'}},
+            'name': {'type': 'string'}
+        }}
+        params = {'operation': 'upsertObject', 'ignore_reference_order': ignore_reference_order,
+                  'data': {'name': 'testObject', 'type': 'object', 'networks': list(reversed(refs))}}
+
+        BaseConfigurationResource(connection_mock).execute_operation('upsertObject', params)
+
+        assert expected_requests == sent_requests
+
     @staticmethod
     def _resource_execute_operation(params, connection):
         resource = BaseConfigurationResource(connection)
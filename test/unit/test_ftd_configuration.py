@@ -30,7 +30,7 @@ class TestFtdConfiguration(object):
 
     @pytest.fixture
     def resource_mock(self, mocker):
-        resource_class_mock = mocker.patch('library.ftd_configuration.BaseConfigurationResource')
+        resource_class_mock = mocker.patch('library.ftd_configuration.RemoteConfigurationResource')
         resource_instance = resource_class_mock.return_value
         return resource_instance.execute_operation
 
@@ -98,6 +98,86 @@ class TestFtdConfiguration(object):
         result = self._run_module({'operation': operation_name})
         assert result['response'] == 'ok'
 
+    def test_module_should_pass_list_of_objects_in_data(self, resource_mock):
+        resource_mock.return_value = [{'name': 'foo', 'status': 'added', 'object': {'name': 'foo'}}]
+        data = [{'name': 'foo'}, {'name': 'bar'}]
+
+        result = self._run_module({'operation': 'upsertObject', 'data': data})
+
+        assert resource_mock.return_value == result['response']
+        assert data == resource_mock.call_args[0][1]['data']
+
+    def test_module_should_fail_when_data_is_neither_dict_nor_list(self, resource_mock):
+        result = self._run_module_with_fail_json({'operation': 'addObject', 'data': 'foo'})
+
+        assert result['failed']
+        assert result['msg'].startswith('Invalid data provided')
+        resource_mock.assert_not_called()
+
+    @pytest.fixture
+    def time_mock(self, mocker):
+        time_mock = mocker.patch('module_utils.common.time')
+        clock = [0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        time_mock.time.side_effect = lambda: clock[0]
+        time_mock.sleep.side_effect = sleep
+        return time_mock
+
+    def test_module_should_poll_until_condition_is_met(self, connection_mock, resource_mock, time_mock):
+        connection_mock.get_operation_spec.return_value = {'method': 'get', 'url': '/jobs/backups/{objId}'}
+        resource_mock.side_effect = [{'id': '1', 'status': 'QUEUED'}, {'id': '1', 'status': 'IN_PROGRESS'},
+                                     {'id': '1', 'status': 'SUCCESS'}]
+
+        result = self._run_module({'operation': 'getJobHistoryBackup', 'path_params': {'objId': '1'},
+                                   'wait_for': {'until': {'status': ['SUCCESS', 'FAILED']}}})
+
+        assert {'id': '1', 'status': 'SUCCESS'} == result['response']
+        assert 3 == resource_mock.call_count
+        assert [1, 2] == [call[0][0] for call in time_mock.sleep.call_args_list]
+
+    def test_module_should_poll_while_condition_is_met(self, connection_mock, resource_mock, time_mock):
+        connection_mock.get_operation_spec.return_value = {'method': 'get', 'url': '/operational/deploy/{objId}'}
+        resource_mock.side_effect = [{'id': '1', 'endTime': -1}, {'id': '1', 'endTime': 100}]
+
+        result = self._run_module({'operation': 'getDeployment', 'path_params': {'objId': '1'},
+                                   'wait_for': {'while': {'endTime': -1}, 'poll_interval': 3}})
+
+        assert {'id': '1', 'endTime': 100} == result['response']
+        assert [3] == [call[0][0] for call in time_mock.sleep.call_args_list]
+
+    def test_module_should_fail_when_condition_is_not_met_in_time(self, connection_mock, resource_mock, time_mock):
+        connection_mock.get_operation_spec.return_value = {'method': 'get', 'url': '/jobs/backups/{objId}'}
+        resource_mock.return_value = {'id': '1', 'status': 'IN_PROGRESS'}
+
+        result = self._run_module_with_fail_json({
+            'operation': 'getJobHistoryBackup', 'path_params': {'objId': '1'},
+            'wait_for': {'until': {'status': 'SUCCESS'}, 'timeout': 5, 'max_poll_interval': 2}
+        })
+
+        assert 'The object returned by getJobHistoryBackup operation did not meet the wait_for condition ' \
+               'in 5 seconds.' == result['msg']
+        assert {'id': '1', 'status': 'IN_PROGRESS'} == result['response']
+        assert [1, 2, 2] == [call[0][0] for call in time_mock.sleep.call_args_list]
+
+    def test_module_should_not_repeat_operations_that_change_objects(self, connection_mock, resource_mock):
+        connection_mock.get_operation_spec.return_value = {'method': 'post', 'url': '/action/backup'}
+
+        result = self._run_module_with_fail_json({'operation': 'addBackupImmediate',
+                                                  'wait_for': {'until': {'status': 'SUCCESS'}}})
+
+        assert 'Failed to execute addBackupImmediate operation because of the configuration error: ' \
+               'wait_for can be used only with operations that get objects' == result['msg']
+        resource_mock.assert_not_called()
+
+    def test_module_should_fail_when_wait_for_has_no_condition(self, resource_mock):
+        result = self._run_module_with_fail_json({'operation': 'getJobHistoryBackup', 'wait_for': {'timeout': 5}})
+
+        assert 'one of the following is required: until, while' in result['msg']
+        resource_mock.assert_not_called()
+
     def _run_module(self, module_args):
         set_module_args(module_args)
         with pytest.raises(AnsibleExitJson) as ex:
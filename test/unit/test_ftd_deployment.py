@@ -0,0 +1,206 @@
+# Copyright (c) 2018 Cisco and/or its affiliates.
+#
+# This file is part of Ansible
+#
+# Ansible is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Ansible is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Ansible.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from __future__ import absolute_import
+
+import pytest
+from ansible.module_utils import basic
+from units.modules.utils import set_module_args, exit_json, fail_json, AnsibleFailJson, AnsibleExitJson
+
+from library import ftd_deployment
+from module_utils.common import FtdServerError
+
+
+class TestFtdDeployment(object):
+    module = ftd_deployment
+
+    @pytest.fixture(autouse=True)
+    def module_mock(self, mocker):
+        return mocker.patch.multiple(basic.AnsibleModule, exit_json=exit_json, fail_json=fail_json)
+
+    @pytest.fixture(autouse=True)
+    def connection_mock(self, mocker):
+        connection_class_mock = mocker.patch('library.ftd_deployment.Connection')
+        return connection_class_mock.return_value
+
+    @pytest.fixture
+    def resource_mock(self, mocker):
+        resource_class_mock = mocker.patch('library.ftd_deployment.RemoteConfigurationResource')
+        return resource_class_mock.return_value
+
+    @pytest.fixture
+    def time_mock(self, mocker):
+        time_mock = mocker.patch('module_utils.common.time')
+        clock = [0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        time_mock.time.side_effect = lambda: clock[0]
+        time_mock.sleep.side_effect = sleep
+        return time_mock
+
+    @staticmethod
+    def _mock_requests(resource_mock, pending_changes, deployment_statuses, new_deployment=None, deployments=()):
+        def execute_operation(operation_name, params):
+            if operation_name == 'getBaseEntityDiffList':
+                return {'items': pending_changes}
+            elif operation_name == 'getDeploymentList':
+                return [d for d in deployments if d['state'] == params['filters']['state']]
+            elif operation_name == 'addDeployment':
+                return new_deployment
+            elif operation_name == 'getDeployment':
+                return deployment_statuses.pop(0)
+
+        resource_mock.execute_operation.side_effect = execute_operation
+
+    def test_module_should_not_deploy_when_no_pending_changes(self, resource_mock):
+        self._mock_requests(resource_mock, [], [])
+        set_module_args({})
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert not result['changed']
+        assert 'There are no pending changes to deploy.' == result['msg']
+        resource_mock.execute_operation.assert_called_with('getBaseEntityDiffList', {'query_params': {'limit': 1}})
+
+    def test_module_should_deploy_and_poll_with_exponential_backoff(self, resource_mock, time_mock):
+        self._mock_requests(resource_mock, [{'entityId': '1'}], [
+            {'id': '123', 'state': 'QUEUED'},
+            {'id': '123', 'state': 'DEPLOYING'},
+            {'id': '123', 'state': 'DEPLOYING'},
+            {'id': '123', 'state': 'DEPLOYED', 'endTime': 100}
+        ], new_deployment={'id': '123', 'state': 'QUEUED'}, deployments=[{'id': 'old', 'state': 'DEPLOYED'}])
+        set_module_args({'poll_interval': 1, 'max_poll_interval': 3, 'register_as': 'deployment_status'})
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert result['changed']
+        assert {'id': '123', 'state': 'DEPLOYED', 'endTime': 100} == result['response']
+        assert result['response'] == result['ansible_facts']['deployment_status']
+        assert [1, 2, 3] == [call[0][0] for call in time_mock.sleep.call_args_list]
+        resource_mock.execute_operation.assert_any_call('addDeployment', {})
+        resource_mock.execute_operation.assert_called_with('getDeployment', {'path_params': {'objId': '123'}})
+
+    def test_module_should_wait_for_deployment_in_progress_when_no_pending_changes(self, resource_mock, time_mock):
+        self._mock_requests(resource_mock, [], [
+            {'id': 'running', 'state': 'DEPLOYING'},
+            {'id': 'running', 'state': 'DEPLOYED'}
+        ], deployments=[{'id': 'old', 'state': 'DEPLOYED'}, {'id': 'running', 'state': 'DEPLOYING'}])
+        set_module_args({})
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert result['changed']
+        assert 'running' == result['response']['id']
+        assert 'addDeployment' not in [call[0][0] for call in resource_mock.execute_operation.call_args_list]
+        resource_mock.execute_operation.assert_any_call('getDeploymentList', {'filters': {'state': 'DEPLOYING'}})
+
+    def test_module_should_deploy_changes_made_after_deployment_in_progress_has_started(self, resource_mock,
+                                                                                        time_mock):
+        self._mock_requests(resource_mock, [{'entityId': '1'}], [
+            {'id': 'running', 'state': 'DEPLOYED'},
+            {'id': '123', 'state': 'DEPLOYED'}
+        ], new_deployment={'id': '123', 'state': 'QUEUED'}, deployments=[{'id': 'running', 'state': 'QUEUED'}])
+        set_module_args({})
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert result['changed']
+        assert '123' == result['response']['id']
+        assert [
+            ('getDeploymentList', {'filters': {'state': 'QUEUED'}}),
+            ('getDeployment', {'path_params': {'objId': 'running'}}),
+            ('getBaseEntityDiffList', {'query_params': {'limit': 1}}),
+            ('addDeployment', {}),
+            ('getDeployment', {'path_params': {'objId': '123'}})
+        ] == [call[0] for call in resource_mock.execute_operation.call_args_list]
+
+    def test_module_should_fail_when_deployment_in_progress_fails(self, resource_mock, time_mock):
+        self._mock_requests(resource_mock, [], [{'id': 'running', 'state': 'DEPLOY_FAILED', 'statusMessages': []}],
+                            deployments=[{'id': 'running', 'state': 'DEPLOYING'}])
+        set_module_args({})
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        assert 'Deployment failed. State: DEPLOY_FAILED. Status: []' == ex.value.args[0]['msg']
+
+    def test_module_should_fail_when_deployment_does_not_finish_in_time(self, resource_mock, time_mock):
+        self._mock_requests(resource_mock, [{'entityId': '1'}], [{'id': '123', 'state': 'DEPLOYING'}] * 10,
+                            new_deployment={'id': '123', 'state': 'QUEUED'})
+        set_module_args({'timeout': 10, 'poll_interval': 2, 'max_poll_interval': 4})
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert 'Deployment did not finish in 10 seconds. State: DEPLOYING' == result['msg']
+        assert [2, 4, 4] == [call[0][0] for call in time_mock.sleep.call_args_list]
+
+    def test_module_should_fail_when_deployment_fails(self, resource_mock, time_mock):
+        self._mock_requests(resource_mock, [{'entityId': '1'}], [
+            {'id': '123', 'state': 'DEPLOY_FAILED', 'statusMessages': ['Invalid configuration']}
+        ], new_deployment={'id': '123', 'state': 'QUEUED'})
+        set_module_args({})
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert "Deployment failed. State: DEPLOY_FAILED. Status: ['Invalid configuration']" == result['msg']
+        assert result['changed']
+
+    def test_module_should_report_change_without_deploying_in_check_mode(self, resource_mock):
+        self._mock_requests(resource_mock, [{'entityId': '1'}], [])
+        set_module_args({'_ansible_check_mode': True})
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert ex.value.args[0]['changed']
+        assert 'addDeployment' not in [call[0][0] for call in resource_mock.execute_operation.call_args_list]
+
+    def test_module_should_report_change_without_waiting_for_deployment_in_progress_in_check_mode(
+            self, resource_mock):
+        self._mock_requests(resource_mock, [], [], deployments=[{'id': 'running', 'state': 'DEPLOYING'}])
+        set_module_args({'_ansible_check_mode': True})
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert ex.value.args[0]['changed']
+        assert 'getDeployment' not in [call[0][0] for call in resource_mock.execute_operation.call_args_list]
+
+    def test_module_should_fail_on_server_error(self, resource_mock):
+        resource_mock.execute_operation.side_effect = FtdServerError({'error': 'Forbidden'}, 403)
+        set_module_args({})
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        assert 'Server returned an error trying to deploy pending changes. Status code: 403. ' \
+               "Server response: {'error': 'Forbidden'}" == ex.value.args[0]['msg']
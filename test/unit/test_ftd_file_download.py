@@ -21,8 +21,11 @@ class TestFtdFileDownload(object):
         connection_class_mock = mocker.patch('library.ftd_file_download.Connection')
         return connection_class_mock.return_value
 
-    @pytest.mark.parametrize("missing_arg", ['operation', 'destination'])
-    def test_module_should_fail_without_required_args(self, missing_arg):
+    @pytest.mark.parametrize("missing_arg, msg", [
+        ('operation', 'missing required arguments: operation'),
+        ('destination', 'one of the following is required: destination, files')
+    ])
+    def test_module_should_fail_without_required_args(self, missing_arg, msg):
         module_args = {'operation': 'downloadFile', 'destination': '/tmp'}
         del module_args[missing_arg]
         set_module_args(module_args)
@@ -30,7 +33,7 @@ class TestFtdFileDownload(object):
         with pytest.raises(AnsibleFailJson) as ex:
             self.module.main()
 
-        assert 'missing required arguments: %s' % missing_arg in str(ex)
+        assert msg in str(ex)
 
     def test_module_should_fail_when_no_operation_spec_found(self, connection_mock):
         connection_mock.get_operation_spec.return_value = None
@@ -59,13 +62,15 @@ class TestFtdFileDownload(object):
         assert result['msg'] == 'Invalid download operation: nonDownloadOperation. ' \
                                 'The operation must make GET request and return a file.'
 
-    def test_module_should_call_download_and_return(self, connection_mock):
+    @pytest.mark.parametrize('downloaded', [True, False])
+    def test_module_should_call_download_and_return(self, downloaded, connection_mock):
         connection_mock.validate_path_params.return_value = (True, None)
         connection_mock.get_operation_spec.return_value = {
             OperationField.METHOD: HTTPMethod.GET,
             OperationField.URL: '/file/{objId}',
             OperationField.MODEL_NAME: FILE_MODEL_NAME
         }
+        connection_mock.download_file.return_value = {'destination': '/tmp/file.txt', 'downloaded': downloaded}
 
         set_module_args({
             'operation': 'downloadFile',
@@ -76,5 +81,70 @@ class TestFtdFileDownload(object):
             self.module.main()
 
         result = ex.value.args[0]
-        assert not result['changed']
+        assert downloaded == result['changed']
+        assert downloaded == result['downloaded']
+        assert '/tmp/file.txt' == result['destination']
         connection_mock.download_file.assert_called_once_with('/file/{objId}', '/tmp', {'objId': '12'})
+
+    def test_module_should_download_files_concurrently_and_return_results(self, connection_mock):
+        connection_mock.validate_path_params.return_value = (True, None)
+        connection_mock.get_operation_spec.return_value = {
+            OperationField.METHOD: HTTPMethod.GET,
+            OperationField.URL: '/file/{objId}',
+            OperationField.MODEL_NAME: FILE_MODEL_NAME
+        }
+        connection_mock.download_files.return_value = [
+            {'success': True, 'response': {'destination': '/tmp/backup1.tar', 'downloaded': True}},
+            {'success': True, 'response': {'destination': '/tmp/backup2.tar', 'downloaded': False}}
+        ]
+
+        set_module_args({
+            'operation': 'downloadFile',
+            'files': [
+                {'path_params': {'objId': '1'}, 'destination': '/tmp'},
+                {'path_params': {'objId': '2'}, 'destination': '/tmp/backup2.tar'}
+            ],
+            'max_concurrent_transfers': 2
+        })
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert result['changed']
+        assert [
+            {'operation': 'downloadFile', 'path_params': {'objId': '1'}, 'destination': '/tmp/backup1.tar',
+             'downloaded': True},
+            {'operation': 'downloadFile', 'path_params': {'objId': '2'}, 'destination': '/tmp/backup2.tar',
+             'downloaded': False}
+        ] == result['results']
+        connection_mock.download_files.assert_called_once_with([
+            {'from_url': '/file/{objId}', 'to_path': '/tmp', 'path_params': {'objId': '1'}},
+            {'from_url': '/file/{objId}', 'to_path': '/tmp/backup2.tar', 'path_params': {'objId': '2'}}
+        ], 2)
+
+    def test_module_should_fail_with_results_when_some_downloads_fail(self, connection_mock):
+        connection_mock.validate_path_params.return_value = (True, None)
+        connection_mock.get_operation_spec.return_value = {
+            OperationField.METHOD: HTTPMethod.GET,
+            OperationField.URL: '/file/{objId}',
+            OperationField.MODEL_NAME: FILE_MODEL_NAME
+        }
+        connection_mock.download_files.return_value = [
+            {'success': False, 'response': 'HTTP Error 404: Not Found'},
+            {'success': True, 'response': {'destination': '/tmp/backup2.tar', 'downloaded': True}}
+        ]
+
+        set_module_args({
+            'operation': 'downloadFile',
+            'files': [
+                {'path_params': {'objId': '1'}, 'destination': '/tmp/backup1.tar'},
+                {'path_params': {'objId': '2'}, 'destination': '/tmp/backup2.tar'}
+            ]
+        })
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert 'Failed to download 1 of 2 files.' == result['msg']
+        assert {'operation': 'downloadFile', 'path_params': {'objId': '1'}, 'destination': '/tmp/backup1.tar',
+                'failed': True, 'msg': 'HTTP Error 404: Not Found'} == result['results'][0]
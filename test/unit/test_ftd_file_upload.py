@@ -6,7 +6,9 @@ from units.modules.utils import set_module_args, exit_json, fail_json, AnsibleFa
 
 from library import ftd_file_upload
 from module_utils.fdm_swagger_client import OperationField
-from module_utils.common import HTTPMethod
+from module_utils.common import FtdServerError, HTTPMethod
+
+FIRST_PAGE_PARAMS = {'query_params': {'limit': 10, 'offset': 0}, 'path_params': {}}
 
 
 class TestFtdFileUpload(object):
@@ -21,8 +23,11 @@ class TestFtdFileUpload(object):
         connection_class_mock = mocker.patch('library.ftd_file_upload.Connection')
         return connection_class_mock.return_value
 
-    @pytest.mark.parametrize("missing_arg", ['operation', 'file_to_upload'])
-    def test_module_should_fail_without_required_args(self, missing_arg):
+    @pytest.mark.parametrize("missing_arg, msg", [
+        ('operation', 'missing required arguments: operation'),
+        ('file_to_upload', 'one of the following is required: file_to_upload, files')
+    ])
+    def test_module_should_fail_without_required_args(self, missing_arg, msg):
         module_args = {'operation': 'uploadFile', 'file_to_upload': '/tmp/test.txt'}
         del module_args[missing_arg]
         set_module_args(module_args)
@@ -30,7 +35,7 @@ class TestFtdFileUpload(object):
         with pytest.raises(AnsibleFailJson) as ex:
             self.module.main()
 
-        assert 'missing required arguments: %s' % missing_arg in str(ex)
+        assert msg in str(ex)
 
     def test_module_should_fail_when_no_operation_spec_found(self, connection_mock):
         connection_mock.get_operation_spec.return_value = None
@@ -78,3 +83,190 @@ class TestFtdFileUpload(object):
         assert result['changed']
         assert {'id': '123'} == result['response']
         connection_mock.upload_file.assert_called_once_with('/tmp/test.txt', '/uploadFile')
+
+    @pytest.fixture
+    def resource_mock(self, mocker):
+        resource_class_mock = mocker.patch('library.ftd_file_upload.RemoteConfigurationResource')
+        return resource_class_mock.return_value
+
+    @pytest.fixture
+    def upgrade_file(self, tmpdir):
+        upgrade_file = tmpdir.join('upgrade.tar')
+        upgrade_file.write_binary(b'Upgrade content')
+        return str(upgrade_file)
+
+    def _set_upgrade_upload_args(self, connection_mock, file_to_upload, **kwargs):
+        connection_mock.get_operation_spec.return_value = {
+            OperationField.METHOD: HTTPMethod.POST,
+            OperationField.URL: '/action/uploadupgrade',
+            OperationField.MODEL_NAME: 'FileUploadStatus'
+        }
+        connection_mock.upload_file.return_value = {'id': 'new'}
+        module_args = {'operation': 'postuploadupgrade', 'file_to_upload': file_to_upload}
+        module_args.update(kwargs)
+        set_module_args(module_args)
+
+    @pytest.mark.parametrize("uploaded_file, is_uploaded", [
+        ({'id': '123', 'upgradeFileName': 'upgrade.tar', 'fileSize': 15}, True),
+        ({'id': '123', 'upgradeFileName': 'upgrade.tar', 'fileSize': '15'}, True),
+        ({'id': '123', 'upgradeFileName': 'upgrade.tar', 'fileSize': 16}, False),
+        ({'id': '123', 'upgradeFileName': 'other.tar', 'fileSize': 15}, False),
+        ({'id': '123', 'upgradeFileName': 'upgrade.tar'}, False)
+    ])
+    def test_module_should_skip_upload_when_file_with_same_name_and_size_exists(
+            self, connection_mock, resource_mock, upgrade_file, uploaded_file, is_uploaded):
+        resource_mock.execute_operation.return_value = {'items': [uploaded_file]}
+        self._set_upgrade_upload_args(connection_mock, upgrade_file)
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert ex.value.args[0]['changed'] != is_uploaded
+        assert connection_mock.upload_file.called != is_uploaded
+        assert (uploaded_file if is_uploaded else {'id': 'new'}) == ex.value.args[0]['response']
+        resource_mock.execute_operation.assert_called_once_with('getUpgradeFileList', params=FIRST_PAGE_PARAMS)
+
+    def test_module_should_list_all_pages_of_uploaded_files(self, connection_mock, resource_mock, upgrade_file):
+        other_files = [{'id': str(i), 'upgradeFileName': 'other%s.tar' % i, 'fileSize': 15} for i in range(10)]
+        uploaded_file = {'id': '123', 'upgradeFileName': 'upgrade.tar', 'fileSize': 15}
+        resource_mock.execute_operation.side_effect = [{'items': other_files}, {'items': [uploaded_file]}]
+        self._set_upgrade_upload_args(connection_mock, upgrade_file)
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert not ex.value.args[0]['changed']
+        assert uploaded_file == ex.value.args[0]['response']
+        assert [
+            {'query_params': {'limit': 10, 'offset': 0}, 'path_params': {}},
+            {'query_params': {'limit': 10, 'offset': 10}, 'path_params': {}}
+        ] == [kwargs['params'] for _, kwargs in resource_mock.execute_operation.call_args_list]
+
+    def test_module_should_upload_without_listing_files_when_forced(
+            self, connection_mock, resource_mock, upgrade_file):
+        self._set_upgrade_upload_args(connection_mock, upgrade_file, force=True)
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert ex.value.args[0]['changed']
+        resource_mock.execute_operation.assert_not_called()
+        connection_mock.upload_file.assert_called_once_with(upgrade_file, '/action/uploadupgrade')
+
+    def test_module_should_use_given_uploaded_files_operation(self, connection_mock, resource_mock, upgrade_file):
+        resource_mock.execute_operation.return_value = {'items': []}
+        self._set_upgrade_upload_args(connection_mock, upgrade_file, operation='postuploaddiskfile',
+                                      uploaded_files_operation='getDiskFileList')
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert ex.value.args[0]['changed']
+        resource_mock.execute_operation.assert_called_once_with('getDiskFileList', params=FIRST_PAGE_PARAMS)
+
+    def test_module_should_fail_when_listing_uploaded_files_fails(self, connection_mock, resource_mock, upgrade_file):
+        resource_mock.execute_operation.side_effect = FtdServerError({'error': 'Forbidden'}, 403)
+        self._set_upgrade_upload_args(connection_mock, upgrade_file)
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        assert 'Listing uploaded files with getUpgradeFileList operation failed. Status code: 403. ' \
+               "Server response: {'error': 'Forbidden'}" == ex.value.args[0]['msg']
+        connection_mock.upload_file.assert_not_called()
+
+    def test_module_should_report_change_in_check_mode_when_file_not_uploaded(
+            self, connection_mock, resource_mock, upgrade_file):
+        resource_mock.execute_operation.return_value = {'items': []}
+        self._set_upgrade_upload_args(connection_mock, upgrade_file, _ansible_check_mode=True)
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        assert ex.value.args[0]['changed']
+        connection_mock.upload_file.assert_not_called()
+
+    def test_module_should_upload_files_concurrently_and_return_results(self, connection_mock, resource_mock,
+                                                                        upgrade_file):
+        op_specs = {
+            'postuploadupgrade': {OperationField.METHOD: HTTPMethod.POST, OperationField.URL: '/action/uploadupgrade',
+                                  OperationField.MODEL_NAME: 'FileUploadStatus'},
+            'postuploaddiskfile': {OperationField.METHOD: HTTPMethod.POST,
+                                   OperationField.URL: '/action/uploaddiskfile',
+                                   OperationField.MODEL_NAME: 'FileUploadStatus'},
+            'getUpgradeFileList': {OperationField.METHOD: HTTPMethod.GET,
+                                   OperationField.URL: '/managedentity/upgradefiles',
+                                   OperationField.MODEL_NAME: 'UpgradeFile'}
+        }
+        connection_mock.get_operation_spec.side_effect = lambda op_name: op_specs[op_name]
+        uploaded_file = {'id': '123', 'upgradeFileName': 'upgrade.tar', 'fileSize': 15}
+        resource_mock.execute_operation.return_value = {'items': [uploaded_file]}
+        connection_mock.upload_files.return_value = [
+            {'success': True, 'response': {'id': 'disk1'}},
+            {'success': True, 'response': {'id': 'disk2'}}
+        ]
+        set_module_args({
+            'operation': 'postuploaddiskfile',
+            'files': [
+                {'file_to_upload': '/tmp/disk1.txt'},
+                {'file_to_upload': upgrade_file, 'operation': 'postuploadupgrade'},
+                {'file_to_upload': '/tmp/disk2.txt'}
+            ],
+            'max_concurrent_transfers': 2,
+            'register_as': 'uploaded'
+        })
+
+        with pytest.raises(AnsibleExitJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert result['changed']
+        assert [
+            {'file_to_upload': '/tmp/disk1.txt', 'operation': 'postuploaddiskfile', 'changed': True,
+             'response': {'id': 'disk1'}},
+            {'file_to_upload': upgrade_file, 'operation': 'postuploadupgrade', 'changed': False,
+             'response': uploaded_file},
+            {'file_to_upload': '/tmp/disk2.txt', 'operation': 'postuploaddiskfile', 'changed': True,
+             'response': {'id': 'disk2'}}
+        ] == result['results']
+        assert [{'id': 'disk1'}, uploaded_file, {'id': 'disk2'}] == result['ansible_facts']['uploaded']
+        connection_mock.upload_files.assert_called_once_with([
+            {'from_path': '/tmp/disk1.txt', 'to_url': '/action/uploaddiskfile'},
+            {'from_path': '/tmp/disk2.txt', 'to_url': '/action/uploaddiskfile'}
+        ], 2)
+        connection_mock.upload_file.assert_not_called()
+
+    def test_module_should_fail_with_results_when_some_uploads_fail(self, connection_mock):
+        connection_mock.get_operation_spec.return_value = {
+            OperationField.METHOD: HTTPMethod.POST,
+            OperationField.URL: '/action/uploaddiskfile',
+            OperationField.MODEL_NAME: 'FileUploadStatus'
+        }
+        connection_mock.upload_files.return_value = [
+            {'success': True, 'response': {'id': 'disk1'}},
+            {'success': False, 'response': 'Could not connect to https://testhost.com/action/uploaddiskfile'}
+        ]
+        set_module_args({
+            'operation': 'postuploaddiskfile',
+            'files': [{'file_to_upload': '/tmp/disk1.txt'}, {'file_to_upload': '/tmp/disk2.txt'}]
+        })
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        result = ex.value.args[0]
+        assert 'Failed to upload 1 of 2 files.' == result['msg']
+        assert result['changed']
+        assert {'file_to_upload': '/tmp/disk2.txt', 'operation': 'postuploaddiskfile', 'changed': False,
+                'failed': True, 'msg': 'Could not connect to https://testhost.com/action/uploaddiskfile'} == \
+            result['results'][1]
+
+    def test_module_should_fail_when_file_has_no_operation(self, connection_mock):
+        set_module_args({'files': [{'file_to_upload': '/tmp/disk1.txt', 'operation': 'postuploaddiskfile'},
+                                   {'file_to_upload': '/tmp/disk2.txt'}]})
+
+        with pytest.raises(AnsibleFailJson) as ex:
+            self.module.main()
+
+        assert 'missing required arguments: operation' == ex.value.args[0]['msg']
+        connection_mock.upload_files.assert_not_called()